@@ -0,0 +1,162 @@
+# answers.py
+'''Индекс ответов: русские и английские названия, трёх- и однобуквенные коды.
+
+Точное совпадение ищется в словаре за O(1). Если точного нет, опечатки
+ищутся по BK-дереву (расстояние Левенштейна), без перебора всех названий.
+Подсказки по началу ввода - двоичный поиск по отсортированному списку.
+'''
+from bisect import bisect_left
+
+from structures import AMINO_ACIDS, AMINO_ACID_CODES, RUSSIAN_CODES, EXTRA_NAMES
+
+# сколько опечаток прощается в зависимости от длины ответа
+MIN_FUZZY_LENGTH = 4
+LONG_ANSWER = 8
+
+
+def normalize(text):
+    '''нижний регистр, ё -> е, дефисы и лишние пробелы убраны'''
+    text = text.lower().replace("ё", "е").replace("-", " ")
+    return " ".join(text.split())
+
+
+def edit_distance(a, b):
+    '''расстояние Левенштейна'''
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    '''BK-дерево: поиск слов на расстоянии не больше заданного'''
+
+    def __init__(self, words=()):
+        self.root = None
+        self.size = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        node = [word, {}]
+        if self.root is None:
+            self.root = node
+            self.size = 1
+            return
+        current = self.root
+        while True:
+            d = edit_distance(word, current[0])
+            if d == 0:
+                return
+            child = current[1].get(d)
+            if child is None:
+                current[1][d] = node
+                self.size += 1
+                return
+            current = child
+
+    def search(self, word, tolerance):
+        '''все (расстояние, слово) не дальше tolerance'''
+        found = []
+        if self.root is None:
+            return found
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            d = edit_distance(word, node_word)
+            if d <= tolerance:
+                found.append((d, node_word))
+            # по неравенству треугольника нужны только дети в [d - tol, d + tol]
+            for child_d, child in children.items():
+                if d - tolerance <= child_d <= d + tolerance:
+                    stack.append(child)
+        return found
+
+
+class AnswerIndex:
+    '''все допустимые написания ответов -> название аминокислоты'''
+
+    def __init__(self, keys=None):
+        keys = list(AMINO_ACIDS if keys is None else keys)
+        self.exact = {}
+        fuzzy_words = []
+        for key in keys:
+            english, three, one = AMINO_ACID_CODES[key]
+            names = (key, english) + EXTRA_NAMES.get(key, ())
+            for name in names:
+                self.exact[normalize(name)] = key
+                fuzzy_words.append(normalize(name))
+            # коды проверяются только точно: в них опечатку не отличить от другого кода
+            for code in (three, one, RUSSIAN_CODES[key]):
+                self.exact[normalize(code)] = key
+        self.tree = BKTree(w for w in fuzzy_words if len(w) >= MIN_FUZZY_LENGTH)
+        # для подсказок: отсортированные (написание, название)
+        self.prefixes = sorted(self.exact.items())
+        self._prefix_words = [word for word, _ in self.prefixes]
+
+    def lookup(self, text):
+        '''точное совпадение или None'''
+        return self.exact.get(normalize(text))
+
+    def tolerance(self, word):
+        if len(word) < MIN_FUZZY_LENGTH:
+            return 0
+        return 1 if len(word) < LONG_ANSWER else 2
+
+    def match(self, text):
+        '''название аминокислоты по ответу с учётом опечаток или None
+
+        если опечатка одинаково похожа на две разные аминокислоты, ответ не засчитывается
+        '''
+        word = normalize(text)
+        key = self.exact.get(word)
+        if key is not None or not word:
+            return key
+        tolerance = self.tolerance(word)
+        if not tolerance:
+            return None
+        found = self.tree.search(word, tolerance)
+        if not found:
+            return None
+        best = min(d for d, _ in found)
+        keys = {self.exact[w] for d, w in found if d == best}
+        return keys.pop() if len(keys) == 1 else None
+
+    def suggest(self, text, limit=3):
+        '''названия аминокислот, написание которых начинается с введённого текста'''
+        word = normalize(text)
+        if not word:
+            return []
+        result = []
+        i = bisect_left(self._prefix_words, word)
+        while i < len(self.prefixes) and self._prefix_words[i].startswith(word):
+            key = self.prefixes[i][1]
+            if key not in result:
+                result.append(key)
+                if len(result) == limit:
+                    break
+            i += 1
+        if not result:
+            # подсказка по опечатке в уже набранном слове
+            key = self.match(text)
+            if key is not None:
+                result.append(key)
+        return result
+
+
+_default_index = None
+
+
+def default_index():
+    '''общий индекс по всем аминокислотам, строится один раз'''
+    global _default_index
+    if _default_index is None:
+        _default_index = AnswerIndex()
+    return _default_index
@@ -0,0 +1,225 @@
+# atlas.py
+'''Заранее нарисованный атлас молекул: сырые пиксели RGBA всех структур в одном файле.
+
+Сборка:   python atlas.py build [--scales 1 2]
+Проверка: python atlas.py check
+
+Игра отображает файл в память (mmap) и оборачивает пиксели в поверхности
+без декодирования и перерисовки, а в кэш кладёт их копии в формате экрана.
+Атлас считается устаревшим, если изменились structures.py, molecules.py,
+settings.py или найденный в системе шрифт подписей - тогда молекулы
+рисуются как обычно.
+
+Формат файла:
+    8 байт   - MAGIC
+    32 байта - отпечаток исходников (sha256)
+    4 байта  - длина заголовка JSON (little endian)
+    заголовок JSON: [{"name", "scale", "w", "h", "origin", "offset"}, ...]
+    пиксели RGBA, каждая запись выровнена по 16 байт
+'''
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+
+from structures import AMINO_ACIDS
+
+MAGIC = b"AMATLAS1"
+ALIGN = 16
+HERE = os.path.dirname(os.path.abspath(__file__))
+ATLAS_PATH = os.path.join(HERE, "molecules.atlas")
+# файлы, от которых зависит картинка
+SOURCE_FILES = ("structures.py", "molecules.py", "settings.py")
+
+# отображённые файлы должны жить, пока живут поверхности из них
+_mapped = []
+
+
+def fingerprint():
+    '''отпечаток исходников и шрифта подписей, от которых зависят пиксели атласа'''
+    import fonts
+    import molecules
+
+    h = hashlib.sha256()
+    for filename in SOURCE_FILES:
+        with open(os.path.join(HERE, filename), "rb") as f:
+            h.update(f.read())
+    # подписи рисуются найденным в системе шрифтом: с другим шрифтом атлас устарел
+    path, fake_bold = fonts.resolve(molecules.LABEL_FONT, molecules.LABEL_BOLD)
+    h.update(f"{path}|{fake_bold}".encode("utf-8"))
+    return h.digest()
+
+
+def build(path=ATLAS_PATH, scales=(1,)):
+    '''рисует все аминокислоты и записывает атлас, возвращает число записей'''
+    import pygame
+    import molecules
+
+    entries, blobs, offset = [], [], 0
+    for scale in scales:
+        for name in AMINO_ACIDS:
+            surf = molecules.render_amino_acid(name, scale)
+            pixels = pygame.image.tobytes(surf, "RGBA")
+            entries.append({
+                "name": name,
+                "scale": scale,
+                "w": surf.get_width(),
+                "h": surf.get_height(),
+                "origin": list(molecules.molecule_origin(name, scale)),
+                "offset": offset,
+            })
+            pad = -len(pixels) % ALIGN
+            blobs.append(pixels + bytes(pad))
+            offset += len(pixels) + pad
+
+    header = json.dumps(entries, ensure_ascii=False).encode("utf-8")
+    prefix_len = len(MAGIC) + 32 + 4 + len(header)
+    header += b" " * (-prefix_len % ALIGN)
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(fingerprint())
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp, path)
+    return len(entries)
+
+
+def read_header(mm):
+    '''проверяет файл, возвращает (записи, начало пикселей) или None
+
+    None и для обрезанного или испорченного файла с верным отпечатком
+    '''
+    start = len(MAGIC) + 32 + 4
+    if len(mm) < start or mm[:len(MAGIC)] != MAGIC:
+        return None
+    if mm[len(MAGIC):len(MAGIC) + 32] != fingerprint():
+        return None
+    (header_len,) = struct.unpack_from("<I", mm, len(MAGIC) + 32)
+    if start + header_len > len(mm):
+        return None
+    try:
+        entries = json.loads(bytes(mm[start:start + header_len]).decode("utf-8"))
+    except ValueError:
+        # и UnicodeDecodeError, и json.JSONDecodeError
+        return None
+    if not isinstance(entries, list):
+        return None
+    return entries, start + header_len
+
+
+def entry_bounds(entry, data_start, file_size):
+    '''(ключ, начало, размер, (w, h), origin) записи атласа или None, если
+    запись испорчена или её пиксели выходят за конец файла'''
+    try:
+        w, h, offset = int(entry["w"]), int(entry["h"]), int(entry["offset"])
+        key = (str(entry["name"]), float(entry["scale"]))
+        ox, oy = entry["origin"]
+        origin = (int(ox), int(oy))
+    except (KeyError, TypeError, ValueError):
+        return None
+    start = data_start + offset
+    size = w * h * 4
+    if w <= 0 or h <= 0 or offset < 0 or start + size > file_size:
+        return None
+    return key, start, size, (w, h), origin
+
+
+def load(path=ATLAS_PATH):
+    '''отображает атлас в память, возвращает {(название, масштаб): (поверхность, origin)}
+
+    Если файла нет или он устарел, возвращает None.
+    '''
+    import pygame
+
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        try:
+            # ACCESS_COPY: страницы только для этого процесса, файл не меняется
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (OSError, ValueError):
+            return None
+
+    parsed = read_header(mm)
+    if parsed is None:
+        mm.close()
+        return None
+    entries, data_start = parsed
+
+    # сначала проверяются все записи: пока на mmap нет поверхностей, его можно закрыть
+    bounds = [entry_bounds(e, data_start, len(mm)) for e in entries]
+    if None in bounds:
+        mm.close()
+        return None
+
+    view = memoryview(mm)
+    result = {}
+    try:
+        for key, start, size, wh, origin in bounds:
+            surf = pygame.image.frombuffer(view[start:start + size], wh, "RGBA")
+            result[key] = (surf, origin)
+    except (ValueError, pygame.error):
+        # mmap освободится вместе с уже созданными поверхностями
+        return None
+    _mapped.append(mm)
+    return result
+
+
+def load_into_cache(path=ATLAS_PATH):
+    '''кладёт поверхности атласа в кэш молекул, возвращает число записей (0 - атласа нет)
+
+    вызывается после открытия окна: картинки переводятся в формат экрана
+    (molecules.display_surface), иначе каждый blit шёл бы с попиксельной альфой
+    '''
+    import molecules
+
+    atlas = load(path)
+    if not atlas:
+        return 0
+    theme = molecules.color_theme()
+    # основной масштаб кладётся последним, чтобы LRU вытеснял его в последнюю очередь
+    items = sorted(atlas.items(), key=lambda item: -abs(item[0][1] - 1))
+    for (name, scale), (surf, origin) in items:
+        if name not in AMINO_ACIDS:
+            continue
+        molecules.molecule_cache.put((name, scale, theme), molecules.display_surface(surf))
+        molecules.set_molecule_origin(name, scale, origin)
+    return len(atlas)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Атлас заранее нарисованных молекул")
+    parser.add_argument("command", choices=("build", "check"))
+    parser.add_argument("--path", default=ATLAS_PATH)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1])
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+    pygame.init()
+    if args.command == "build":
+        count = build(args.path, args.scales)
+        print(f"Атлас записан: {args.path}, структур: {count}")
+        return 0
+
+    atlas = load(args.path)
+    if atlas is None:
+        print("Атлас отсутствует или устарел")
+        return 1
+    print(f"Атлас актуален, структур: {len(atlas)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,495 @@
+# benchmark.py
+'''Замеры скорости отрисовки без окна (SDL_VIDEODRIVER=dummy).
+
+Примеры:
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline benchmark_baseline.json --tolerance 0.25
+    python benchmark.py --thresholds benchmark_thresholds.json
+    python benchmark.py --allocations
+
+Файл порогов: {"имя замера": {"p50_us": 400, "p99_us": 2000}, ...}.
+При превышении порога или замедлении относительно baseline больше,
+чем на tolerance, программа завершается с кодом 1. Так же - если молекула
+из кэша картинок рисуется медленнее, чем без него (FASTER_THAN), если
+фоновая подготовка молекул не сокращает простой главного потока
+(prefetch_stalls) или если кадр дольше бюджета не попадает в красный
+столбец гистограммы оверлея (histogram_check).
+
+benchmark_baseline.json - результаты на машине разработчика (--output),
+benchmark_thresholds.json - пороги с запасом для любой машины: молекула из
+кэша и кадры игры. Замеры рисуют на экран (display.set_mode), как игра.
+
+--allocations вместо замеров времени проверяет установившиеся кадры игры
+(без событий и анимаций): после разогрева ни один из них не должен
+выделять память (profiler.AllocationTracker) и рисовать молекулы или текст
+заново; иначе код 1.
+'''
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import pygame
+
+from structures import AMINO_ACIDS
+
+# где на экране альфа-углерод молекулы в замерах отрисовки
+MOLECULE_ANCHOR = (200, 140)
+# сколько раз повторять каждый замер по умолчанию
+DEFAULT_REPEAT = 200
+DEFAULT_WARMUP = 10
+# кадров разогрева и проверки для --allocations
+ALLOCATION_WARMUP = 500
+ALLOCATION_FRAMES = 300
+# замеры, которые должны быть не медленнее парных: у кэша картинок нет
+# смысла, если blit готовой поверхности дороже повтора списка отрисовки
+FASTER_THAN = (
+    ("molecule.cached", "molecule.uncached"),
+    ("frame.new_question.cached", "frame.new_question.uncached"),
+)
+# сколько "думает" игрок над вопросом в замере prefetch_stalls, мс
+PREFETCH_THINK_MS = 30
+# остаток памяти за все кадры проверки: любой объект, который кадр оставляет
+# после себя, даёт не меньше 16 байт на кадр, а шум от счётчиков и списков
+# свободных объектов CPython не растёт с числом кадров
+RETAINED_BYTES_PER_FRAME = 8
+
+
+def percentile(sorted_values, p):
+    '''перцентиль p (0..100) по отсортированному списку'''
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def measure(fn, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP):
+    '''вызывает fn repeat раз, возвращает статистику времени одного вызова в мкс'''
+    for _ in range(warmup):
+        fn()
+    times = []
+    clock = time.perf_counter_ns
+    for _ in range(repeat):
+        start = clock()
+        fn()
+        times.append((clock() - start) / 1000)
+    times.sort()
+    return {
+        "calls": repeat,
+        "mean_us": round(sum(times) / len(times), 2),
+        "min_us": round(times[0], 2),
+        "p50_us": round(percentile(times, 50), 2),
+        "p90_us": round(percentile(times, 90), 2),
+        "p99_us": round(percentile(times, 99), 2),
+        "max_us": round(times[-1], 2),
+    }
+
+
+def molecule_cases(molecules):
+    '''замеры отрисовки каждой аминокислоты: напрямую, списком отрисовки и через кэш картинок;
+    рисуется на экран, как в игре: blit в формат экрана дешевле, чем в поверхность с альфой'''
+    surface = pygame.display.get_surface()
+    x, y = MOLECULE_ANCHOR
+    cases = {}
+    for name, molecule in AMINO_ACIDS.items():
+        # прямая отрисовка по массивам молекулы: вызов функций на каждый атом и связь
+        cases[f"molecule.direct[{name}]"] = (
+            lambda molecule=molecule: molecules.draw_molecule(surface, molecule, x, y))
+        # повтор скомпилированного списка отрисовки
+        cases[f"molecule.uncached[{name}]"] = (
+            lambda name=name: molecules.draw_amino_acid(surface, name, x, y, cached=False))
+        cases[f"molecule.cached[{name}]"] = (
+            lambda name=name: molecules.draw_amino_acid(surface, name, x, y))
+    return cases
+
+
+def primitive_cases(molecules):
+    '''замеры общих частей: скелет и один атом'''
+    surface = pygame.display.get_surface()
+    x, y = MOLECULE_ANCHOR
+    return {
+        "draw_backbone": lambda: molecules.draw_backbone(surface, x, y),
+        "draw_atom": lambda: molecules.draw_atom(surface, x, y, "C"),
+        "draw_atom.uncached_label": lambda: (molecules.clear_label_cache(),
+                                             molecules.draw_atom(surface, x, y, "C")),
+    }
+
+
+def transform_cases(molecules):
+    '''стоимость масштаба и поворота за кадр для самых больших структур'''
+    import transform
+
+    surface = pygame.display.get_surface()
+    x, y = MOLECULE_ANCHOR
+    view = transform.Transform(scale=1.3, angle=30, tx=5, ty=-5)
+    cases = {}
+    for name in ("триптофан", "аргинин"):
+        molecule = AMINO_ACIDS[name]
+        coords = transform.molecule_coords(molecule)
+        pivot = transform.molecule_pivot(molecule)
+        out = transform.apply(view, coords, x, y, pivot)
+        python_coords = list(zip(molecule.xs, molecule.ys))
+
+        def python_loop(python_coords=python_coords, pivot=pivot):
+            # тот же расчёт циклом на Python для сравнения
+            a, b, c, d = view.linear()
+            px, py = pivot
+            ox, oy = x + px + view.tx, y + py + view.ty
+            return [(a * (cx - px) + b * (cy - py) + ox, c * (cx - px) + d * (cy - py) + oy)
+                    for cx, cy in python_coords]
+
+        cases[f"transform.apply[{name}]"] = (
+            lambda coords=coords, pivot=pivot, out=out:
+            transform.apply(view, coords, x, y, pivot, out))
+        cases[f"transform.python_loop[{name}]"] = python_loop
+        cases[f"transform.draw[{name}]"] = (
+            lambda name=name: molecules.draw_amino_acid_transformed(surface, name, x, y, view))
+    return cases
+
+
+def prefetch_stalls(molecules, think_ms=PREFETCH_THINK_MS):
+    '''сколько главный поток простоял на картинках молекул за проход всех вопросов
+    (ожидание фонового потока и рисование при промахе, мс): без подготовки и с
+    prefetch.Prefetcher; между вопросами - think_ms на ответ'''
+    from settings import PREFETCH_DEPTH
+    from prefetch import Prefetcher
+
+    keys = list(AMINO_ACIDS)
+    # масштаб, которого нет ни в атласе, ни в других замерах
+    scale = molecules.mip_level(1.1)
+    stalls = {}
+    for tag in ("off", "on"):
+        cache = molecules.MoleculeCache()
+        prefetcher = Prefetcher(cache, depth=PREFETCH_DEPTH) if tag == "on" else None
+        try:
+            for i, key in enumerate(keys):
+                cache.get(key, scale)
+                if prefetcher is not None:
+                    prefetcher.request(keys[i + 1:], scale)
+                time.sleep(think_ms / 1000)
+        finally:
+            if prefetcher is not None:
+                prefetcher.close()
+        stats = cache.stats()
+        stalls[tag] = round(stats["wait_ms"] + stats["render_ms"], 2)
+    return stalls
+
+
+def frame_cases(molecules):
+    '''замеры целого кадра игры: полная перерисовка, смена вопроса и кадр без изменений'''
+    from settings import WIDTH, HEIGHT
+    from quiz import QuizSession
+    from game import Game
+
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    cases = {}
+    for cached in (False, True):
+        tag = "cached" if cached else "uncached"
+        game = Game(screen, QuizSession(seed=0), transition=None)
+        game.molecule_frame.draw_molecule = (
+            lambda surface, key, x, y, scale=1, cached=cached:
+            molecules.draw_amino_acid(surface, key, x, y, scale, cached=cached))
+        keys = game.session.keys
+
+        def full_frame(game=game):
+            game.renderer.invalidate()
+            game.render()
+
+        state = {"i": 0}
+
+        def new_question(game=game, keys=keys, state=state):
+            # смена молекулы: перерисовывается только рамка
+            state["i"] = (state["i"] + 1) % len(keys)
+            game.molecule_frame.set_molecule(keys[state["i"]])
+            game.render()
+
+        cases[f"frame.full.{tag}"] = full_frame
+        cases[f"frame.new_question.{tag}"] = new_question
+        if cached:
+            cases["frame.idle"] = game.render
+
+    # кадр с ответом: проверка, смена вопроса, отрисовка - без сохранения и с записью в базу
+    import atexit
+    import tempfile
+    import progress
+
+    tmp = tempfile.TemporaryDirectory()
+    store = progress.ProgressStore("benchmark", os.path.join(tmp.name, "progress.sqlite"))
+    atexit.register(tmp.cleanup)
+    atexit.register(store.close)
+    for tag, store in (("", None), (".recording", store)):
+        game = Game(screen, QuizSession(seed=0), progress=store, transition=None)
+
+        def answer_frame(game=game):
+            game.submit(game.session.current_key)
+            game.render()
+
+        cases[f"frame.answer{tag}"] = answer_frame
+
+    # кадр посреди перехода между молекулами на высоком и низком качестве
+    from ui import MoleculeFrame, QUALITY_HIGH, QUALITY_LOW
+    for style in MoleculeFrame.TRANSITIONS:
+        for quality in (QUALITY_HIGH, QUALITY_LOW):
+            game = Game(screen, QuizSession(seed=0), transition=style)
+            game.molecule_frame.quality = quality
+            state = {"i": 0}
+
+            def transition_frame(game=game, state=state):
+                frame = game.molecule_frame
+                if frame._transition is None:
+                    game.session.answer("")
+                    frame.set_molecule(game.session.current_key)
+                # каждый вызов - следующие 20 мс перехода
+                state["i"] = (state["i"] + 1) % (frame.transition_ms // 20)
+                frame.update(frame._transition[2] + state["i"] * 20)
+                game.render()
+
+            cases[f"frame.transition.{style}.q{quality}"] = transition_frame
+    return cases
+
+
+def peptide_cases(molecules):
+    '''прокрутка пептида из 2000 остатков: видимые плитки из кэша'''
+    from peptide import Peptide, parse_sequence
+    from peptide_view import PeptideView
+
+    surface = pygame.Surface((1000, 500))
+    rect = surface.get_rect()
+    view = PeptideView(Peptide(parse_sequence("GASPWRKLMNQYHFDECTVI" * 100)))
+    state = {"step": 37}
+
+    def scroll():
+        # туда и обратно по первым 40 остаткам, плитки рисуются один раз
+        if view.center_x <= 0:
+            state["step"] = 37
+        elif view.center_x >= 40 * 180:
+            state["step"] = -37
+        view.pan(state["step"])
+        surface.fill((0, 0, 0))
+        view.draw(surface, rect)
+
+    return {"peptide.scroll[2000]": scroll}
+
+
+def run(selected=None, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP):
+    '''выполняет замеры, возвращает словарь с результатами'''
+    from settings import WIDTH, HEIGHT
+
+    pygame.init()
+    import molecules
+    pygame.display.set_mode((WIDTH, HEIGHT))
+
+    cases = {}
+    cases.update(primitive_cases(molecules))
+    cases.update(molecule_cases(molecules))
+    cases.update(frame_cases(molecules))
+    cases.update(transform_cases(molecules))
+    cases.update(peptide_cases(molecules))
+
+    results = {}
+    for name, fn in cases.items():
+        if selected and not any(s in name for s in selected):
+            continue
+        results[name] = measure(fn, repeat, warmup)
+    prefetch = None
+    if not selected or any(s in "prefetch" for s in selected):
+        prefetch = prefetch_stalls(molecules)
+    molecules.clear_label_cache()
+    pygame.quit()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "machine": platform.machine(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+            "repeat": repeat,
+        },
+        "results": results,
+        "prefetch_stall_ms": prefetch,
+    }
+
+
+def steady_frame_cases(game):
+    '''кадры игры без событий: ничего не изменилось, мигнул курсор, окно
+    открылось заново (всё с нуля из кэша), перерисовалась рамка с молекулой'''
+    def cursor():
+        # срок мигания наступил
+        game.input_box.cursor_toggle_ms = pygame.time.get_ticks()
+
+    def expose():
+        game.renderer.invalidate()
+
+    def molecule():
+        game.molecule_frame.dirty = True
+
+    return {"idle": None, "cursor": cursor, "expose": expose, "molecule": molecule}
+
+
+def allocation_check(warmup=ALLOCATION_WARMUP, frames=ALLOCATION_FRAMES):
+    '''проверка, что установившиеся кадры ничего не выделяют; возвращает
+    {кадр: статистика AllocationTracker} и список проблем'''
+    from settings import WIDTH, HEIGHT
+    from quiz import QuizSession
+    from game import Game
+    from profiler import AllocationTracker
+    import tracemalloc
+
+    pygame.init()
+    import molecules
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    game = Game(screen, QuizSession(seed=0), transition=None)
+    game.input_box.active = True
+    game.message_box.show("ВЕРНО! Это ГЛИЦИН", (50, 200, 50))
+    events = []
+    results = {}
+    problems = []
+    for name, prepare in steady_frame_cases(game).items():
+        tracker = AllocationTracker()
+        # разогрев тоже под tracemalloc: иначе освобождение того, что было
+        # выделено до начала слежения, не уменьшает счётчик
+        tracker.start()
+        try:
+            for i in range(warmup + frames):
+                if i == warmup:
+                    misses = molecules.molecule_cache.misses
+                    memory = tracemalloc.get_traced_memory()[0]
+                if prepare is not None:
+                    prepare()
+                if i < warmup:
+                    game.frame(events, 33)
+                    continue
+                tracker.begin_frame()
+                game.frame(events, 33)
+                tracker.end_frame()
+            # остаток за все кадры вместе с подготовкой (prepare)
+            retained = tracemalloc.get_traced_memory()[0] - memory
+        finally:
+            tracker.stop()
+        stats = results[name] = tracker.stats()
+        stats["retained_bytes"] = retained
+        stats["cache_misses"] = molecules.molecule_cache.misses - misses
+        if (stats["allocating_frames"] or retained >= RETAINED_BYTES_PER_FRAME * frames
+                or stats["gc_collections"] or stats["cache_misses"]):
+            problems.append(f"{name}: {stats}")
+    if game.prefetcher is not None:
+        game.prefetcher.close()
+    pygame.quit()
+    return results, problems
+
+
+def check(report, baseline=None, tolerance=0.25, thresholds=None):
+    '''сравнивает результаты с baseline и порогами, возвращает список проблем'''
+    problems = []
+    results = report["results"]
+    if baseline:
+        for name, old in baseline.get("results", {}).items():
+            new = results.get(name)
+            if new is None:
+                continue
+            limit = old["p50_us"] * (1 + tolerance)
+            if new["p50_us"] > limit:
+                problems.append(
+                    f"{name}: p50 {new['p50_us']} мкс, было {old['p50_us']} мкс "
+                    f"(допустимо {limit:.2f})")
+    for prefix, other_prefix in FASTER_THAN:
+        for name, new in results.items():
+            if not name.startswith(prefix):
+                continue
+            other = results.get(other_prefix + name[len(prefix):])
+            if other is not None and new["p50_us"] > other["p50_us"]:
+                problems.append(
+                    f"{name}: p50 {new['p50_us']} мкс, медленнее "
+                    f"{other_prefix + name[len(prefix):]} ({other['p50_us']} мкс)")
+    stalls = report.get("prefetch_stall_ms")
+    if stalls and stalls["on"] >= stalls["off"]:
+        problems.append(f"prefetch: главный поток ждал {stalls['on']} мс с подготовкой "
+                        f"и {stalls['off']} мс без неё")
+    for name, limits in (thresholds or {}).items():
+        new = results.get(name)
+        if new is None:
+            continue
+        for key, limit in limits.items():
+            if new.get(key, 0) > limit:
+                problems.append(f"{name}: {key} {new[key]} мкс > порога {limit} мкс")
+    return problems
+
+
+def histogram_check():
+    '''кадр дольше бюджета попадает в красный столбец оверлея (F3), в бюджете - в зелёный'''
+    from settings import FPS, GREEN, RED
+    from profiler import FrameTimer, histogram_color
+
+    problems = []
+    for ms, color in ((40, RED), (1000 / FPS, RED), (1000 / FPS - 0.5, GREEN), (5, GREEN)):
+        timer = FrameTimer(history=1)
+        timer.add("ui", ms / 1000)
+        timer.end_frame()
+        i = timer.histogram().index(1)
+        if histogram_color(i) != color:
+            problems.append(f"кадр {ms:.1f} мс: столбец {i} цвета {histogram_color(i)}, а не {color}")
+    return problems
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры скорости отрисовки молекул")
+    parser.add_argument("--output", help="куда сохранить результаты в JSON")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--filter", action="append",
+                        help="выполнять только замеры, в имени которых есть подстрока")
+    parser.add_argument("--baseline", help="JSON с прошлыми результатами для сравнения")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="допустимое замедление p50 относительно baseline (0.25 = 25%%)")
+    parser.add_argument("--thresholds", help="JSON с абсолютными порогами по замерам")
+    parser.add_argument("--allocations", action="store_true",
+                        help="проверить, что установившиеся кадры не выделяют память")
+    args = parser.parse_args(argv)
+
+    if args.allocations:
+        results, problems = allocation_check()
+        for name, r in results.items():
+            print(f"frame.{name:<9} кадров {r['frames']}, с выделениями {r['allocating_frames']}, "
+                  f"пик {r['max_peak_bytes']} Б, осталось {r['retained_bytes']} Б, "
+                  f"gc {r['gc_survivors']}/{r['gc_collections']}, "
+                  f"текст {r['text_renders']}, промахи кэша {r['cache_misses']}")
+        for problem in problems:
+            print("ВЫДЕЛЕНИЯ:", problem)
+        return 1 if problems else 0
+
+    report = run(args.filter, args.repeat, args.warmup)
+
+    width = max((len(name) for name in report["results"]), default=0)
+    for name, r in report["results"].items():
+        print(f"{name:<{width}}  p50 {r['p50_us']:>9.1f}  p90 {r['p90_us']:>9.1f}  "
+              f"p99 {r['p99_us']:>9.1f} мкс")
+    stalls = report["prefetch_stall_ms"]
+    if stalls:
+        print(f"prefetch: главный поток ждал молекулы {stalls['off']} мс без подготовки, "
+              f"{stalls['on']} мс с ней")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    baseline = load_json(args.baseline) if args.baseline else None
+    thresholds = load_json(args.thresholds) if args.thresholds else None
+    problems = check(report, baseline, args.tolerance, thresholds) + histogram_check()
+    for problem in problems:
+        print("РЕГРЕССИЯ:", problem)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
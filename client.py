@@ -0,0 +1,111 @@
+# client.py
+'''Сессия на сервере класса (server.py) с тем же интерфейсом, что у quiz.QuizSession.
+
+Игра (game.Game) работает с ней как с обычной сессией и только рисует:
+порядок вопросов, счёт и проверка ответов - на сервере. Вместо названия
+аминокислоты сервер присылает номер вопроса и структуру; структура
+кладётся в structures.REMOTE_MOLECULES под этим номером, и молекула
+рисуется по нему, как по названию.
+
+Ответ ждётся в кадре игры, поэтому время ожидания короткое
+(REQUEST_TIMEOUT). Если сервер не ответил или соединение оборвалось,
+answer бросает RemoteError, а дальше сессия считается потерянной и
+новые запросы сразу заканчиваются той же ошибкой.
+'''
+import socket
+
+from server import encode, decode
+from answers import default_index
+from structures import REMOTE_MOLECULES, molecule_from_data
+
+# подключение и вход
+TIMEOUT = 10
+# ответ на ответ ученика, с
+REQUEST_TIMEOUT = 2
+
+
+class RemoteError(ConnectionError):
+    '''сервер ответил ошибкой, не ответил вовремя или закрыл соединение'''
+
+
+class RemoteSession:
+    def __init__(self, host, port, name):
+        self.sock = socket.create_connection((host, port), timeout=TIMEOUT)
+        self.file = self.sock.makefile("rb")
+        # подсказки ввода считаются локально, ответы проверяет сервер
+        self.index = default_index()
+        self.name = name
+        # порядок вопросов знает только сервер
+        self.seed = None
+        self.lost = None
+        self.answers = 0
+        self._state = None
+        self._set_state(self._request({"type": "join", "name": name}))
+        self.sock.settimeout(REQUEST_TIMEOUT)
+
+    def _request(self, message):
+        if self.lost is not None:
+            raise self.lost
+        try:
+            self.sock.sendall(encode(message))
+            line = self.file.readline()
+            if not line:
+                raise RemoteError("сервер закрыл соединение")
+            reply = decode(line)
+        except socket.timeout:
+            self.lost = RemoteError("сервер не отвечает")
+            raise self.lost
+        except RemoteError as error:
+            self.lost = error
+            raise
+        except (OSError, ValueError) as error:
+            self.lost = RemoteError(f"связь с сервером потеряна: {error}")
+            raise self.lost
+        if reply.get("type") == "error":
+            raise RemoteError(reply["message"])
+        return reply
+
+    def _set_state(self, state):
+        '''запоминает ответ сервера и структуру текущего вопроса'''
+        try:
+            key = state["id"]
+            if key not in REMOTE_MOLECULES:
+                REMOTE_MOLECULES[key] = molecule_from_data(key, state["structure"])
+        except (KeyError, TypeError, ValueError) as error:
+            self.lost = RemoteError(f"непонятный ответ сервера: {error}")
+            raise self.lost
+        self._state = state
+
+    @property
+    def current_key(self):
+        return self._state["id"]
+
+    @property
+    def score(self):
+        return self._state["score"]
+
+    @property
+    def total(self):
+        return self._state["total"]
+
+    @property
+    def finished(self):
+        return self._state["finished"]
+
+    @property
+    def progress(self):
+        return self.score, self.total
+
+    def upcoming(self, n):
+        # порядок вопросов знает только сервер
+        return []
+
+    def answer(self, text):
+        '''отправляет ответ, возвращает (верно ли, аминокислота, о которой спрашивали)'''
+        self._set_state(self._request({"type": "answer", "text": text}))
+        self.answers += 1
+        return self._state["correct"], self._state["answered"]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
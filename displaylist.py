@@ -0,0 +1,110 @@
+# displaylist.py
+'''Скомпилированные списки отрисовки молекул.
+
+Молекула один раз переводится в плоские списки примитивов с готовыми
+толщинами, радиусами, цветами и подписями атомов. Положение в список не
+входит: связи и атомы ссылаются на номера атомов, а экранные координаты
+подставляются при повторе. Поэтому один список служит и обычной отрисовке
+(координаты относительно альфа-углерода сдвигаются в (x, y)), и масштабу с
+поворотом (координаты считает transform.apply). В отличие от кэша картинок,
+список остаётся векторным.
+'''
+from collections import OrderedDict
+
+import pygame
+
+from settings import BLACK, WHITE
+import molecules
+
+# сколько скомпилированных списков хранить
+MAX_LISTS = 64
+
+_lists = OrderedDict()
+STATS = {"compiled": 0, "replayed": 0}
+
+_line = pygame.draw.line
+_circle = pygame.draw.circle
+
+
+class DisplayList:
+    '''примитивы молекулы на одном масштабе
+
+    bonds - (атом 1, атом 2, двойная ли), atoms - (номер атома, цвет, радиус,
+    подпись), points - координаты атомов относительно альфа-углерода
+    '''
+    __slots__ = ("bonds", "atoms", "points", "single_width", "double_width", "outline_width")
+
+    def __init__(self, bonds, atoms, points, single_width, double_width, outline_width):
+        self.bonds = bonds
+        self.atoms = atoms
+        self.points = points
+        self.single_width = single_width
+        self.double_width = double_width
+        self.outline_width = outline_width
+
+
+def compile_molecule(molecule, scale=1):
+    '''переводит молекулу в DisplayList на масштабе scale'''
+    xs, ys = molecule.xs, molecule.ys
+    bonds = [(a, b, order == 2)
+             for a, b, order in zip(molecule.bond_a, molecule.bond_b, molecule.bond_order)]
+    label_size = max(1, round(molecules.LABEL_SIZE * scale))
+    atoms = []
+    for i, (element, r) in enumerate(zip(molecule.elements, molecule.radii)):
+        if not r:
+            continue
+        color = molecules.ELEMENT_COLORS.get(element, (150, 150, 150))
+        text_color = WHITE if element != "H" else BLACK
+        label = molecules.get_atom_label(element, text_color, label_size)
+        atoms.append((i, color, max(1, round(r * scale)), label))
+    points = [(px * scale, py * scale) for px, py in zip(xs, ys)]
+    STATS["compiled"] += 1
+    return DisplayList(bonds, atoms, points, max(1, round(3 * scale)),
+                       max(1, round(2 * scale)), max(1, round(2 * scale)))
+
+
+def replay(surface, compiled, points):
+    '''рисует список по экранным координатам атомов points[i] = (x, y)'''
+    single_width, double_width = compiled.single_width, compiled.double_width
+    for a, b, double in compiled.bonds:
+        x1, y1 = points[a]
+        x2, y2 = points[b]
+        if double:
+            # как в molecules.draw_bond: две линии со сдвигом поперёк связи
+            dx = (y2 - y1) * 0.08
+            dy = (x2 - x1) * 0.08
+            _line(surface, BLACK, (x1 + dx, y1 - dy), (x2 + dx, y2 - dy), double_width)
+            _line(surface, BLACK, (x1 - dx, y1 + dy), (x2 - dx, y2 + dy), double_width)
+        else:
+            _line(surface, BLACK, (x1, y1), (x2, y2), single_width)
+    outline_width = compiled.outline_width
+    for i, color, r, label in compiled.atoms:
+        center = points[i]
+        _circle(surface, color, center, r)
+        _circle(surface, BLACK, center, r, outline_width)
+        surface.blit(label, label.get_rect(center=center))
+    STATS["replayed"] += 1
+
+
+def get_list(name, scale=1):
+    '''скомпилированный список аминокислоты для масштаба; от положения не зависит'''
+    key = (name, scale, molecules.color_theme())
+    compiled = _lists.get(key)
+    if compiled is None:
+        compiled = compile_molecule(molecules.get_molecule(name), scale)
+        _lists[key] = compiled
+        if len(_lists) > MAX_LISTS:
+            _lists.popitem(last=False)
+    else:
+        _lists.move_to_end(key)
+    return compiled
+
+
+def draw_amino_acid(surface, name, x, y, scale=1):
+    '''рисует аминокислоту повтором списка; (x, y) - положение альфа-углерода'''
+    compiled = get_list(name, scale)
+    replay(surface, compiled, [(x + px, y + py) for px, py in compiled.points])
+
+
+def clear():
+    _lists.clear()
@@ -0,0 +1,147 @@
+# export.py
+'''Экспорт всех структур в PNG и спрайт-листы для раздаточных материалов и карточек.
+
+Пример:
+    python export.py --out export --scales 1 2 3 --workers 4
+
+Для каждого масштаба создаются отдельные картинки <scale>x/<english>.png,
+общий спрайт-лист sheet_<scale>x.png и index.json с координатами спрайтов.
+Результат не зависит от числа процессов.
+'''
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from structures import AMINO_ACIDS, AMINO_ACID_CODES
+
+# ширина спрайт-листа при масштабе 1 и промежуток между спрайтами
+SHEET_WIDTH = 1024
+SHEET_GAP = 2
+
+
+def _init_worker():
+    '''каждый процесс рисует без окна'''
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    import pygame
+    pygame.init()
+
+
+def render_sprite(task):
+    '''рисует одну аминокислоту, возвращает её пиксели RGBA'''
+    name, scale = task
+    import pygame
+    import molecules
+    surf = molecules.render_amino_acid(name, scale)
+    origin = molecules.molecule_origin(name, scale)
+    return name, scale, surf.get_size(), origin, pygame.image.tobytes(surf, "RGBA")
+
+
+def render_all(names, scales, workers=None):
+    '''рисует все (название, масштаб) в пуле процессов, порядок результата фиксирован'''
+    tasks = [(name, scale) for scale in scales for name in names]
+    if workers == 1:
+        _init_worker()
+        return [render_sprite(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        # map возвращает результаты в порядке задач
+        return list(pool.map(render_sprite, tasks))
+
+
+def pack_shelves(sizes, sheet_width):
+    '''раскладывает прямоугольники по полкам: сначала высокие, при равенстве - по порядку
+
+    sizes - список (w, h); возвращает (позиции [(x, y)], (ширина, высота листа))
+    '''
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], i))
+    positions = [None] * len(sizes)
+    x = y = shelf_h = used_w = 0
+    for i in order:
+        w, h = sizes[i]
+        if x and x + w > sheet_width:
+            y += shelf_h + SHEET_GAP
+            x = shelf_h = 0
+        positions[i] = (x, y)
+        x += w + SHEET_GAP
+        used_w = max(used_w, x - SHEET_GAP)
+        shelf_h = max(shelf_h, h)
+    return positions, (max(used_w, 1), max(y + shelf_h, 1))
+
+
+def scale_tag(scale):
+    return f"{scale:g}x"
+
+
+def export(out_dir, scales, workers=None, names=None):
+    '''рисует и сохраняет картинки, спрайт-листы и index.json, возвращает индекс'''
+    import pygame
+
+    names = list(names or AMINO_ACIDS)
+    sprites = render_all(names, scales, workers)
+    os.makedirs(out_dir, exist_ok=True)
+
+    index = {"scales": {}}
+    for scale in scales:
+        tag = scale_tag(scale)
+        items = [s for s in sprites if s[1] == scale]
+        os.makedirs(os.path.join(out_dir, tag), exist_ok=True)
+
+        surfaces = []
+        for name, _, size, _, pixels in items:
+            surf = pygame.image.frombytes(pixels, size, "RGBA")
+            filename = os.path.join(tag, AMINO_ACID_CODES[name][0] + ".png")
+            pygame.image.save(surf, os.path.join(out_dir, filename))
+            surfaces.append(surf)
+
+        positions, sheet_size = pack_shelves(
+            [s[2] for s in items], max(round(SHEET_WIDTH * scale), *(s[2][0] for s in items)))
+        sheet = pygame.Surface(sheet_size, pygame.SRCALPHA)
+        sheet.fill((0, 0, 0, 0))
+        entries = {}
+        for (name, _, size, origin, _), surf, (x, y) in zip(items, surfaces, positions):
+            sheet.blit(surf, (x, y))
+            english, three, one = AMINO_ACID_CODES[name]
+            entries[name] = {
+                "english": english,
+                "code3": three,
+                "code1": one,
+                "file": os.path.join(tag, english + ".png"),
+                "x": x, "y": y, "w": size[0], "h": size[1],
+                # положение альфа-углерода внутри спрайта
+                "origin": list(origin),
+            }
+        sheet_name = f"sheet_{tag}.png"
+        pygame.image.save(sheet, os.path.join(out_dir, sheet_name))
+        index["scales"][tag] = {
+            "scale": scale,
+            "sheet": sheet_name,
+            "size": list(sheet_size),
+            "sprites": entries,
+        }
+
+    with open(os.path.join(out_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Экспорт структур аминокислот в PNG")
+    parser.add_argument("--out", default="export", help="папка для результатов")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 2],
+                        help="масштабы, например 1 2 4")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="число процессов (по умолчанию - число ядер)")
+    args = parser.parse_args(argv)
+
+    index = export(args.out, args.scales, args.workers)
+    for tag, info in index["scales"].items():
+        print(f"{tag}: {len(info['sprites'])} структур, лист {info['size'][0]}x{info['size'][1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
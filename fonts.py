@@ -0,0 +1,92 @@
+# fonts.py
+'''Шрифты с запоминанием найденных файлов на диске.
+
+pygame.font.SysFont при первом вызове перебирает все системные шрифты
+(на Linux - через fc-list), это заметная часть запуска. Здесь путь к файлу
+шрифта ищется один раз и сохраняется в кэше, при следующих запусках шрифт
+открывается сразу по пути.
+
+Шрифты берёт и фоновый поток (prefetch.Prefetcher, через подписи атомов),
+поэтому поиск, открытие шрифта и запись кэша идут под _lock.
+'''
+import os
+import json
+import threading
+
+import pygame
+
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "aminoacids",
+)
+CACHE_PATH = os.path.join(CACHE_DIR, "fonts.json")
+
+# "имя|bold" -> [путь или None, нужна ли искусственная жирность]
+_paths = None
+_fonts = {}
+STATS = {"disk_hits": 0, "lookups": 0}
+_lock = threading.RLock()
+
+
+def _load_paths():
+    global _paths
+    if _paths is None:
+        try:
+            with open(CACHE_PATH, encoding="utf-8") as f:
+                _paths = json.load(f)
+        except (OSError, ValueError):
+            _paths = {}
+    return _paths
+
+
+def _save_paths():
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp = CACHE_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(_paths, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, CACHE_PATH)
+    except OSError:
+        # без кэша шрифты просто будут искаться заново
+        pass
+
+
+def resolve(name, bold=False):
+    '''путь к файлу шрифта (None - встроенный шрифт pygame) и нужна ли искусственная жирность'''
+    with _lock:
+        paths = _load_paths()
+        key = f"{name}|{int(bold)}"
+        entry = paths.get(key)
+        if entry is not None and (entry[0] is None or os.path.exists(entry[0])):
+            STATS["disk_hits"] += 1
+            return entry[0], entry[1]
+
+        # как SysFont: если жирного начертания нет, жирность рисуется искусственно
+        STATS["lookups"] += 1
+        path = pygame.font.match_font(name, bold=bold)
+        fake_bold = bool(bold) and (path is None or path == pygame.font.match_font(name))
+        paths[key] = [path, fake_bold]
+        _save_paths()
+        return path, fake_bold
+
+
+def get_font(name, size, bold=False):
+    '''шрифт как pygame.font.SysFont, но без перебора системных шрифтов при каждом запуске'''
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        with _lock:
+            font = _fonts.get(key)
+            if font is None:
+                path, fake_bold = resolve(name, bold)
+                font = pygame.font.Font(path, size)
+                if fake_bold:
+                    font.set_bold(True)
+                _fonts[key] = font
+    return font
+
+
+def clear():
+    '''забывает открытые шрифты (нужно после pygame.quit)'''
+    with _lock:
+        _fonts.clear()
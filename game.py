@@ -0,0 +1,250 @@
+# game.py
+import time
+import pygame
+from settings import *
+from molecules import draw_amino_acid, draw_amino_acid_transformed, mip_level
+from ui import (InputBox, TextLabel, MessageBox, MoleculeFrame, DirtyRenderer, StaticLayer,
+                Layout, render_text)
+from idle import IdleScheduler, ticks
+from fonts import get_font
+from profiler import FrameTimer, TimingOverlay, FrameBudget
+from prefetch import Prefetcher
+
+MESSAGE_DURATION_MS = 1500  # 1.5 секунды
+
+
+class Game:
+    '''окно игры: показывает молекулу текущего вопроса и принимает ответы'''
+
+    def __init__(self, screen, session, timings_csv=None, progress=None, transition=TRANSITION):
+        self.screen = screen
+        # логика викторины (quiz.QuizSession)
+        self.session = session
+        # progress.ProgressStore: ответы сохраняются фоновым потоком
+        self.progress = progress
+        self.scheduler = IdleScheduler(FPS)
+        #следующие молекулы рисуются заранее в фоновом потоке
+        self.prefetcher = Prefetcher(depth=PREFETCH_DEPTH) if PREFETCH_DEPTH > 0 else None
+
+        self.message = ""
+        self.message_color = BLACK
+        self.message_timer_ms = 0
+        # последняя ошибка связи с сервером класса
+        self.connection_error = None
+        # пока ничего не анимируется, кадры рисуются только по событиям и срокам
+        self.animating = False
+        self.running = True
+
+        #все размеры ниже - в координатах макета WIDTH x HEIGHT,
+        #apply_layout переводит их в пиксели окна
+        self.layout = Layout(screen.get_size())
+
+        #поле ввода(ui.py) с подсказками по индексу ответов
+        self.input_box = InputBox(WIDTH // 2 - 150, 550, 300, 50,
+                                  suggest=session.index.suggest)
+
+        #элементы, которые меняются: молекула, счёт, результат, поле ввода
+        self.molecule_frame = MoleculeFrame((WIDTH // 2 - 200, 90, 400, 340),
+                                            draw_amino_acid, draw_amino_acid_transformed)
+        self.molecule_frame.transition = transition
+        self.molecule_frame.set_molecule(session.current_key)
+        self.font_small = get_font(FONT_NAME, SMALL_FONT)
+        self.score_label = TextLabel(self.font_small, DARK_BLUE, (20, 15), self.score_text())
+        self.message_box = MessageBox(self.font_small, WIDTH // 2, 450)
+
+        #время фаз кадра и оверлей с ним (F3)
+        self.timer = FrameTimer(csv_path=timings_csv)
+        #profiler.AllocationTracker (main.py --allocations): выделения памяти за кадр
+        self.allocations = None
+        self.steady_frames = 0
+        self.steady_allocating = 0
+        #бюджет кадра: при нехватке времени анимации упрощаются
+        self.budget = FrameBudget(FPS)
+        self.timing_overlay = TimingOverlay(
+            self.timer, get_font(FONT_NAME, 14), (WIDTH - 260, HEIGHT - 190, 250, 180), self.budget)
+
+        self.renderer = DirtyRenderer(
+            screen,
+            self.draw_background,
+            [self.molecule_frame, self.message_box, self.input_box, self.score_label,
+             self.timing_overlay],
+            self.timer,
+        )
+        self.apply_layout(self.layout)
+
+    def apply_layout(self, layout):
+        '''расставляет элементы и шрифты под размер окна'''
+        self.layout = layout
+        px = layout.px
+        self.font_title = get_font(FONT_NAME, px(36), bold=True)
+        self.font_small = get_font(FONT_NAME, px(SMALL_FONT))
+        self.font_1 = get_font(FONT_NAME, px(20))
+
+        #статичный текст: заголовок и подсказка
+        self.title_text = render_text(self.font_title, "Угадай аминокислоту!", DARK_BLUE)
+        self.text1 = render_text(
+            self.font_1,
+            "Введите название или код аминокислоты и нажмите Enter (Tab - подсказка)",
+            GRAY,
+        )
+
+        self.input_box.relayout(layout.rect(WIDTH // 2 - 150, 550, 300, 50),
+                                get_font(FONT_NAME, px(FONT_SIZE)), layout.scale)
+        self.molecule_frame.relayout(layout.rect(WIDTH // 2 - 200, 90, 400, 340), layout.scale)
+        self.score_label.relayout(self.font_small, layout.point(20, 15))
+        self.message_box.relayout(self.font_small, *layout.point(WIDTH // 2, 450), layout.scale)
+        self.timing_overlay.relayout(get_font(FONT_NAME, px(14)),
+                                     layout.rect(WIDTH - 260, HEIGHT - 190, 250, 180))
+        #фон со всем статичным (текст и рамка) собирается один раз на размер окна
+        self.background = StaticLayer(layout.size, BG_COLOR,
+                                      [self.draw_static_text, self.molecule_frame.draw_static])
+        self.renderer.invalidate()
+        self.prefetch()
+
+    def prefetch(self):
+        '''заказывает картинки следующих вопросов на текущем масштабе рамки'''
+        if self.prefetcher is not None:
+            self.prefetcher.request(self.session.upcoming(PREFETCH_DEPTH),
+                                    mip_level(self.molecule_frame.scale))
+
+    def resize(self):
+        '''окно изменило размер: всё расставляется заново под новый размер'''
+        screen = pygame.display.get_surface() or self.screen
+        self.screen = self.renderer.screen = screen
+        if screen.get_size() != self.layout.size:
+            self.apply_layout(Layout(screen.get_size()))
+
+    def score_text(self):
+        done, total = self.session.progress
+        return f"Счёт: {done}/{total}"
+
+    def draw_static_text(self, surface):
+        x, y = self.layout.point(WIDTH // 2, 15)
+        surface.blit(self.title_text, (x - self.title_text.get_width() // 2, y))
+        x, y = self.layout.point(WIDTH // 2, 510)
+        surface.blit(self.text1, (x - self.text1.get_width() // 2, y))
+
+    def draw_background(self, surface, rect):
+        '''восстанавливает фон в области rect из готового слоя'''
+        self.background.restore(surface, rect)
+
+    def next_deadline(self):
+        '''ближайший срок: исчезновение сообщения или мигание курсора'''
+        # без временных списков: вызывается каждый кадр
+        deadline = self.input_box.next_deadline()
+        overlay = self.timing_overlay.next_deadline()
+        if overlay is not None and (deadline is None or overlay < deadline):
+            deadline = overlay
+        if self.message:
+            message = self.scheduler.last_ms + MESSAGE_DURATION_MS - self.message_timer_ms
+            if deadline is None or message < deadline:
+                deadline = message
+        return deadline
+
+    def submit(self, result):
+        '''проверяет ответ и переходит к следующей аминокислоте'''
+        try:
+            is_correct, key = self.session.answer(result)
+        except ConnectionError as error:
+            # сервер класса (client.RemoteSession) не ответил: игра не падает,
+            # ошибка видна в окне, а после выхода печатается в итогах
+            self.connection_error = error
+            self.message = f"Ошибка сервера: {error}"
+            self.message_color = RED
+            self.message_box.show(self.message, self.message_color, highlight=True)
+            self.input_box.clear()
+            self.message_timer_ms = 0
+            return
+        if self.progress is not None:
+            self.progress.record_answer(key, result, is_correct, self.session.seed)
+        if is_correct:
+            self.message = f"ВЕРНО! Это {key.upper()}"
+            self.message_color = GREEN
+        else:
+            self.message = f"НЕВЕРНО! Это {key.upper()}"
+            self.message_color = RED
+        self.message_box.show(self.message, self.message_color, highlight=True)
+        self.score_label.set_text(self.score_text())
+
+        #следующая аминокислота
+        self.molecule_frame.set_molecule(self.session.current_key)
+        self.prefetch()
+        self.input_box.clear()
+        # перезапуск таймера
+        self.message_timer_ms = 0
+
+    def update(self, events, dt):
+        '''обрабатывает события и таймеры одного кадра'''
+        #обновляем таймер
+        if self.message:
+            self.message_timer_ms += dt
+            if self.message_timer_ms >= MESSAGE_DURATION_MS:
+                self.message = ""
+                self.message_box.hide()
+        now = ticks()
+        self.input_box.update(now)
+        self.timing_overlay.update(now)
+        self.molecule_frame.update(now)
+        self.message_box.update(now)
+
+        start = time.perf_counter()
+        input_time = 0.0
+        resized = False
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                # окно было перекрыто - рисуем всё заново
+                self.renderer.invalidate()
+            elif event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+                # при перетаскивании края событий много - размер меняется один раз за кадр
+                resized = True
+
+            self.molecule_frame.handle_event(event)
+            self.timing_overlay.handle_event(event)
+            input_start = time.perf_counter()
+            result = self.input_box.handle_event(event)
+            input_time += time.perf_counter() - input_start
+            if result is not None:
+                self.submit(result)
+        if resized:
+            self.resize()
+        self.animating = self.molecule_frame.animating or self.message_box.animating
+        self.timer.add("input", input_time)
+        self.timer.add("events", time.perf_counter() - start - input_time)
+
+    def render(self):
+        '''отрисовка только изменившихся областей'''
+        return self.renderer.render()
+
+    def step(self):
+        '''один кадр: ждёт событий, обновляет состояние, рисует'''
+        events, dt = self.scheduler.wait(self.animating, self.next_deadline())
+        self.frame(events, dt)
+
+    def frame(self, events, dt):
+        '''кадр после ожидания; без событий и анимаций он ничего не выделяет'''
+        allocations = self.allocations
+        if allocations is not None:
+            steady = not events and not self.animating
+            allocations.begin_frame()
+        self.update(events, dt)
+        self.render()
+        self.timer.end_frame()
+        quality = self.budget.measure(self.timer.last_total, self.animating)
+        self.molecule_frame.quality = self.message_box.quality = quality
+        if allocations is not None:
+            allocated = allocations.end_frame()
+            self.steady_frames += steady
+            self.steady_allocating += steady and allocated
+        if self.session.finished:
+            self.running = False
+
+    def run(self):
+        try:
+            while self.running:
+                self.step()
+        finally:
+            self.timer.close()
+            if self.prefetcher is not None:
+                self.prefetcher.close()
@@ -0,0 +1,155 @@
+# golden.py
+'''Проверка отрисовки по эталонным картинкам, без окна.
+
+Примеры:
+    python golden.py                 # сравнить с golden/
+    python golden.py --update        # перерисовать эталоны после намеренного изменения
+
+Каждая аминокислота из AMINO_ACIDS рисуется так же, как для кэша
+(molecules.render_amino_acid), на масштабах SCALES и сравнивается с
+golden/<scale>x/<english>.png. Сравнение попиксельное, массивами NumPy
+прямо по байтам поверхности: пиксель отличается, если какой-нибудь канал RGBA
+разошёлся больше чем на --tolerance, а картинка не проходит, если таких
+пикселей больше доли --max-diff или у неё другой размер (тогда
+сравнивается общий холст). Для непрошедших в
+golden/diff/ записываются отличия (красным поверх бледного эталона) и то,
+что нарисовалось; программа завершается с кодом 1.
+
+Подписи атомов рисуются системным шрифтом (fonts.resolve), поэтому на
+машине с другим шрифтом эталоны нужно перерисовать.
+'''
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import shutil
+import sys
+import time
+
+import numpy as np
+import pygame
+
+from structures import AMINO_ACIDS, AMINO_ACID_CODES
+from export import scale_tag
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+SCALES = (0.5, 1, 2)
+# на сколько может разойтись канал пикселя (сглаживание, округление)
+TOLERANCE = 8
+# доля пикселей, которые могут отличаться больше TOLERANCE
+MAX_DIFF = 0.0005
+
+
+def rgba(surf):
+    '''пиксели поверхности массивом (высота, ширина, 4) без поканального копирования'''
+    w, h = surf.get_size()
+    return np.frombuffer(pygame.image.tobytes(surf, "RGBA"), np.uint8).reshape(h, w, 4)
+
+
+def pad(pixels, shape):
+    '''дополняет картинку прозрачными пикселями справа и снизу до shape'''
+    h, w = pixels.shape[:2]
+    if (h, w) == shape:
+        return pixels
+    return np.pad(pixels, ((0, shape[0] - h), (0, shape[1] - w), (0, 0)))
+
+
+def compare(actual, expected, tolerance=TOLERANCE):
+    '''маска отличающихся пикселей; картинки разного размера сравниваются
+    по общему холсту, выступающее за меньшую считается отличием'''
+    if actual.shape != expected.shape:
+        shape = (max(actual.shape[0], expected.shape[0]), max(actual.shape[1], expected.shape[1]))
+        actual, expected = pad(actual, shape), pad(expected, shape)
+    elif np.array_equal(actual, expected):
+        return np.zeros(actual.shape[:2], bool)
+    diff = np.abs(actual.astype(np.int16) - expected.astype(np.int16))
+    return diff.max(axis=2) > tolerance
+
+
+def diff_image(expected, mask):
+    '''бледный эталон на белом, отличия - красным'''
+    alpha = expected[:, :, 3:].astype(np.uint16)
+    rgb = (expected[:, :, :3] * alpha + 255 * (255 - alpha)) // 255
+    pale = (255 - (255 - rgb) // 3).astype(np.uint8)
+    pale[mask] = (255, 0, 0)
+    h, w = mask.shape
+    return pygame.image.frombytes(pale.tobytes(), (w, h), "RGB")
+
+
+def check(golden_dir=GOLDEN_DIR, scales=SCALES, tolerance=TOLERANCE, max_diff=MAX_DIFF,
+          update=False):
+    '''рисует все структуры и сравнивает с эталонами (или перезаписывает их при update)
+
+    возвращает (число картинок, [(файл, причина), ...] для непрошедших)
+    '''
+    pygame.init()
+    import molecules
+
+    diff_dir = os.path.join(golden_dir, "diff")
+    if not update:
+        shutil.rmtree(diff_dir, ignore_errors=True)
+    failures = []
+    count = 0
+    for scale in scales:
+        tag = scale_tag(scale)
+        for name in AMINO_ACIDS:
+            count += 1
+            filename = os.path.join(tag, AMINO_ACID_CODES[name][0] + ".png")
+            path = os.path.join(golden_dir, filename)
+            surf = molecules.render_amino_acid(name, scale)
+            if update:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                pygame.image.save(surf, path)
+                continue
+            if not os.path.exists(path):
+                failures.append((filename, "нет эталона"))
+                continue
+
+            expected = rgba(pygame.image.load(path))
+            mask = compare(rgba(surf), expected, tolerance)
+            bad = int(mask.sum())
+            h, w = expected.shape[:2]
+            if surf.get_size() != (w, h):
+                reason = f"размер {surf.get_width()}x{surf.get_height()} вместо {w}x{h}"
+            elif bad > max_diff * mask.size:
+                reason = f"отличаются {bad} пикселей из {mask.size}"
+            else:
+                continue
+            failures.append((filename, reason))
+
+            out = os.path.join(diff_dir, filename)
+            os.makedirs(os.path.dirname(out), exist_ok=True)
+            pygame.image.save(surf, out[:-4] + ".actual.png")
+            pygame.image.save(diff_image(pad(expected, mask.shape), mask), out)
+    return count, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сравнение отрисовки структур с эталонами")
+    parser.add_argument("--golden", default=GOLDEN_DIR, help="папка с эталонами")
+    parser.add_argument("--scales", type=float, nargs="+", default=list(SCALES))
+    parser.add_argument("--tolerance", type=int, default=TOLERANCE,
+                        help="допустимое отличие канала пикселя (0-255)")
+    parser.add_argument("--max-diff", type=float, default=MAX_DIFF,
+                        help="допустимая доля отличающихся пикселей")
+    parser.add_argument("--update", action="store_true", help="перерисовать эталоны")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    count, failures = check(args.golden, args.scales, args.tolerance, args.max_diff, args.update)
+    seconds = time.perf_counter() - start
+    if args.update:
+        print(f"Эталоны перерисованы: {count} картинок в {args.golden} за {seconds:.2f} с")
+        return 0
+    for filename, reason in failures:
+        print(f"  {filename}: {reason}")
+    print(f"Картинок: {count}, не совпали: {len(failures)}, за {seconds:.2f} с")
+    if failures:
+        print(f"Отличия: {os.path.join(args.golden, 'diff')}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# idle.py
+import pygame
+from settings import FPS
+
+# часы кадра; при быстром повторе записи (recorder.py) время виртуальное
+_clock = pygame.time.get_ticks
+
+
+def ticks():
+    '''время в мс, по которому считаются кадры, сроки и анимации'''
+    return _clock()
+
+
+def set_clock(clock=None):
+    '''подменяет часы (None - снова pygame.time.get_ticks)'''
+    global _clock
+    _clock = clock or pygame.time.get_ticks
+
+
+class IdleScheduler:
+    '''Ждёт событий вместо постоянных 30 кадров в секунду.
+
+    Пока ничего не анимируется, процесс спит в pygame.event.wait до
+    ближайшего события или до ближайшего срока (исчезновение сообщения,
+    мигание курсора). Во время анимации работает как clock.tick(FPS).
+    '''
+
+    def __init__(self, fps=FPS):
+        self.fps = fps
+        self.clock = pygame.time.Clock()
+        self.last_ms = ticks()
+        self.started_ms = self.last_ms
+        # сколько миллисекунд процесс проспал
+        self.idle_ms = 0
+        self.frames = 0
+        self.idle_wakeups = 0
+
+    def wait(self, animating=False, deadline_ms=None):
+        '''ждёт следующего кадра, возвращает (события, прошедшие миллисекунды)
+
+        deadline_ms - время по ticks(), к которому нужно проснуться
+        '''
+        if animating:
+            self.clock.tick(self.fps)
+            # clock.tick спит до начала следующего кадра
+            self.idle_ms += max(0, self.clock.get_time() - self.clock.get_rawtime())
+            events = pygame.event.get()
+        else:
+            before = ticks()
+            if deadline_ms is None:
+                first = pygame.event.wait()
+            else:
+                first = pygame.event.wait(max(1, deadline_ms - before))
+            now = ticks()
+            self.idle_ms += now - before
+            self.idle_wakeups += 1
+            events = pygame.event.get()
+            if first.type != pygame.NOEVENT:
+                events.insert(0, first)
+            # держим отсчёт clock.tick в актуальном состоянии для следующей анимации
+            self.clock.tick()
+
+        now = ticks()
+        dt = now - self.last_ms
+        self.last_ms = now
+        self.frames += 1
+        return events, dt
+
+    def idle_percent(self):
+        '''доля времени, которую процесс проспал, в процентах'''
+        total = ticks() - self.started_ms
+        if total <= 0:
+            return 0.0
+        return 100.0 * self.idle_ms / total
+
+    def stats(self):
+        '''статистика планировщика'''
+        return {
+            "frames": self.frames,
+            "idle_wakeups": self.idle_wakeups,
+            "idle_ms": self.idle_ms,
+            "idle_percent": round(self.idle_percent(), 1),
+        }
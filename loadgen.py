@@ -0,0 +1,105 @@
+# loadgen.py
+'''Нагрузочная проверка сервера класса: много учеников отвечают одновременно.
+
+    python loadgen.py --clients 300             - свой сервер в этом же процессе
+    python loadgen.py --connect 127.0.0.1:8765  - уже запущенный server.py serve
+
+Каждый ученик - задача asyncio со своим подключением. Он отвечает верно
+с вероятностью --accuracy, пока не закончит игру или не даст --answers
+ответов. Названия сервер не присылает: ученик узнаёт аминокислоту по
+присланной структуре (KNOWN_STRUCTURES). В конце печатаются ответы в
+секунду и задержка ответа сервера.
+'''
+import sys
+import time
+import random
+import asyncio
+import statistics
+
+from server import ClassroomServer, Classroom, encode, decode, parse_address
+from structures import AMINO_ACIDS, structure_data
+
+WRONG_ANSWER = "не знаю"
+# структура в виде JSON -> название: так ученик "узнаёт" аминокислоту
+KNOWN_STRUCTURES = {encode(structure_data(molecule)): key for key, molecule in AMINO_ACIDS.items()}
+
+
+async def student(host, port, name, answers, accuracy, rng, latencies):
+    '''один ученик: вход и ответы подряд; в latencies добавляется время каждого ответа, с'''
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(encode({"type": "join", "name": name}))
+        await writer.drain()
+        state = decode(await reader.readline())
+        for _ in range(answers):
+            if state.get("type") == "error" or state["finished"]:
+                break
+            if rng.random() < accuracy:
+                text = KNOWN_STRUCTURES.get(encode(state["structure"]), WRONG_ANSWER)
+            else:
+                text = WRONG_ANSWER
+            start = time.perf_counter()
+            writer.write(encode({"type": "answer", "text": text}))
+            await writer.drain()
+            state = decode(await reader.readline())
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(clients, answers, accuracy, seed, address=None):
+    '''возвращает (время, задержки ответов) для clients учеников'''
+    server = None
+    if address is None:
+        server = ClassroomServer(Classroom(seed))
+        host, port = await server.start("127.0.0.1", 0)
+    else:
+        host, port = address
+    rng = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(
+            student(host, port, f"ученик{i}", answers, accuracy,
+                    random.Random(rng.random()), latencies)
+            for i in range(clients)
+        ))
+    finally:
+        elapsed = time.perf_counter() - start
+        if server is not None:
+            await server.close()
+    return elapsed, latencies
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Нагрузочная проверка сервера класса")
+    parser.add_argument("--clients", type=int, default=300)
+    parser.add_argument("--answers", type=int, default=40,
+                        help="сколько ответов даёт каждый ученик (меньше, если закончил раньше)")
+    parser.add_argument("--accuracy", type=float, default=0.7, help="доля верных ответов")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--connect", metavar="HOST:PORT",
+                        help="проверять уже запущенный сервер, а не свой")
+    args = parser.parse_args(argv)
+
+    address = parse_address(args.connect) if args.connect else None
+    elapsed, latencies = asyncio.run(
+        run(args.clients, args.answers, args.accuracy, args.seed, address))
+    if not latencies:
+        print("Ни одного ответа")
+        return 1
+    latencies = sorted(s * 1000 for s in latencies)
+    # перцентили 1..99
+    q = (statistics.quantiles(latencies, n=100, method="inclusive")
+         if len(latencies) > 1 else latencies * 99)
+    print(f"Учеников: {args.clients}, ответов: {len(latencies)} за {elapsed:.2f} с "
+          f"({len(latencies) / elapsed:.0f} в секунду)")
+    print(f"Задержка ответа: p50 {q[49]:.2f}  p90 {q[89]:.2f}  p99 {q[98]:.2f}  "
+          f"max {latencies[-1]:.2f} мс")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
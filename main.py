@@ -1,113 +1,284 @@
 # main.py
-import pygame
-import random
+import time
+
+#время запуска для отчёта о старте
+START = time.perf_counter()
+
+import sys
+import argparse
 from settings import *
-from molecules import AMINO_ACIDS, draw_amino_acid
-from ui import InputBox
-
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption(TITLE)
-clock = pygame.time.Clock()
-font_title = pygame.font.SysFont(FONT_NAME, 36, bold=True)
-font_small = pygame.font.SysFont(FONT_NAME, SMALL_FONT)
-font_1 = pygame.font.SysFont(FONT_NAME, 20)
-MESSAGE_DURATION_MS = 1500  # 1.5 секунды
-
-#все аминокислоты в случайном порядке
-keys = list(AMINO_ACIDS.keys())
-random.shuffle(keys)
-
-current_index = 0
-score = 0
-message = ""
-message_color = BLACK
-message_timer_ms = 0 
-
-#поле ввода(ui.py)
-input_box = InputBox(WIDTH // 2 - 150, 550, 300, 50)
-
-#текущая аминокислота
-current_key = keys[current_index]
-
-running = True
-while running:
-    dt = clock.tick(FPS)
-    #обновляем таймер
-    if message:
-        message_timer_ms += dt
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        result = input_box.handle_event(event)
-
-        if result is not None:
-            user_answer = result.lower().strip()
-
-            is_correct = (user_answer == current_key)
-
-            if is_correct:
-                score += 1
-                message = f"ВЕРНО! Это {current_key.upper()}"
-                message_color = GREEN
-            else:
-                message = f"НЕВЕРНО! Это {current_key.upper()}"
-                message_color = RED
-
-            #следующеая аминокислота
-            current_index = (current_index + 1) % len(keys)
-            current_key = keys[current_index]
-            input_box.clear()
-            # перезапуск таймера
-            message_timer_ms = 0  
-
-    #отрисовка фона
-
-    screen.fill(BG_COLOR)
-
-    # Заголовок
-    title_text = font_title.render("Угадай аминокислоту!", True, DARK_BLUE)
-    screen.blit(title_text, (WIDTH // 2 - title_text.get_width() // 2, 15))
-
-    #область для молекулы
-    frame_rect = pygame.Rect(WIDTH // 2 - 200, 90, 400, 340)
-    pygame.draw.rect(screen, DARK_BLUE, frame_rect, 3)
-
-    draw_amino_acid(screen, current_key, WIDTH // 2, 230)
-
-    #поле ввода
-    input_box.draw(screen)
-
-    #счёт
-    score_text = font_small.render(f"Счёт: {score}/{len(keys)}", True, DARK_BLUE)
-    screen.blit(score_text, (20, 15))
-
-
-    text1 = font_1.render(
-        "Введите название аминокислоты и нажмите Enter",
-        True,
-        GRAY,
-    )
-    screen.blit(text1, (WIDTH // 2 - text1.get_width() // 2, 510))
-
-    #окно с результатом
-    if message and message_timer_ms < MESSAGE_DURATION_MS:
-        msg_text = font_small.render(message, True, message_color)
-        msg_bg_rect = pygame.Rect(
-            WIDTH // 2 - msg_text.get_width() // 2 - 20,
-            450,
-            msg_text.get_width() + 40,
-            msg_text.get_height() + 10,
-        )
-        pygame.draw.rect(screen, WHITE, msg_bg_rect)
-        pygame.draw.rect(screen, message_color, msg_bg_rect, 3)
-        screen.blit(msg_text, (WIDTH // 2 - msg_text.get_width() // 2, 455))
-
-    pygame.display.flip()
-    if score==len(keys):
-        break
-    #running=false
-pygame.quit()
-print(f"Игра закончена. Финальный счёт: {score}/{len(keys)}")
\ No newline at end of file
+from quiz import QuizSession
+
+
+class StartupReport:
+    '''замеры этапов запуска'''
+
+    def __init__(self, start):
+        self.start = start
+        self.last = start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def print(self):
+        width = max(len(phase) for phase, _ in self.phases)
+        print("Запуск:")
+        for phase, ms in self.phases:
+            print(f"  {phase:<{width}}  {ms:8.1f} мс")
+        print(f"  {'всего':<{width}}  {(self.last - self.start) * 1000:8.1f} мс")
+
+
+def parse_size(text):
+    '''"1920x1080" -> (1920, 1080)'''
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"размер окна в виде ШxВ, а не {text}")
+    if w < 200 or h < 140:
+        raise argparse.ArgumentTypeError("окно не меньше 200x140")
+    return w, h
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=TITLE)
+    parser.add_argument("--startup-report", action="store_true",
+                        help="показать, сколько времени занял каждый этап запуска")
+    parser.add_argument("--seed", type=int, help="порядок вопросов для повтора игры")
+    parser.add_argument("--timings-csv", metavar="PATH",
+                        help="записывать время фаз каждого кадра в CSV")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="запустить игру под cProfile, статистику сохранить в PATH и PATH.txt")
+    parser.add_argument("--size", metavar="WxH", type=parse_size,
+                        help=f"размер окна при запуске (по умолчанию {WIDTH}x{HEIGHT}); "
+                             "окно можно растягивать")
+    parser.add_argument("--peptide", metavar="SEQ",
+                        help="показать пептид, например ГЛИ-АЛА-СЕР, Gly-Ala-Ser или GAS; "
+                             "одно слово вроде ALA неоднозначно - пишите аланин или A-L-A")
+    parser.add_argument("--spaced", action="store_true",
+                        help="интервальное повторение: чаще спрашивать то, в чём ошибаетесь")
+    parser.add_argument("--player", help="сохранять прогресс этого игрока между запусками")
+    parser.add_argument("--progress-db", metavar="PATH",
+                        help="файл базы прогресса (по умолчанию в ~/.local/share/aminoacids)")
+    parser.add_argument("--server", metavar="HOST:PORT",
+                        help="играть на сервере класса (python server.py serve)")
+    parser.add_argument("--name", help="имя ученика на сервере класса")
+    parser.add_argument("--allocations", action="store_true",
+                        help="считать выделения памяти и сборки мусора за кадр (медленно)")
+    parser.add_argument("--transition", choices=("none", "fade", "slide", "rotate"),
+                        default=TRANSITION or "none", help="переход между молекулами (по умолчанию %(default)s)")
+    parser.add_argument("--record", metavar="PATH",
+                        help="записать события игры в файл (recorder.py)")
+    parser.add_argument("--replay", metavar="PATH",
+                        help="повторить записанную игру без окна")
+    parser.add_argument("--fast", action="store_true",
+                        help="с --replay: повторять как можно быстрее, по виртуальным часам")
+    args = parser.parse_args(argv)
+    if (args.record or args.replay) and (args.server or args.peptide):
+        parser.error("--record и --replay только для викторины без --server и --peptide")
+    if args.record and args.replay:
+        parser.error("--record и --replay вместе не используются")
+    if args.fast and not args.replay:
+        parser.error("--fast только вместе с --replay")
+    # заголовок записи (recorder.HEADER): зерно - 64-битное целое со знаком,
+    # ширина и высота окна - 16-битные без знака
+    if args.record and args.seed is not None and not -2 ** 63 <= args.seed < 2 ** 63:
+        parser.error("с --record зерно --seed должно быть от -2**63 до 2**63-1")
+    if args.record and args.size and max(args.size) >= 2 ** 16:
+        parser.error("с --record окно --size не больше 65535x65535")
+    return args
+
+
+def open_replay(args):
+    '''читает запись и берёт из неё параметры игры; окно не открывается'''
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from recorder import EventLog
+    log = EventLog.load(args.replay)
+    args.seed = log.seed
+    args.spaced = log.spaced
+    args.size = log.size
+    args.transition = log.transition or "none"
+    # повтор не должен дописывать прогресс игрока
+    args.player = None
+    return log
+
+
+def open_progress(args):
+    '''база прогресса игрока и его прошлые результаты (None, {} без --player)'''
+    if not args.player:
+        return None, {}
+    import progress
+    store = progress.ProgressStore(args.player, args.progress_db or progress.DB_PATH)
+    history = store.load()
+    seen, correct = progress.summary(history)
+    if seen:
+        print(f"{args.player}: раньше ответов {seen}, верных {100 * correct / seen:.0f}%")
+    return store, history
+
+
+def close_progress(store):
+    '''дописывает очередь ответов; ошибка базы печатается, а не падает трассировкой'''
+    import sqlite3
+    try:
+        store.close()
+    except sqlite3.Error as error:
+        print(f"Не удалось сохранить прогресс игрока: {error}", file=sys.stderr)
+
+
+def open_session(args, history=None):
+    '''сессия викторины: локальная или на сервере класса'''
+    if not args.server:
+        #все аминокислоты в случайном порядке
+        if args.spaced:
+            from functools import partial
+            from repetition import SpacedOrder
+            return QuizSession(seed=args.seed, order=partial(SpacedOrder, history=history))
+        return QuizSession(seed=args.seed)
+    from server import parse_address
+    from client import RemoteSession
+    host, port = parse_address(args.server)
+    name = args.name or input("Имя: ")
+    return RemoteSession(host, port, name)
+
+
+def run_peptide(args):
+    '''режим просмотра пептида вместо викторины'''
+    from peptide import Peptide, parse_sequence
+    try:
+        peptide = Peptide(parse_sequence(args.peptide))
+    except ValueError as error:
+        print(f"Не получилось разобрать последовательность: {error}", file=sys.stderr)
+        return 1
+    import pygame
+    from peptide_view import PeptideViewer
+
+    pygame.init()
+    screen = pygame.display.set_mode(args.size or (WIDTH, HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption(f"{TITLE}: пептид")
+    PeptideViewer(screen, peptide).run()
+    pygame.quit()
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.peptide:
+        return run_peptide(args)
+    report = StartupReport(START)
+    log = None
+    if args.replay:
+        try:
+            log = open_replay(args)
+        except (OSError, ValueError) as error:
+            print(f"Не удалось прочитать запись: {error}", file=sys.stderr)
+            return 1
+        report.mark("запись событий")
+    store, history = open_progress(args)
+    if store is not None:
+        report.mark("прогресс игрока")
+    try:
+        session = open_session(args, history)
+    except (OSError, ValueError) as error:
+        # сервер недоступен, отказал (client.RemoteError) или неверный адрес
+        print(f"Не удалось подключиться к серверу: {error}", file=sys.stderr)
+        if store is not None:
+            close_progress(store)
+        return 1
+    report.mark("ядро: структуры и викторина")
+
+    # pygame загружается только здесь, ядро от него не зависит
+    import pygame
+    import atlas
+    from game import Game
+    report.mark("импорт pygame и интерфейса")
+
+    pygame.init()
+    report.mark("pygame.init")
+    #окно можно растягивать: макет и молекулы перерисовываются под его размер
+    screen = pygame.display.set_mode(args.size or (WIDTH, HEIGHT), pygame.RESIZABLE)
+    pygame.display.set_caption(TITLE)
+    report.mark("окно")
+    #готовые картинки молекул из атласа, если он собран и не устарел
+    atlas.load_into_cache()
+    report.mark("атлас")
+    transition = None if args.transition == "none" else args.transition
+    game = Game(screen, session, args.timings_csv, store, transition)
+    report.mark("шрифты и интерфейс")
+    game.render()
+    report.mark("первый кадр")
+    if args.startup_report:
+        report.print()
+    if args.record:
+        from recorder import EventWriter, RecordingScheduler
+        game.scheduler = RecordingScheduler(EventWriter(
+            args.record, session.seed, screen.get_size(), args.spaced, transition))
+    elif log is not None:
+        from recorder import ReplayScheduler
+        game.scheduler = ReplayScheduler(log, FPS, fast=args.fast)
+    if args.allocations:
+        from profiler import AllocationTracker
+        game.allocations = AllocationTracker()
+        game.allocations.start()
+
+    from ui import TEXT_STATS
+    text_renders = TEXT_STATS["renders"]
+    game_start = time.perf_counter()
+    if args.profile:
+        from profiler import run_profiled
+        run_profiled(game.run, args.profile)
+    else:
+        game.run()
+    game_seconds = time.perf_counter() - game_start
+    text_renders = TEXT_STATS["renders"] - text_renders
+
+    idle_percent = game.scheduler.idle_percent()
+    if args.record:
+        game.scheduler.writer.close()
+    elif log is not None:
+        game.scheduler.close()
+    pygame.quit()
+    if store is not None:
+        # дописывает то, что ещё в очереди
+        close_progress(store)
+    if args.server:
+        session.close()
+    done, total = session.progress
+    print(f"Игра закончена. Финальный счёт: {done}/{total}, ответов: {session.answers}")
+    if game.connection_error is not None:
+        print(f"Ошибка сервера класса: {game.connection_error}", file=sys.stderr)
+    print(f"Простой: {idle_percent:.1f}% времени, кадров: {game.scheduler.frames}")
+    if args.record:
+        print(f"Записано событий: {game.scheduler.writer.events} в {args.record}")
+    elif log is not None:
+        print(f"Повтор: событий {len(log.events)} ({log.duration_ms / 1000:.1f} с игры) "
+              f"за {game_seconds:.2f} с, {game.scheduler.frames / max(game_seconds, 1e-9):.0f} "
+              f"кадров в секунду")
+    budget = game.budget.stats()
+    print(f"Кадров дольше {game.budget.budget_ms:.1f} мс: {budget['dropped']}, "
+          f"качество анимаций: {budget['quality']} (снижалось {budget['downgrades']} раз)")
+    print(f"Отрисовок текста: {text_renders} "
+          f"({text_renders / max(game_seconds, 1e-9):.1f} в секунду)")
+    if game.allocations is not None:
+        stats = game.allocations.stats()
+        game.allocations.stop()
+        print(f"Выделения памяти: кадров {stats['frames']}, "
+              f"с выделениями {stats['allocating_frames']}, из них без событий и анимаций "
+              f"{game.steady_allocating} из {game.steady_frames}")
+        print(f"  пик за кадр {stats['max_peak_bytes']} Б, осталось {stats['retained_bytes']} Б, "
+              f"объектов gc пережило кадр {stats['gc_survivors']}, "
+              f"сборок мусора {stats['gc_collections']} ({stats['gc_ms']:.1f} мс)")
+    if game.prefetcher is not None:
+        from molecules import molecule_cache
+        stats = molecule_cache.stats()
+        print(f"Подготовка молекул: нарисовано заранее {game.prefetcher.rendered}, "
+              f"пригодилось {stats['prefetch_hits']}, ожиданий {stats['waits']} "
+              f"({stats['wait_ms']:.1f} мс), нарисовано в кадре {stats['misses']} "
+              f"({stats['render_ms']:.1f} мс)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,12 @@
 # molecules.py
 import pygame
 import math
+import time
+import threading
+from collections import OrderedDict
 from settings import *
+import fonts
+from structures import BACKBONE, get_molecule
 
 # Цвета атомов в молекуле
 ELEMENT_COLORS = {
@@ -12,579 +17,397 @@ ELEMENT_COLORS = {
     "S": (220, 180, 0),      # Сера
 }
 
-AMINO_ACIDS = {
-    "аланин": "draw_alanine",
-    "глицин": "draw_glycine",
-    "валин": "draw_valine",
-    "лейцин": "draw_leucine",
-    "изолейцин": "draw_isoleucine",
-    "пролин": "draw_proline",
-    "фенилаланин": "draw_phenylalanine",
-    "триптофан": "draw_tryptophan",
-    "серин": "draw_serine",
-    "треонин": "draw_threonine",
-    "цистеин": "draw_cysteine",
-    "метионин": "draw_methionine",
-    "аспарагин": "draw_asparagine",
-    "глутамин": "draw_glutamine",
-    "аспартат": "draw_aspartate",
-    "глутамат": "draw_glutamate",
-    "лизин": "draw_lysine",
-    "аргинин": "draw_arginine",
-    "гистидин": "draw_histidine",
-    "тирозин": "draw_tyrosine",
-}
+
+# Параметры подписи атома
+LABEL_FONT = "arial"
+LABEL_SIZE = 11
+LABEL_BOLD = True
+
+# Кэш готовых подписей атомов.
+# Ключ подписи - (элемент, цвет текста, размер, жирность)
+_label_cache = {}
+LABEL_CACHE_STATS = {"hits": 0, "misses": 0}
+# подписи берёт и фоновый поток (prefetch.Prefetcher)
+_label_lock = threading.Lock()
+
+
+def get_label_font(size=LABEL_SIZE, bold=LABEL_BOLD):
+    '''возвращает шрифт подписи, системный шрифт ищется один раз'''
+    return fonts.get_font(LABEL_FONT, size, bold)
+
+
+def get_atom_label(element, text_color, size=LABEL_SIZE, bold=LABEL_BOLD):
+    '''возвращает готовую поверхность с подписью атома'''
+    key = (element, text_color, size, bold)
+    with _label_lock:
+        text = _label_cache.get(key)
+        if text is None:
+            LABEL_CACHE_STATS["misses"] += 1
+            text = get_label_font(size, bold).render(element, True, text_color)
+            _label_cache[key] = text
+        else:
+            LABEL_CACHE_STATS["hits"] += 1
+    return text
 
 
-def draw_atom(surface, x, y, element, r=10):
+def reset_label_cache_stats():
+    '''обнуляет счётчики попаданий и промахов кэша подписей'''
+    with _label_lock:
+        LABEL_CACHE_STATS["hits"] = 0
+        LABEL_CACHE_STATS["misses"] = 0
+
+
+def clear_label_cache():
+    '''очищает кэш подписей и шрифтов (например, после pygame.quit)'''
+    with _label_lock:
+        _label_cache.clear()
+    fonts.clear()
+    reset_label_cache_stats()
+
+
+def draw_atom(surface, x, y, element, r=10, scale=1):
     '''рисует атом в виде круга с подписью'''
     # рисует круг атома
     color = ELEMENT_COLORS.get(element, (150, 150, 150))
     pygame.draw.circle(surface, color, (x, y), r)
-    pygame.draw.circle(surface, BLACK, (x, y), r, 2)
+    pygame.draw.circle(surface, BLACK, (x, y), r, max(1, round(2 * scale)))
     
-    # создаёт подпись атома
-    label = element
-    font = pygame.font.SysFont("arial", 11, bold=True)
+    # подпись атома берётся из кэша
     text_color = WHITE if element != "H" else BLACK
-    text = font.render(label, True, text_color)
+    text = get_atom_label(element, text_color, max(1, round(LABEL_SIZE * scale)))
     rect = text.get_rect(center=(x, y))
     surface.blit(text, rect)
 
-def draw_bond(surface, x1, y1, x2, y2, double=False):
+def draw_bond(surface, x1, y1, x2, y2, double=False, scale=1):
     '''рисует связи'''
     if double:
         # рисование двойной связи
         dx = (y2 - y1) * 0.08
         dy = (x2 - x1) * 0.08
-        pygame.draw.line(surface, BLACK, (x1 + dx, y1 - dy), (x2 + dx, y2 - dy), 2)
-        pygame.draw.line(surface, BLACK, (x1 - dx, y1 + dy), (x2 - dx, y2 + dy), 2)
+        width = max(1, round(2 * scale))
+        pygame.draw.line(surface, BLACK, (x1 + dx, y1 - dy), (x2 + dx, y2 - dy), width)
+        pygame.draw.line(surface, BLACK, (x1 - dx, y1 + dy), (x2 - dx, y2 + dy), width)
     else:
         # рисование одинарной связи
-        pygame.draw.line(surface, BLACK, (x1, y1), (x2, y2), 3)
-
-def draw_backbone(surface, x, y):
+        pygame.draw.line(surface, BLACK, (x1, y1), (x2, y2), max(1, round(3 * scale)))
+
+def draw_molecule(surface, molecule, x, y, scale=1):
+    '''рисует любую молекулу по её массивам, (x, y) - положение альфа-углерода
+
+    Порядок не тот, что был у прежних функций draw_<аминокислота>: там после
+    скелета рисовались связи и атомы боковой цепи вперемешку, и связь CA-CB
+    ложилась поверх круга альфа-углерода. Здесь все связи лежат под всеми
+    атомами; эталоны golden/ нарисованы уже так.
+    '''
+    xs, ys = molecule.xs, molecule.ys
+    # сначала все связи
+    for a, b, order in zip(molecule.bond_a, molecule.bond_b, molecule.bond_order):
+        draw_bond(surface, x + xs[a] * scale, y + ys[a] * scale,
+                  x + xs[b] * scale, y + ys[b] * scale, order == 2, scale)
+    # атомы поверх связей, вершины скелетной формулы (радиус 0) без подписи
+    for element, ax, ay, r in zip(molecule.elements, xs, ys, molecule.radii):
+        if r:
+            draw_atom(surface, x + ax * scale, y + ay * scale, element,
+                      max(1, round(r * scale)), scale)
+
+# массивы под экранные координаты, чтобы не выделять их каждый кадр
+_points_buffers = {}
+
+_scaled_view = None
+
+
+def draw_amino_acid_transformed(surface, name, x, y, view, scale=1):
+    '''рисует аминокислоту с масштабом, поворотом и сдвигом view (transform.Transform);
+    scale - масштаб окна, он умножается на масштаб view'''
+    global _scaled_view
+    # NumPy загружается только при первом повороте или масштабе
+    from transform import Transform, molecule_coords, molecule_pivot, apply
+
+    molecule = get_molecule(name)
+    pivot = molecule_pivot(molecule)
+    if scale != 1:
+        # view с учётом масштаба окна; центр молекулы остаётся на своём месте
+        if _scaled_view is None:
+            _scaled_view = Transform()
+        _scaled_view.scale = view.scale * scale
+        _scaled_view.angle, _scaled_view.tx, _scaled_view.ty = view.angle, view.tx, view.ty
+        view = _scaled_view
+        x += (scale - 1) * pivot[0]
+        y += (scale - 1) * pivot[1]
+    out = _points_buffers.get(name)
+    points = apply(view, molecule_coords(molecule), x, y, pivot, out)
+    _points_buffers[name] = points
+    if hasattr(points, "tolist"):
+        points = points.tolist()
+    # векторный путь: список отрисовки на масштабе view, координаты - от transform
+    import displaylist
+    displaylist.replay(surface, displaylist.get_list(name, view.scale), points)
+
+def draw_backbone(surface, x, y, scale=1):
     '''Рисует общий скелет аминокислоты N-C-C'''
-    positions = {}
-    
-    ca_x, ca_y = x, y
-    positions["CA"] = (ca_x, ca_y)  # координаты альфа-углерода
-    
-    n_x, n_y = ca_x - 60, ca_y
-    positions["N"] = (n_x, n_y)
-    
-    c_x, c_y = ca_x + 60, ca_y
-    positions["C"] = (c_x, c_y)
-
-    # рисует связи скелета от альфа-C
-    draw_bond(surface, n_x, n_y, ca_x, ca_y)
-    draw_bond(surface, ca_x, ca_y, c_x, c_y)
-    
-    # рисует связь C=O скелета
-    o1_x, o1_y = c_x, c_y - 50
-    draw_bond(surface, c_x, c_y, o1_x, o1_y, double=True)
-    
-    # рисует связь C-OH скелета
-    oh_x, oh_y = c_x + 40, c_y + 20
-    draw_bond(surface, c_x, c_y, oh_x, oh_y)
-    
-    # рисует связь с H при альфа-C
-    ha_x, ha_y = ca_x, ca_y - 40
-    draw_bond(surface, ca_x, ca_y, ha_x, ha_y)
-    
-    # рисует связи 2 H при N
-    hn1_x, hn1_y = n_x - 30, n_y - 20
-    hn2_x, hn2_y = n_x - 30, n_y + 20
-    draw_bond(surface, n_x, n_y, hn1_x, hn1_y)
-    draw_bond(surface, n_x, n_y, hn2_x, hn2_y)
-    
-    # рисует связь H при OH
-    hoh_x, hoh_y = oh_x + 20, oh_y
-    draw_bond(surface, oh_x, oh_y, hoh_x, hoh_y)
-
-    # Рисуем атомы поверх связей
-    draw_atom(surface, ca_x, ca_y, "C")
-    draw_atom(surface, n_x, n_y, "N")
-    draw_atom(surface, c_x, c_y, "C")
-    draw_atom(surface, o1_x, o1_y, "O")
-    draw_atom(surface, oh_x, oh_y, "O")
-    draw_atom(surface, ha_x, ha_y, "H", 7)
-    draw_atom(surface, hn1_x, hn1_y, "H", 7)
-    draw_atom(surface, hn2_x, hn2_y, "H", 7)
-    draw_atom(surface, hoh_x, hoh_y, "H", 7)
-    
-    return positions
-
-def get_poly_points(cx, cy, r, sides, start_deg=0):
-    '''функция для создания списка вершин правильного многоугольника'''
-    points = []
-    for i in range(sides):
-        angle = math.radians(start_deg + i * (360 / sides))
-        px = cx + r * math.cos(angle)
-        py = cy + r * math.sin(angle)
-        points.append((px, py))
-    return points
-
-def draw_amino_acid(surface, name, x, y):
-    '''отрисовка аминокислоты'''
-    func_name = AMINO_ACIDS.get(name)
-    if func_name:
-        globals()[func_name](surface, x, y)
-
-def draw_glycine(surface, x, y):
-    '''рисует глицин'''
-    pos = draw_backbone(surface, x, y)
-    ca_x, ca_y = pos["CA"]
-    h_x, h_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, h_x, h_y)
-    draw_atom(surface, h_x, h_y, "H", 7)
-
-def draw_alanine(surface, x, y):
-    '''рисует аланин'''
-    pos = draw_backbone(surface, x, y)
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 45
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-
-def draw_phenylalanine(surface, x, y):
-    '''рисует фенилаланин'''
-    pos = draw_backbone(surface, x, y)
-    ca_x, ca_y = pos["CA"]
-    
-    # CB (бета-углерод)
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    
-    # бензольное кольцо
-
-    r = 35
-    cx, cy = cb_x, cb_y + r + 15 # сдвигает центр вниз на радиус + длина связи
-    
-    # start_deg=-90 - вершина 0 смотрит строго вверх
-    pts = get_poly_points(cx, cy, r, 6, start_deg=-90)
-    
-    # связь CB - вершина 0
-    draw_bond(surface, cb_x, cb_y, pts[0][0], pts[0][1])
-    
-    # рисует кольцо, двойные связи между вершинами 0-1, 2-3, 4-5
-    for i in range(6):
-        p1 = pts[i]
-        p2 = pts[(i+1)%6]
-        is_double = (i % 2 == 0) 
-        draw_bond(surface, p1[0], p1[1], p2[0], p2[1], is_double)
-    
-    # рисует атом CB
-    draw_atom(surface, cb_x, cb_y, "C")
-
-def draw_tyrosine(surface, x, y):
-    '''рисует тирозин'''
-    pos = draw_backbone(surface, x, y)
-    ca_x, ca_y = pos["CA"]
-    
-    # CB
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    
-    # бензольное кольцо
-    r = 35
-    cx, cy = cb_x, cb_y + r + 15
-    pts = get_poly_points(cx, cy, r, 6, start_deg=-90)
-    
-    # связь CB - вершина 0
-    draw_bond(surface, cb_x, cb_y, pts[0][0], pts[0][1])
-    
-    # рисует кольцо
-    for i in range(6):
-        p1 = pts[i]
-        p2 = pts[(i+1)%6]
-        is_double = (i % 2 == 0)
-        draw_bond(surface, p1[0], p1[1], p2[0], p2[1], is_double)
-        
-    # OH группа к кольцу (вершина 3)
-    oh_x, oh_y = pts[3][0], pts[3][1] + 30
-    draw_bond(surface, pts[3][0], pts[3][1], oh_x, oh_y)
-    draw_atom(surface, oh_x, oh_y, "O")
-    
-    # водород при OH
-    h_x, h_y = oh_x + 20, oh_y
-    draw_bond(surface, oh_x, oh_y, h_x, h_y)
-    draw_atom(surface, h_x, h_y, "H", 7)
-
-    # рисует атом CB
-    draw_atom(surface, cb_x, cb_y, "C")
-
-def draw_tryptophan(surface, x, y):
-    '''рисует триптофан'''
-    pos = draw_backbone(surface, x, y)
-    ca_x, ca_y = pos["CA"]
-    
-    # CB
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    # рисует индол
-    # C1 - верхняя точка пиррольного кольца, куда приходит связь от CB
-    c1_x, c1_y = cb_x, cb_y + 30
-    draw_bond(surface, cb_x, cb_y, c1_x, c1_y)
-    
-    # размеры пиррольного кольца
-    pyrrole_w = 25 # половина ширины
-    pyrrole_h = 35 # высота
-    
-    # координаты 5-членного пиррольного цикла
-    # c1 (верхний), c2 (левый), n1 (азот пиррольного кольца), c3 (правый перед N), c4 (правый)
-    
-    p_c1   = (c1_x, c1_y) # C1
-    p_c4 = (c1_x + pyrrole_w, c1_y + 15) # C4 (общий с бензолом)
-    p_c3 = (c1_x + pyrrole_w, c1_y + 45) # C3 (общий с бензолом)
-    p_n1 = (c1_x - pyrrole_w + 5, c1_y + 45) # N1
-    p_c2  = (c1_x - pyrrole_w, c1_y + 15) # C2
-    
-    # рисует пиррол
-    draw_bond(surface, p_c1[0], p_c1[1], p_c2[0], p_c2[1], True)  # C1=C2 (двойная)
-    draw_bond(surface, p_c2[0], p_c2[1], p_n1[0], p_n1[1])    # C2-N1
-    draw_bond(surface, p_n1[0], p_n1[1], p_c3[0], p_c3[1])  # N1-C3
-    draw_bond(surface, p_c3[0], p_c3[1], p_c4[0], p_c4[1], True) # C3=C4 (общая с бензолом, двойная)
-    draw_bond(surface, p_c4[0], p_c4[1], p_c1[0], p_c1[1])      # C4-C1
-    
-    # рисует N в вершине p_n1
-    draw_atom(surface, p_n1[0], p_n1[1], "N")
-    # H при азоте
-    nh_x, nh_y = p_n1[0] - 15, p_n1[1] + 10
-    draw_bond(surface, p_n1[0], p_n1[1], nh_x, nh_y)
-    draw_atom(surface, nh_x, nh_y, "H", 7)
-    
-    # бензольное кольцо (6-членное) приклеено справа к грани p_с4 - p_с3
-    # рисует 4 вершины справа
-    benz_w = 30 #размер шага в кольце
-    # верхняя вершина бензола
-    b_top = (p_c4[0] + benz_w//2, p_c4[1] - 20)
-    # правая верхняя
-    b_top_r = (p_c4[0] + benz_w, p_c4[1] - 10)
-    # правая нижняя
-    b_bot_r = (p_c4[0] + benz_w, p_c3[1] + 10)
-    # нижняя
-    b_bot = (p_c4[0] + benz_w//2, p_c3[1] + 20)
-    
-    # cвязи бензола
-    # p_c4 - b_top
-    draw_bond(surface, p_c4[0], p_c4[1], b_top[0], b_top[1])
-    # b_top - b_top_r (=)
-    draw_bond(surface, b_top[0], b_top[1], b_top_r[0], b_top_r[1], True)
-    # b_top_r - b_bot_r
-    draw_bond(surface, b_top_r[0], b_top_r[1], b_bot_r[0], b_bot_r[1])
-    # b_bot_r - b_bot (=)
-    draw_bond(surface, b_bot_r[0], b_bot_r[1], b_bot[0], b_bot[1], True)
-    # b_bot - p_c3 
-    draw_bond(surface, b_bot[0], b_bot[1], p_c3[0], p_c3[1])
-
-def draw_histidine(surface, x, y):
-    '''рисует гистидин'''
-    pos = draw_backbone(surface, x, y)
-    ca_x, ca_y = pos["CA"]
-    
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-
-    cx, cy = cb_x, cb_y + 45
-    r = 30
-    pts = get_poly_points(cx, cy, r, 5, start_deg=-90)
-
-    draw_bond(surface, cb_x, cb_y, pts[0][0], pts[0][1])
-    
-    # Контур кольца
-    draw_bond(surface, pts[0][0], pts[0][1], pts[1][0], pts[1][1])
-
-    draw_bond(surface, pts[1][0], pts[1][1], pts[2][0], pts[2][1], True)
-
-    draw_bond(surface, pts[2][0], pts[2][1], pts[3][0], pts[3][1])
-
-    draw_bond(surface, pts[3][0], pts[3][1], pts[4][0], pts[4][1])
-
-    draw_bond(surface, pts[4][0], pts[4][1], pts[0][0], pts[0][1], True)
-    
-
-    draw_atom(surface, pts[1][0], pts[1][1], "N") 
-    draw_atom(surface, pts[3][0], pts[3][1], "N") 
-    
-    h_x, h_y = pts[3][0] - 20, pts[3][1] + 10
-    draw_bond(surface, pts[3][0], pts[3][1], h_x, h_y)
-    draw_atom(surface, h_x, h_y, "H", 7)
-
-def draw_valine(surface, x, y):
-    '''рисует валин'''
-    pos = draw_backbone(surface, x, y)
-
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    c1_x, c1_y = cb_x - 30, cb_y + 35
-    c2_x, c2_y = cb_x + 30, cb_y + 35
-    draw_bond(surface, cb_x, cb_y, c1_x, c1_y)
-    draw_bond(surface, cb_x, cb_y, c2_x, c2_y)
-    draw_atom(surface, c1_x, c1_y, "C")
-    draw_atom(surface, c2_x, c2_y, "C")
-
-def draw_leucine(surface, x, y):
-    '''рисует лейцин'''
-    pos = draw_backbone(surface, x, y)
-
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-
-    cg_x, cg_y = cb_x, cb_y + 40
-    draw_bond(surface, cb_x, cb_y, cg_x, cg_y)
-    draw_atom(surface, cg_x, cg_y, "C")
-
-    c1_x, c1_y = cg_x - 30, cg_y + 35
-    c2_x, c2_y = cg_x + 30, cg_y + 35
-    draw_bond(surface, cg_x, cg_y, c1_x, c1_y)
-    draw_bond(surface, cg_x, cg_y, c2_x, c2_y)
-    draw_atom(surface, c1_x, c1_y, "C")
-    draw_atom(surface, c2_x, c2_y, "C")
-
-def draw_isoleucine(surface, x, y):
-    '''рисует изолейцин'''
-    pos = draw_backbone(surface, x, y)
-
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    cg2_x, cg2_y = cb_x - 30, cb_y + 35
-    draw_bond(surface, cb_x, cb_y, cg2_x, cg2_y)
-    draw_atom(surface, cg2_x, cg2_y, "C")
-    
-    cg1_x, cg1_y = cb_x + 30, cb_y + 35
-    draw_bond(surface, cb_x, cb_y, cg1_x, cg1_y)
-    draw_atom(surface, cg1_x, cg1_y, "C")
-    
-    cd1_x, cd1_y = cg1_x + 25, cg1_y + 35
-    draw_bond(surface, cg1_x, cg1_y, cd1_x, cd1_y)
-    draw_atom(surface, cd1_x, cd1_y, "C")
-
-def draw_proline(surface, x, y):
-    '''рисует пролин'''
-    pos = draw_backbone(surface, x, y)
-    ca_x, ca_y = pos["CA"]
-    n_x, n_y = pos["N"]
-    
-    cb_x, cb_y = ca_x, ca_y + 40
-    cd_x, cd_y = n_x, n_y + 40
-    cg_x, cg_y = (cb_x + cd_x) // 2, cb_y + 25
-    
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_bond(surface, cb_x, cb_y, cg_x, cg_y)
-    draw_bond(surface, cg_x, cg_y, cd_x, cd_y)
-    draw_bond(surface, cd_x, cd_y, n_x, n_y)
-
-def draw_serine(surface, x, y):
-    '''рисует серин'''
-    pos = draw_backbone(surface, x, y)
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    o_x, o_y = cb_x, cb_y + 40
-    draw_bond(surface, cb_x, cb_y, o_x, o_y)
-    draw_atom(surface, o_x, o_y, "O")
-
-def draw_threonine(surface, x, y):
-    '''рисует треонин'''
-    pos = draw_backbone(surface, x, y)
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x + 20, ca_y + 35
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    o_x, o_y = cb_x, cb_y + 40
-    draw_bond(surface, cb_x, cb_y, o_x, o_y)
-    draw_atom(surface, o_x, o_y, "O")
-    c_x, c_y = ca_x - 20, ca_y + 45
-    draw_bond(surface, ca_x, ca_y, c_x, c_y)
-    draw_atom(surface, c_x, c_y, "C")
-
-def draw_cysteine(surface, x, y):
-    '''рисует цистеин'''
-    pos = draw_backbone(surface, x, y)
-    
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    s_x, s_y = cb_x, cb_y + 40
-    draw_bond(surface, cb_x, cb_y, s_x, s_y)
-    draw_atom(surface, s_x, s_y, "S")
-
-def draw_methionine(surface, x, y):
-    '''рисует метионин'''
-    pos = draw_backbone(surface, x, y)
-    
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    cg_x, cg_y = cb_x + 35, cb_y + 35
-    draw_bond(surface, cb_x, cb_y, cg_x, cg_y)
-    draw_atom(surface, cg_x, cg_y, "C")
-    
-    s_x, s_y = cg_x + 35, cg_y
-    draw_bond(surface, cg_x, cg_y, s_x, s_y)
-    draw_atom(surface, s_x, s_y, "S")
-    
-    ce_x, ce_y = s_x + 35, s_y
-    draw_bond(surface, s_x, s_y, ce_x, ce_y)
-    draw_atom(surface, ce_x, ce_y, "C")
-
-def draw_asparagine(surface, x, y):
-    '''рисует аспарагин'''
-    pos = draw_backbone(surface, x, y)
-    
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    cg_x, cg_y = cb_x, cb_y + 40
-    draw_bond(surface, cb_x, cb_y, cg_x, cg_y)
-    draw_atom(surface, cg_x, cg_y, "C")
-    
-    o_x, o_y = cg_x - 30, cg_y + 30
-    n_x, n_y = cg_x + 30, cg_y + 30
-    draw_bond(surface, cg_x, cg_y, o_x, o_y, double=True)
-    draw_bond(surface, cg_x, cg_y, n_x, n_y)
-    draw_atom(surface, o_x, o_y, "O")
-    draw_atom(surface, n_x, n_y, "N")
-
-def draw_glutamine(surface, x, y):
-    '''рисует глутамин'''
-    pos = draw_backbone(surface, x, y)
-    
-    ca_x, ca_y = pos["CA"]
-
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    cg_x, cg_y = cb_x, cb_y + 40
-    draw_bond(surface, cb_x, cb_y, cg_x, cg_y)
-    draw_atom(surface, cg_x, cg_y, "C")
-    
-    cd_x, cd_y = cg_x, cg_y + 40
-    draw_bond(surface, cg_x, cg_y, cd_x, cd_y)
-    draw_atom(surface, cd_x, cd_y, "C")
-    
-    o_x, o_y = cd_x - 30, cd_y + 30
-    n_x, n_y = cd_x + 30, cd_y + 30
-    draw_bond(surface, cd_x, cd_y, o_x, o_y, double=True)
-    draw_bond(surface, cd_x, cd_y, n_x, n_y)
-    draw_atom(surface, o_x, o_y, "O")
-    draw_atom(surface, n_x, n_y, "N")
-
-def draw_aspartate(surface, x, y):
-    '''рисует аспартат'''
-    pos = draw_backbone(surface, x, y)
-    
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    cg_x, cg_y = cb_x, cb_y + 40
-    draw_bond(surface, cb_x, cb_y, cg_x, cg_y)
-    draw_atom(surface, cg_x, cg_y, "C")
-    
-    o1_x, o1_y = cg_x - 30, cg_y + 30
-    o2_x, o2_y = cg_x + 30, cg_y + 30
-    draw_bond(surface, cg_x, cg_y, o1_x, o1_y, double=True)
-    draw_bond(surface, cg_x, cg_y, o2_x, o2_y)
-    draw_atom(surface, o1_x, o1_y, "O")
-    draw_atom(surface, o2_x, o2_y, "O")
-
-def draw_glutamate(surface, x, y):
-    '''рисует глутамат'''
-    pos = draw_backbone(surface, x, y)
-    
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 40
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    cg_x, cg_y = cb_x, cb_y + 40
-    draw_bond(surface, cb_x, cb_y, cg_x, cg_y)
-    draw_atom(surface, cg_x, cg_y, "C")
-    
-    cd_x, cd_y = cg_x, cg_y + 40
-    draw_bond(surface, cg_x, cg_y, cd_x, cd_y)
-    draw_atom(surface, cd_x, cd_y, "C")
-    
-    o1_x, o1_y = cd_x - 30, cd_y + 30
-    o2_x, o2_y = cd_x + 30, cd_y + 30
-    draw_bond(surface, cd_x, cd_y, o1_x, o1_y, double=True)
-    draw_bond(surface, cd_x, cd_y, o2_x, o2_y)
-    draw_atom(surface, o1_x, o1_y, "O")
-    draw_atom(surface, o2_x, o2_y, "O")
-
-def draw_lysine(surface, x, y):
-    '''рисует лизин'''
-    pos = draw_backbone(surface, x, y)
-    
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 35
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    cg_x, cg_y = cb_x, cb_y + 35
-    draw_bond(surface, cb_x, cb_y, cg_x, cg_y)
-    draw_atom(surface, cg_x, cg_y, "C")
-    
-    cd_x, cd_y = cg_x, cg_y + 35
-    draw_bond(surface, cg_x, cg_y, cd_x, cd_y)
-    draw_atom(surface, cd_x, cd_y, "C")
-    
-    ce_x, ce_y = cd_x, cd_y + 35
-    draw_bond(surface, cd_x, cd_y, ce_x, ce_y)
-    draw_atom(surface, ce_x, ce_y, "C")
-    
-    n_x, n_y = ce_x, ce_y + 35
-    draw_bond(surface, ce_x, ce_y, n_x, n_y)
-    draw_atom(surface, n_x, n_y, "N")
-
-def draw_arginine(surface, x, y):
-    '''рисует аргинин'''
-    pos = draw_backbone(surface, x, y)
-    
-    ca_x, ca_y = pos["CA"]
-    cb_x, cb_y = ca_x, ca_y + 35
-    draw_bond(surface, ca_x, ca_y, cb_x, cb_y)
-    draw_atom(surface, cb_x, cb_y, "C")
-    
-    cg_x, cg_y = cb_x, cb_y + 35
-    draw_bond(surface, cb_x, cb_y, cg_x, cg_y)
-    draw_atom(surface, cg_x, cg_y, "C")
-    
-    cd_x, cd_y = cg_x, cg_y + 35
-    draw_bond(surface, cg_x, cg_y, cd_x, cd_y)
-    draw_atom(surface, cd_x, cd_y, "C")
-    
-    c_x, c_y = cd_x, cd_y + 35
-    draw_bond(surface, cd_x, cd_y, c_x, c_y)
-    draw_atom(surface, c_x, c_y, "C")
-    
-    n1_x, n1_y = c_x - 25, c_y + 25
-    n2_x, n2_y = c_x + 25, c_y + 25
-    draw_bond(surface, c_x, c_y, n1_x, n1_y)
-    draw_bond(surface, c_x, c_y, n2_x, n2_y)
-    draw_atom(surface, n1_x, n1_y, "N")
-    draw_atom(surface, n2_x, n2_y, "N")
-
+    draw_molecule(surface, BACKBONE, x, y, scale)
+
+# запас по краям поверхности молекулы под толщину линий
+MOLECULE_PADDING = 4
+
+_origins = {}
+
+
+def molecule_origin(name, scale=1):
+    '''положение альфа-углерода на готовой поверхности молекулы'''
+    key = (name, scale)
+    origin = _origins.get(key)
+    if origin is None:
+        x_min, y_min, _, _ = get_molecule(name).bounds()
+        pad = math.ceil(MOLECULE_PADDING * scale)
+        origin = (math.ceil(-x_min * scale) + pad, math.ceil(-y_min * scale) + pad)
+        _origins[key] = origin
+    return origin
+
+
+def set_molecule_origin(name, scale, origin):
+    '''задаёт положение альфа-углерода для поверхности, нарисованной заранее (атлас)'''
+    _origins[(name, scale)] = tuple(origin)
+
+
+def render_amino_acid(name, scale=1):
+    '''рисует аминокислоту на отдельной прозрачной поверхности по размеру молекулы'''
+    molecule = get_molecule(name)
+    x_min, y_min, x_max, y_max = molecule.bounds()
+    ox, oy = molecule_origin(name, scale)
+    pad = math.ceil(MOLECULE_PADDING * scale)
+    w = ox + math.ceil(x_max * scale) + pad
+    h = oy + math.ceil(y_max * scale) + pad
+    surf = pygame.Surface((w, h), pygame.SRCALPHA)
+    draw_molecule(surf, molecule, ox, oy, scale)
+    return surf
+
+
+def prepare_render(names, scale=1):
+    '''готовит на главном потоке общее для render_amino_acid: подписи атомов и
+    положения альфа-углерода; фоновому потоку остаётся только рисовать'''
+    label_size = max(1, round(LABEL_SIZE * scale))
+    for name in names:
+        molecule_origin(name, scale)
+        molecule = get_molecule(name)
+        for element, r in zip(molecule.elements, molecule.radii):
+            if r:
+                get_atom_label(element, WHITE if element != "H" else BLACK, label_size)
+
+
+def display_surface(surf):
+    '''картинка для быстрого blit: непрозрачная, в формате экрана, фон BG_COLOR
+    прозрачен по цветовому ключу (RLE)
+
+    Линии и круги рисуются без сглаживания, а подписи лежат на кругах атомов,
+    так что полупрозрачных пикселей на фоне нет и картинка не меняется, а
+    blit идёт без попиксельного смешивания. Без окна возвращается как есть.
+    '''
+    if pygame.display.get_surface() is None:
+        return surf
+    out = pygame.Surface(surf.get_size()).convert()
+    out.fill(BG_COLOR)
+    out.blit(surf, (0, 0))
+    out.set_colorkey(BG_COLOR, pygame.RLEACCEL)
+    return out
+
+
+def render_cached(name, scale=1):
+    '''аминокислота для кэша: render_amino_acid в формате display_surface'''
+    return display_surface(render_amino_acid(name, scale))
+
+
+# ключ цветовой схемы и копия ELEMENT_COLORS, по которой он построен
+_theme = None
+_theme_colors = None
+
+
+def color_theme():
+    '''текущая цветовая схема атомов в виде ключа для кэша
+
+    ключ строится заново, только когда ELEMENT_COLORS изменился: сравнение
+    словарей ничего не выделяет, а кадр спрашивает схему каждый раз
+    '''
+    global _theme, _theme_colors
+    if ELEMENT_COLORS != _theme_colors:
+        _theme_colors = dict(ELEMENT_COLORS)
+        _theme = tuple(sorted(_theme_colors.items()))
+    return _theme
+
+
+class MoleculeCache:
+    '''кэш готовых поверхностей молекул с вытеснением давно не использованных (LRU)'''
+
+    def __init__(self, budget_bytes=MOLECULE_CACHE_MB * 1024 * 1024):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self._items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # кэш заполняет и фоновый поток (prefetch.Prefetcher)
+        self.lock = threading.RLock()
+        # ключ -> threading.Event для картинок, которые сейчас рисует фоновый поток
+        self._pending = {}
+        # подготовленные заранее и ещё не показанные
+        self._prefetched = set()
+        # ключ -> что доделать с картинкой фонового потока на главном потоке
+        self._finish = {}
+        self.prefetch_hits = 0
+        self.waits = 0
+        self.wait_ms = 0.0
+        # сколько главный поток сам рисовал при промахах, мс
+        self.render_ms = 0.0
+
+    def get(self, name, scale=1, theme=None):
+        '''возвращает поверхность молекулы, рисует её только при первом обращении'''
+        if theme is None:
+            theme = color_theme()
+        return self.fetch((name, scale, theme), render_cached, name, scale)
+
+    def fetch(self, key, render, *args):
+        '''значение по ключу; при промахе вызывается render(*args) и результат кладётся в кэш
+
+        если эту картинку как раз рисует фоновый поток, дожидается его;
+        вызывается с главного потока
+        '''
+        with self.lock:
+            surf = self._lookup(key)
+            pending = self._pending.get(key) if surf is None else None
+        if surf is not None:
+            return surf
+        if pending is not None:
+            start = time.perf_counter()
+            pending.wait()
+            with self.lock:
+                self.waits += 1
+                self.wait_ms += (time.perf_counter() - start) * 1000
+                surf = self._lookup(key)
+            if surf is not None:
+                return surf
+
+        start = time.perf_counter()
+        surf = render(*args)
+        with self.lock:
+            self.misses += 1
+            self.render_ms += (time.perf_counter() - start) * 1000
+            self._put(key, surf)
+        return surf
+
+    def _lookup(self, key):
+        surf = self._items.get(key)
+        if surf is not None:
+            self.hits += 1
+            self._items.move_to_end(key)
+            if key in self._prefetched:
+                self._prefetched.discard(key)
+                self.prefetch_hits += 1
+            finish = self._finish.pop(key, None)
+            if finish is not None:
+                # картинка фонового потока доделывается здесь, на главном потоке
+                surf = finish(surf)
+                self._put(key, surf)
+        return surf
+
+    def reserve(self, key):
+        '''фоновый поток берётся нарисовать key; None - уже есть или уже рисуется'''
+        with self.lock:
+            if key in self._items or key in self._pending:
+                return None
+            event = self._pending[key] = threading.Event()
+            return event
+
+    def complete(self, key, surf, finish=None):
+        '''фоновый поток закончил key (surf None - не получилось);
+        finish(surf) вызывается на главном потоке, когда картинку возьмут из кэша'''
+        with self.lock:
+            if surf is not None:
+                self.put(key, surf)
+                self._prefetched.add(key)
+                if finish is not None:
+                    self._finish[key] = finish
+            self._pending.pop(key).set()
+
+    def put(self, key, surf):
+        '''кладёт поверхность в кэш и вытесняет старые записи сверх бюджета'''
+        with self.lock:
+            self._put(key, surf)
+
+    def _put(self, key, surf):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.used_bytes -= surface_bytes(old)
+        self._items[key] = surf
+        self.used_bytes += surface_bytes(surf)
+        # самая новая запись остаётся, даже если одна не влезает в бюджет
+        while self.used_bytes > self.budget_bytes and len(self._items) > 1:
+            evicted_key, evicted = self._items.popitem(last=False)
+            self.used_bytes -= surface_bytes(evicted)
+            self._prefetched.discard(evicted_key)
+            self._finish.pop(evicted_key, None)
+            self.evictions += 1
+
+    def clear(self):
+        '''очищает кэш'''
+        with self.lock:
+            self._items.clear()
+            self._prefetched.clear()
+            self._finish.clear()
+            self.used_bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        '''статистика кэша'''
+        return {
+            "entries": len(self._items),
+            "used_bytes": self.used_bytes,
+            "budget_bytes": self.budget_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "prefetch_hits": self.prefetch_hits,
+            "waits": self.waits,
+            "wait_ms": round(self.wait_ms, 2),
+            "render_ms": round(self.render_ms, 2),
+        }
+
+
+def surface_bytes(surf):
+    '''сколько памяти занимают пиксели поверхности'''
+    return surf.get_width() * surf.get_height() * surf.get_bytesize()
+
+
+molecule_cache = MoleculeCache()
+
+
+# уровни масштаба для кэша картинок: MIP_LEVELS_PER_OCTAVE на каждое удвоение
+MIP_LEVELS_PER_OCTAVE = 8
+
+
+def mip_level(scale):
+    '''ближайший к scale уровень кэша (1 - всегда уровень);
+    при плавном изменении окна картинки не перерисовываются на каждом шаге'''
+    if scale == 1:
+        return 1
+    return 2 ** (round(math.log2(scale) * MIP_LEVELS_PER_OCTAVE) / MIP_LEVELS_PER_OCTAVE)
+
+
+def draw_amino_acid(surface, name, x, y, scale=1, cached=True):
+    '''отрисовка аминокислоты, (x, y) - положение альфа-углерода
+
+    из кэша молекула берётся на ближайшем уровне mip_level(scale)
+    '''
+    molecule = get_molecule(name)
+    if molecule is None:
+        return
+    if not cached:
+        # векторный путь: повтор скомпилированного списка примитивов
+        import displaylist
+        displaylist.draw_amino_acid(surface, name, x, y, scale)
+        return
+    scale = mip_level(scale)
+    surf = molecule_cache.get(name, scale)
+    ox, oy = molecule_origin(name, scale)
+    surface.blit(surf, (round(x) - ox, round(y) - oy))
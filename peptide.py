@@ -0,0 +1,134 @@
+# peptide.py
+'''Пептиды без pygame: разбор последовательности и сборка цепи из остатков.
+
+Остатки стоят вдоль оси x через SPACING, альфа-углерод i-го остатка - в
+(i * SPACING, 0); каждый второй остаток отражён по вертикали, чтобы боковые
+цепи шли попеременно вниз и вверх. Между остатками - пептидная связь C-N:
+у всех, кроме последнего, убраны OXT и HXT, у всех, кроме первого, - H2
+(у пролина внутри цепи и H1: у его азота нет водорода).
+
+Цепь хранится списком названий, молекулы строятся по сегментам из
+SEGMENT_RESIDUES остатков - их и рисует peptide_view по мере надобности.
+'''
+import re
+
+from structures import SIDE_CHAINS, BACKBONE_ATOMS, BACKBONE_BONDS, AMINO_ACID_CODES, Molecule
+from answers import default_index
+
+# расстояние между альфа-углеродами соседних остатков
+SPACING = 180
+# остатков в одном сегменте (плитке); номера атомов в Molecule не больше 127
+SEGMENT_RESIDUES = 4
+# насколько атомы остатка выходят по x за его альфа-углерод, с запасом
+RESIDUE_REACH = 140
+
+_SEPARATORS = re.compile(r"[\s,;.…\-–—]+")
+# длина трёхбуквенного кода
+CODE_LENGTH = 3
+
+
+def parse_sequence(text):
+    '''"ГЛИ-АЛА-СЕР", "Gly-Ala-Ser", "глицин аланин" или "GAS" -> список названий
+
+    Одно слово без разделителей - название или код остатка, а если такого
+    нет - однобуквенные коды подряд. Трёхбуквенный код, который читается и
+    как три однобуквенных ("ALA", "MET"), неоднозначен: ValueError с
+    подсказкой написать название или коды через дефис.
+    '''
+    index = default_index()
+    tokens = [t for t in _SEPARATORS.split(text.strip()) if t]
+    if not tokens:
+        raise ValueError("пустая последовательность")
+    if len(tokens) == 1:
+        token = tokens[0]
+        name = index.lookup(token)
+        letters = [index.lookup(c) for c in token]
+        if name is None:
+            # однобуквенные коды подряд
+            tokens = list(token)
+        elif len(token) == CODE_LENGTH and None not in letters:
+            raise ValueError(f"{token} - это {name} или {'-'.join(token.upper())}? "
+                             f"Напишите название или коды через дефис")
+    names = []
+    for token in tokens:
+        name = index.lookup(token)
+        if name is None:
+            raise ValueError(f"неизвестный остаток: {token}")
+        names.append(name)
+    return names
+
+
+def _residue_atoms(name, i, first, last):
+    '''атомы и связи остатка i с префиксом имени атома "i:"'''
+    side_atoms, side_bonds = SIDE_CHAINS[name]
+    skip = set()
+    if not last:
+        skip.update(("OXT", "HXT"))
+    if not first:
+        skip.add("H2")
+        if name == "пролин":
+            skip.add("H1")
+    x0 = i * SPACING
+    flip = -1 if i % 2 else 1
+    prefix = f"{i}:"
+    atoms = [(prefix + a, elem, x0 + x, flip * y, r)
+             for a, elem, x, y, r in BACKBONE_ATOMS + tuple(side_atoms) if a not in skip]
+    bonds = [(prefix + a, prefix + b, order)
+             for a, b, order in BACKBONE_BONDS + tuple(side_bonds)
+             if a not in skip and b not in skip]
+    return atoms, bonds
+
+
+class Peptide:
+    '''цепь остатков; молекулы сегментов строятся по запросу'''
+
+    def __init__(self, names):
+        self.names = list(names)
+        if not self.names:
+            raise ValueError("пустая последовательность")
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def sequence(self):
+        '''последовательность трёхбуквенными кодами'''
+        return "-".join(AMINO_ACID_CODES[name][1] for name in self.names)
+
+    @property
+    def segment_count(self):
+        return (len(self.names) + SEGMENT_RESIDUES - 1) // SEGMENT_RESIDUES
+
+    def segment_x(self, segment):
+        '''координата x альфа-углерода первого остатка сегмента'''
+        return segment * SEGMENT_RESIDUES * SPACING
+
+    def segment(self, segment):
+        '''молекула сегмента в координатах цепи; связь с азотом следующего
+        остатка рисуется в этом сегменте до вершины без атома (радиус 0)'''
+        start = segment * SEGMENT_RESIDUES
+        stop = min(start + SEGMENT_RESIDUES, len(self.names))
+        atoms, bonds = [], []
+        last_index = len(self.names) - 1
+        for i in range(start, stop):
+            a, b = _residue_atoms(self.names[i], i, i == 0, i == last_index)
+            atoms += a
+            bonds += b
+            if i < last_index:
+                # пептидная связь C(i) - N(i+1)
+                bonds.append((f"{i}:C", f"{i + 1}:N", 1))
+        if stop <= last_index:
+            atoms.append((f"{stop}:N", "N", stop * SPACING - 60, 0, 0))
+        return Molecule(f"peptide[{start}:{stop}]", atoms, bonds)
+
+    def segments_between(self, x_min, x_max):
+        '''номера сегментов, которые могут попасть в полосу [x_min, x_max] - без перебора'''
+        width = SEGMENT_RESIDUES * SPACING
+        first = int((x_min - RESIDUE_REACH - (SEGMENT_RESIDUES - 1) * SPACING) // width)
+        last = int((x_max + RESIDUE_REACH) // width)
+        return range(max(first, 0), min(last, self.segment_count - 1) + 1)
+
+    def length(self):
+        '''длина цепи по x от первого до последнего альфа-углерода'''
+        return (len(self.names) - 1) * SPACING
+
@@ -0,0 +1,257 @@
+# peptide_view.py
+'''Просмотр пептида: прокрутка и масштаб цепи из сотен и тысяч остатков.
+
+Цепь рисуется плитками - готовыми картинками сегментов из
+peptide.SEGMENT_RESIDUES остатков. Плитки лежат в LRU-кэше (MoleculeCache)
+и рисуются заново только при первом показе на этом масштабе. Какие плитки
+видны, считается арифметикой по положению окна (Peptide.segments_between),
+невидимые не трогаются вовсе.
+
+Управление: колесо - масштаб, перетаскивание или стрелки - прокрутка,
+Home/End - начало и конец цепи, в поле ввода - новая последовательность.
+'''
+import math
+import time
+
+import pygame
+
+from settings import *
+from fonts import get_font
+from idle import IdleScheduler, ticks
+from molecules import MoleculeCache, MOLECULE_PADDING, draw_molecule, color_theme
+from peptide import Peptide, parse_sequence, SPACING
+from ui import InputBox, MessageBox, render_text
+from game import MESSAGE_DURATION_MS
+
+# уровни масштаба: LEVELS_PER_OCTAVE на каждое удвоение, от 1/16 до 2
+LEVELS_PER_OCTAVE = 8
+MIN_LEVEL = -4 * LEVELS_PER_OCTAVE
+MAX_LEVEL = 1 * LEVELS_PER_OCTAVE
+TILE_CACHE_MB = 48
+SCROLL_STEP = 200
+
+
+def level_scale(level):
+    return 2 ** (level / LEVELS_PER_OCTAVE)
+
+
+class PeptideView:
+    '''положение и масштаб просмотра цепи, отрисовка видимых плиток'''
+
+    def __init__(self, peptide, cache=None):
+        self.cache = cache or MoleculeCache(TILE_CACHE_MB * 1024 * 1024)
+        self.set_peptide(peptide)
+
+    def set_peptide(self, peptide):
+        self.peptide = peptide
+        self.level = 0
+        # мировая координата x в центре окна
+        self.center_x = 0.0
+        self._segments = {}
+        self._origins = {}
+        self.cache.clear()
+        self.tiles_drawn = 0
+
+    @property
+    def scale(self):
+        return level_scale(self.level)
+
+    def _segment(self, segment):
+        molecule = self._segments.get(segment)
+        if molecule is None:
+            molecule = self._segments[segment] = self.peptide.segment(segment)
+        return molecule
+
+    def tile_origin(self, segment, scale):
+        '''где на плитке точка цепи (начало сегмента, 0)'''
+        key = (segment, scale)
+        origin = self._origins.get(key)
+        if origin is None:
+            x_min, y_min, _, _ = self._segment(segment).bounds()
+            pad = math.ceil(MOLECULE_PADDING * scale)
+            x0 = self.peptide.segment_x(segment)
+            origin = (math.ceil((x0 - x_min) * scale) + pad, math.ceil(-y_min * scale) + pad)
+            self._origins[key] = origin
+        return origin
+
+    def render_tile(self, segment, scale):
+        '''картинка сегмента на прозрачном фоне'''
+        molecule = self._segment(segment)
+        x_min, y_min, x_max, y_max = molecule.bounds()
+        ox, oy = self.tile_origin(segment, scale)
+        pad = math.ceil(MOLECULE_PADDING * scale)
+        x0 = self.peptide.segment_x(segment)
+        w = ox + math.ceil((x_max - x0) * scale) + pad
+        h = oy + math.ceil(y_max * scale) + pad
+        surf = pygame.Surface((w, h), pygame.SRCALPHA)
+        # draw_molecule рисует в координатах цепи: сдвигаем начало сегмента в (ox, oy)
+        draw_molecule(surf, molecule, ox - x0 * scale, oy, scale)
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert_alpha()
+        return surf
+
+    def tile(self, segment, scale):
+        return self.cache.fetch((segment, scale, color_theme()), self.render_tile, segment, scale)
+
+    def draw(self, surface, rect):
+        '''рисует видимую часть цепи в rect; возвращает число нарисованных плиток'''
+        scale = self.scale
+        half = rect.width / 2 / scale
+        surface.set_clip(rect)
+        drawn = 0
+        for segment in self.peptide.segments_between(self.center_x - half, self.center_x + half):
+            ox, oy = self.tile_origin(segment, scale)
+            x = rect.centerx + (self.peptide.segment_x(segment) - self.center_x) * scale
+            surface.blit(self.tile(segment, scale), (round(x) - ox, rect.centery - oy))
+            drawn += 1
+        surface.set_clip(None)
+        self.tiles_drawn = drawn
+        return drawn
+
+    def visible_residues(self, rect):
+        '''номера первого и последнего остатка, попавших в окно'''
+        half = rect.width / 2 / self.scale
+        first = max(0, math.ceil((self.center_x - half) / SPACING))
+        last = min(len(self.peptide) - 1, math.floor((self.center_x + half) / SPACING))
+        return first, last
+
+    def pan(self, dx_pixels):
+        '''сдвиг на dx пикселей экрана (положительный - вправо по цепи)'''
+        self.center_x = min(max(self.center_x + dx_pixels / self.scale, 0),
+                            self.peptide.length())
+
+    def zoom(self, steps, anchor_dx=0):
+        '''масштаб на steps уровней; точка в anchor_dx пикселях от центра остаётся на месте'''
+        level = min(MAX_LEVEL, max(MIN_LEVEL, self.level + steps))
+        if level == self.level:
+            return False
+        world_x = self.center_x + anchor_dx / self.scale
+        self.level = level
+        self.center_x = world_x - anchor_dx / self.scale
+        self.pan(0)
+        return True
+
+
+class PeptideViewer:
+    '''окно просмотра пептида со своим циклом, как game.Game'''
+
+    def __init__(self, screen, peptide):
+        self.screen = screen
+        self.view = PeptideView(peptide)
+        self.scheduler = IdleScheduler(FPS)
+        self.running = True
+        self.dirty = True
+        self.dragging = False
+        self.frame_ms = 0.0
+        self.input_box = InputBox(0, 0, 10, 10)
+        self.message_box = MessageBox(get_font(FONT_NAME, SMALL_FONT), 0, 0)
+        # когда показано сообщение (idle.ticks); через MESSAGE_DURATION_MS оно скрывается
+        self.message_ms = None
+        self.font_info = get_font(FONT_NAME, 18)
+        self.title = None
+        self.layout()
+
+    def layout(self):
+        w, h = self.screen.get_size()
+        self.chain_rect = pygame.Rect(0, 60, w, h - 200)
+        font = get_font(FONT_NAME, FONT_SIZE)
+        self.input_box.relayout((w // 2 - 300, h - 80, 600, 50), font, 1)
+        self.message_box.relayout(get_font(FONT_NAME, SMALL_FONT), w // 2, h - 130, 1)
+        self.dirty = True
+
+    def info_text(self):
+        view = self.view
+        first, last = view.visible_residues(self.chain_rect)
+        stats = view.cache.stats()
+        return (f"Остатки {first + 1}-{last + 1} из {len(view.peptide)}   "
+                f"масштаб {view.scale:.2f}   плиток {view.tiles_drawn}, "
+                f"в кэше {stats['entries']} ({stats['used_bytes'] // 1024} КБ)   "
+                f"кадр {self.frame_ms:.1f} мс")
+
+    def show_message(self, message, color):
+        self.message_box.show(message, color)
+        self.message_ms = ticks()
+
+    def next_deadline(self):
+        '''ближайший срок: исчезновение сообщения или мигание курсора'''
+        deadline = self.input_box.next_deadline()
+        if self.message_ms is not None:
+            message = self.message_ms + MESSAGE_DURATION_MS
+            if deadline is None or message < deadline:
+                deadline = message
+        return deadline
+
+    def submit(self, text):
+        try:
+            names = parse_sequence(text)
+        except ValueError as error:
+            self.show_message(str(error), RED)
+            return
+        self.view.set_peptide(Peptide(names))
+        self.title = None
+        self.show_message(f"{len(names)} остатков", GREEN)
+        self.input_box.clear()
+
+    def handle_event(self, event):
+        view = self.view
+        if event.type == pygame.QUIT:
+            self.running = False
+        elif event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+            self.screen = pygame.display.get_surface() or self.screen
+            self.layout()
+        elif event.type == pygame.MOUSEWHEEL:
+            anchor = pygame.mouse.get_pos()[0] - self.chain_rect.centerx
+            self.dirty |= view.zoom(event.y, anchor)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.dragging = self.chain_rect.collidepoint(event.pos)
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.dragging = False
+        elif event.type == pygame.MOUSEMOTION and self.dragging:
+            view.pan(-event.rel[0])
+            self.dirty = True
+        elif event.type == pygame.KEYDOWN and not self.input_box.active:
+            if event.key == pygame.K_LEFT:
+                view.pan(-SCROLL_STEP)
+            elif event.key == pygame.K_RIGHT:
+                view.pan(SCROLL_STEP)
+            elif event.key == pygame.K_HOME:
+                view.center_x = 0
+            elif event.key == pygame.K_END:
+                view.center_x = view.peptide.length()
+            self.dirty = True
+
+        result = self.input_box.handle_event(event)
+        if result is not None:
+            self.submit(result)
+            self.dirty = True
+
+    def draw(self):
+        start = time.perf_counter()
+        screen = self.screen
+        screen.fill(BG_COLOR)
+        if self.title is None:
+            # последовательность перерисовывается только при смене пептида
+            self.title = render_text(get_font(FONT_NAME, 28, bold=True),
+                                     self.view.peptide.sequence[:90], DARK_BLUE)
+        screen.blit(self.title, (20, 15))
+        self.view.draw(screen, self.chain_rect)
+        screen.blit(render_text(self.font_info, self.info_text(), GRAY),
+                    (20, self.chain_rect.bottom + 10))
+        self.message_box.draw(screen)
+        self.input_box.draw(screen)
+        pygame.display.flip()
+        self.frame_ms = (time.perf_counter() - start) * 1000
+        self.dirty = False
+
+    def run(self):
+        while self.running:
+            events, dt = self.scheduler.wait(False, self.next_deadline())
+            now = ticks()
+            self.input_box.update(now)
+            if self.message_ms is not None and now - self.message_ms >= MESSAGE_DURATION_MS:
+                self.message_ms = None
+                self.message_box.hide()
+            for event in events:
+                self.handle_event(event)
+            if self.dirty or self.input_box.dirty or self.message_box.dirty:
+                self.draw()
@@ -0,0 +1,71 @@
+# prefetch.py
+'''Фоновая подготовка следующих молекул.
+
+Пока игрок печатает ответ, поток рисует картинки следующих вопросов
+(QuizSession.upcoming) в общий кэш molecules.molecule_cache. Когда вопрос
+сменяется, кадру остаётся только взять готовую поверхность из кэша. Если
+поток не успел и как раз рисует нужную молекулу, кадр дожидается его, а не
+рисует её второй раз; попадания, ожидания и то, что кадр рисовал сам,
+считает кэш (prefetch_hits, waits и wait_ms, misses и render_ms в
+MoleculeCache.stats).
+
+Поток рисует только на своей поверхности (render_amino_acid). Общее для
+рисования готовится на главном потоке в request (molecules.prepare_render:
+подписи атомов и положение альфа-углерода), а подписи и шрифты, которых
+всё же не оказалось, создаются под замками molecules._label_lock и
+fonts._lock. В формат экрана (display_surface) картинка переводится на
+главном потоке, когда кадр берёт её из кэша.
+'''
+import threading
+
+from molecules import (molecule_cache, render_amino_acid, display_surface, prepare_render,
+                       color_theme)
+
+
+class Prefetcher:
+    '''поток, который рисует заказанные молекулы в кэш'''
+
+    def __init__(self, cache=molecule_cache, depth=3):
+        self.cache = cache
+        self.depth = depth
+        self.rendered = 0
+        self._wanted = []
+        self._condition = threading.Condition()
+        self._running = True
+        self.thread = threading.Thread(target=self._worker, name="molecule-prefetch", daemon=True)
+        self.thread.start()
+
+    def request(self, names, scale):
+        '''заказ: первые depth молекул из names на масштабе scale; прежний заказ отменяется'''
+        theme = color_theme()
+        names = names[:self.depth]
+        prepare_render(names, scale)
+        with self._condition:
+            self._wanted = [(name, scale, theme) for name in names]
+            self._condition.notify()
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while self._running and not self._wanted:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                name, scale, theme = self._wanted.pop(0)
+            key = (name, scale, theme)
+            if self.cache.reserve(key) is None:
+                # уже в кэше или уже рисуется
+                continue
+            surf = None
+            try:
+                surf = render_amino_acid(name, scale)
+                self.rendered += 1
+            finally:
+                self.cache.complete(key, surf, display_surface)
+
+    def close(self):
+        '''останавливает поток; остальной заказ отменяется'''
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self.thread.join()
@@ -0,0 +1,347 @@
+# profiler.py
+'''Замеры времени по фазам кадра, оверлей с гистограммой и выгрузка в CSV.
+
+Фазы кадра:
+    events   - обработка событий (без поля ввода)
+    input    - InputBox.handle_event
+    molecule - отрисовка рамки с молекулой
+    ui       - отрисовка остальных элементов
+    flip     - pygame.display.update / flip
+Ожидание событий (сон планировщика) в кадр не входит.
+
+AllocationTracker (--allocations) считает память, выделенную за кадр
+(tracemalloc), и сборки мусора (gc): в установившемся режиме кадр не должен
+выделять ничего.
+
+FrameBudget сравнивает каждый кадр с бюджетом 1000/FPS мс, считает кадры,
+которые в него не уложились (пропущенные), и снижает качество анимаций
+(ui.QUALITY_*), пока анимированные кадры не перестанут его превышать.
+'''
+import csv
+import gc
+import time
+import tracemalloc
+from array import array
+
+import pygame
+
+from settings import BLACK, WHITE, DARK_BLUE, GREEN, RED, FPS
+from ui import TEXT_STATS, QUALITY_LOW, QUALITY_HIGH
+
+PHASES = ("events", "input", "molecule", "ui", "flip")
+# границы столбцов гистограммы времени кадра, мс; последний столбец
+# начинается ровно с бюджета кадра 1000/FPS - в нём только пропущенные кадры
+HISTOGRAM_BINS = (1, 2, 4, 8, 16, 1000 / FPS)
+# качество снижается после стольких анимированных кадров подряд сверх бюджета
+DOWNGRADE_AFTER = 2
+# и повышается после стольких анимированных кадров быстрее половины бюджета
+UPGRADE_AFTER = 90
+
+
+def histogram_bin(total_ms):
+    '''номер столбца гистограммы для кадра длиной total_ms'''
+    i = 0
+    while i < len(HISTOGRAM_BINS) and total_ms >= HISTOGRAM_BINS[i]:
+        i += 1
+    return i
+
+
+def histogram_color(i):
+    '''цвет столбца i: красный, если все кадры в нём дольше бюджета 1000/FPS'''
+    lower = HISTOGRAM_BINS[i - 1] if i else 0
+    return RED if lower >= 1000 / FPS else GREEN
+
+
+class FrameTimer:
+    '''копит время фаз текущего кадра и хранит историю последних кадров
+
+    история - кольцевые буферы array("d") заданного размера: запись кадра
+    не создаёт объектов Python
+    '''
+
+    def __init__(self, history=300, csv_path=None):
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.size = history
+        self.history = {phase: array("d", bytes(8 * history)) for phase in PHASES}
+        self.totals = array("d", bytes(8 * history))
+        # сколько кадров в истории и куда писать следующий
+        self.count = 0
+        self.pos = 0
+        self.last_total = 0.0
+        self.frames = 0
+        self.started = time.perf_counter()
+        self._csv_file = None
+        self._csv = None
+        if csv_path:
+            self._csv_file = open(csv_path, "w", newline="", encoding="utf-8")
+            self._csv = csv.writer(self._csv_file)
+            self._csv.writerow(("frame", "time_ms") + PHASES + ("total",))
+
+    def add(self, phase, seconds):
+        '''добавляет время к фазе текущего кадра'''
+        self.current[phase] += seconds
+
+    def end_frame(self):
+        '''закрывает кадр: переносит его в историю и в CSV'''
+        pos = self.pos
+        total = 0.0
+        for phase in PHASES:
+            ms = self.current[phase] * 1000
+            self.history[phase][pos] = ms
+            self.current[phase] = 0.0
+            total += ms
+        self.totals[pos] = total
+        self.last_total = total
+        self.pos = (pos + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        self.frames += 1
+        if self._csv is not None:
+            now_ms = (time.perf_counter() - self.started) * 1000
+            row = [self.frames, f"{now_ms:.1f}"]
+            row += [f"{self.history[phase][pos]:.3f}" for phase in PHASES]
+            row.append(f"{total:.3f}")
+            self._csv.writerow(row)
+
+    def mean(self, phase):
+        # незаполненная часть буфера - нули
+        return sum(self.history[phase]) / self.count if self.count else 0.0
+
+    def histogram(self):
+        '''число кадров в каждом интервале HISTOGRAM_BINS (последний - всё, что дольше)'''
+        counts = [0] * (len(HISTOGRAM_BINS) + 1)
+        for total in self.totals[:self.count]:
+            counts[histogram_bin(total)] += 1
+        return counts
+
+    def close(self):
+        if self._csv_file is not None:
+            self._csv_file.close()
+            self._csv_file = None
+            self._csv = None
+
+
+class FrameBudget:
+    '''бюджет кадра 1000/fps мс: пропущенные кадры и качество анимаций'''
+
+    def __init__(self, fps=FPS, quality=QUALITY_HIGH):
+        self.budget_ms = 1000 / fps
+        self.quality = quality
+        self.frames = 0
+        # кадры дольше бюджета
+        self.dropped = 0
+        self.downgrades = 0
+        self._over = 0
+        self._fast = 0
+
+    def measure(self, frame_ms, animating):
+        '''учитывает кадр; качество меняется только по анимированным кадрам'''
+        self.frames += 1
+        over = frame_ms > self.budget_ms
+        self.dropped += over
+        if not animating:
+            return self.quality
+        if over:
+            self._over += 1
+            self._fast = 0
+            if self._over >= DOWNGRADE_AFTER and self.quality > QUALITY_LOW:
+                self.quality -= 1
+                self.downgrades += 1
+                self._over = 0
+        else:
+            self._over = 0
+            self._fast = self._fast + 1 if frame_ms < self.budget_ms / 2 else 0
+            if self._fast >= UPGRADE_AFTER and self.quality < QUALITY_HIGH:
+                self.quality += 1
+                self._fast = 0
+        return self.quality
+
+    def stats(self):
+        return {"frames": self.frames, "dropped": self.dropped, "quality": self.quality,
+                "downgrades": self.downgrades}
+
+
+class AllocationTracker:
+    '''выделения памяти за кадр (tracemalloc) и сборки мусора (gc)
+
+    кадр считается выделяющим, если после него остались объекты под
+    наблюдением gc или новый текст (ui.TEXT_STATS), либо если временных
+    выделений было больше SCRATCH_BYTES: без них не обходится ни один кадр
+    на Python (итераторы циклов, большие целые, Rect, которые возвращают
+    blit и pygame.draw), но они освобождаются в том же кадре и до сборщика
+    мусора не доходят. Остаток памяти (retained) имеет смысл только по многим
+    кадрам: списки свободных объектов CPython заполняются не сразу, а
+    освобождение памяти, выделенной до tracemalloc.start, не учитывается
+
+    tracemalloc замедляет программу в разы, поэтому это режим диагностики
+    '''
+    # пик временных выделений установившихся кадров в benchmark.py
+    # --allocations - от 160 до 320 Б; запас - на разницу версий Python
+    SCRATCH_BYTES = 384
+
+    def __init__(self):
+        self.frames = 0
+        self.allocating_frames = 0
+        self.max_peak = 0
+        self.retained = 0
+        self.survivors = 0
+        self.text_renders = 0
+        self.collections = 0
+        self.gc_ms = 0.0
+        # последний кадр: пик временных выделений и остаток, байт
+        self.last_peak = 0
+        self.last_retained = 0
+        self._start = 0
+        self._gen0 = 0
+        self._renders = 0
+        self._gc_start = 0.0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        gc.callbacks.append(self._on_gc)
+
+    def stop(self):
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        tracemalloc.stop()
+
+    def _on_gc(self, phase, info):
+        if phase == "start":
+            self._gc_start = time.perf_counter()
+        else:
+            self.collections += 1
+            self.gc_ms += (time.perf_counter() - self._gc_start) * 1000
+
+    def begin_frame(self):
+        self._renders = TEXT_STATS["renders"]
+        self._gen0 = gc.get_count()[0]
+        self._start = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+
+    def end_frame(self):
+        '''закрывает кадр, возвращает True, если кадр что-то выделил'''
+        current, peak = tracemalloc.get_traced_memory()
+        # после сборки мусора счётчик gc сбрасывается и разность отрицательна
+        survivors = max(gc.get_count()[0] - self._gen0, 0)
+        renders = TEXT_STATS["renders"] - self._renders
+        self.last_peak = peak - self._start
+        self.last_retained = current - self._start
+        self.frames += 1
+        self.max_peak = max(self.max_peak, self.last_peak)
+        self.retained += self.last_retained
+        self.survivors += survivors
+        self.text_renders += renders
+        allocated = survivors > 0 or renders > 0 or self.last_peak > self.SCRATCH_BYTES
+        self.allocating_frames += allocated
+        return allocated
+
+    def stats(self):
+        return {"frames": self.frames, "allocating_frames": self.allocating_frames,
+                "max_peak_bytes": self.max_peak, "retained_bytes": self.retained,
+                "gc_survivors": self.survivors, "text_renders": self.text_renders,
+                "gc_collections": self.collections, "gc_ms": round(self.gc_ms, 2)}
+
+
+class TimingOverlay:
+    '''оверлей с гистограммой времени кадра, средним временем фаз, числом
+    отрисовок текста в секунду и пропущенных кадров; F3 - показать/скрыть
+
+    собственный текст оверлея в счётчик ui.TEXT_STATS не входит
+    '''
+    REFRESH_MS = 250
+    phase = "ui"
+
+    def __init__(self, timer, font, rect, budget=None):
+        self.timer = timer
+        # FrameBudget: качество анимаций и пропущенные кадры
+        self.budget = budget
+        self.font = font
+        self.rect = pygame.Rect(rect)
+        self.visible = False
+        self.next_refresh_ms = 0
+        self.dirty = False
+        # отрисовки текста в секунду по последнему интервалу обновления
+        self.text_rate = 0.0
+        self._text_renders = TEXT_STATS["renders"]
+        self._text_ms = 0
+
+    def relayout(self, font, rect):
+        self.font = font
+        self.rect = pygame.Rect(rect)
+        self.dirty = True
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.dirty = True
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.toggle()
+
+    def update(self, now_ms):
+        if self.visible and now_ms >= self.next_refresh_ms:
+            self.next_refresh_ms = now_ms + self.REFRESH_MS
+            renders = TEXT_STATS["renders"]
+            if now_ms > self._text_ms:
+                self.text_rate = (renders - self._text_renders) * 1000 / (now_ms - self._text_ms)
+            self._text_renders = renders
+            self._text_ms = now_ms
+            self.dirty = True
+
+    def next_deadline(self):
+        return self.next_refresh_ms if self.visible else None
+
+    def draw(self, screen):
+        self.dirty = False
+        if not self.visible:
+            return
+        pygame.draw.rect(screen, WHITE, self.rect)
+        pygame.draw.rect(screen, DARK_BLUE, self.rect, 1)
+        x, y = self.rect.x + 8, self.rect.y + 6
+        for phase in PHASES:
+            text = self.font.render(f"{phase:<9}{self.timer.mean(phase):7.2f} мс", True, BLACK)
+            screen.blit(text, (x, y))
+            y += text.get_height()
+        text = self.font.render(f"{'text/s':<9}{self.text_rate:7.1f}", True, BLACK)
+        screen.blit(text, (x, y))
+        y += text.get_height()
+        if self.budget is not None:
+            text = self.font.render(f"{'dropped':<9}{self.budget.dropped:7}  q{self.budget.quality}",
+                                    True, BLACK)
+            screen.blit(text, (x, y))
+            y += text.get_height()
+
+        # гистограмма: столбец на каждый интервал, красные - дольше бюджета кадра
+        counts = self.timer.histogram()
+        bar_w = (self.rect.width - 16) // len(counts)
+        base_y = self.rect.bottom - 18
+        max_h = base_y - y - 4
+        peak = max(counts) or 1
+        for i, count in enumerate(counts):
+            h = round(max_h * count / peak)
+            pygame.draw.rect(screen, histogram_color(i), (x + i * bar_w, base_y - h, bar_w - 2, h))
+            if i == len(HISTOGRAM_BINS):
+                label = f"{HISTOGRAM_BINS[-1]:.0f}+"
+            else:
+                label = f"<{HISTOGRAM_BINS[i]:.0f}"
+            text = self.font.render(label, True, BLACK)
+            screen.blit(text, (x + i * bar_w, base_y + 2))
+
+    def dirty_rect(self):
+        return self.rect
+
+
+def run_profiled(fn, path):
+    '''выполняет fn под cProfile, сохраняет статистику в path и отчёт по функциям в path.txt'''
+    import cProfile
+    import pstats
+
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(fn)
+    finally:
+        profile.dump_stats(path)
+        with open(path + ".txt", "w", encoding="utf-8") as f:
+            stats = pstats.Stats(profile, stream=f)
+            stats.sort_stats("cumulative").print_stats()
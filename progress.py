@@ -0,0 +1,165 @@
+# progress.py
+'''Прогресс игроков в SQLite: все ответы и точность по каждой аминокислоте.
+
+База в режиме WAL. Игра только кладёт ответ в очередь (record_answer), пишет
+фоновый поток: он забирает всё, что накопилось, и сохраняет одной
+транзакцией, поэтому кадр никогда не ждёт диска. При запуске состояние
+игрока читается одним запросом (load).
+
+Таблицы:
+    players(id, name, created)
+    answers(player_id, ts, seed, key, text, correct) - все ответы
+    stats(player_id, key, seen, correct, last_ts)    - сводка по аминокислотам
+'''
+import os
+import time
+import queue
+import sqlite3
+import threading
+
+DATA_DIR = os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"),
+    "aminoacids",
+)
+DB_PATH = os.path.join(DATA_DIR, "progress.sqlite")
+
+# не больше стольких ответов в одной транзакции
+BATCH_SIZE = 256
+# сколько писатель ждёт, чтобы собрать пачку после первого ответа, с
+BATCH_WAIT = 0.05
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS answers (
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    ts REAL NOT NULL,
+    seed INTEGER,
+    key TEXT NOT NULL,
+    text TEXT NOT NULL,
+    correct INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    player_id INTEGER NOT NULL REFERENCES players(id),
+    key TEXT NOT NULL,
+    seen INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    last_ts REAL NOT NULL,
+    PRIMARY KEY (player_id, key)
+) WITHOUT ROWID;
+"""
+
+UPSERT_STATS = """
+INSERT INTO stats (player_id, key, seen, correct, last_ts) VALUES (?, ?, 1, ?, ?)
+ON CONFLICT (player_id, key) DO UPDATE SET
+    seen = seen + 1, correct = correct + excluded.correct, last_ts = excluded.last_ts
+"""
+
+LOAD_STATS = """
+SELECT stats.key, stats.seen, stats.correct, stats.last_ts
+FROM stats JOIN players ON players.id = stats.player_id
+WHERE players.name = ?
+"""
+
+# конец очереди для потока записи
+_STOP = None
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # в WAL этого достаточно: при сбое питания теряется только последняя пачка
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class ProgressStore:
+    '''прогресс одного игрока; record_answer не блокирует, пишет фоновый поток'''
+
+    def __init__(self, player, path=DB_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.player = player
+        self.path = path
+        self.connection = connect(path)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO players (name, created) VALUES (?, ?)",
+                (player, time.time()))
+        self.player_id = self.connection.execute(
+            "SELECT id FROM players WHERE name = ?", (player,)).fetchone()[0]
+        self.queue = queue.SimpleQueue()
+        self.commits = 0
+        self.written = 0
+        self.error = None
+        self.thread = threading.Thread(target=self._writer, name="progress-writer", daemon=True)
+        self.thread.start()
+
+    def load(self):
+        '''{аминокислота: (ответов, верных, время последнего ответа)} одним запросом'''
+        rows = self.connection.execute(LOAD_STATS, (self.player,)).fetchall()
+        return {key: (seen, correct, last_ts) for key, seen, correct, last_ts in rows}
+
+    def record_answer(self, key, text, correct, seed=None):
+        '''кладёт ответ в очередь записи и сразу возвращается'''
+        self.queue.put((time.time(), seed, key, text, bool(correct)))
+
+    def _writer(self):
+        # у потока записи своё соединение: в WAL чтение не мешает записи
+        connection = connect(self.path)
+        q = self.queue
+        stopping = False
+        while not stopping:
+            item = q.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            # собираем, что пришло следом, но не дольше BATCH_WAIT
+            deadline = time.monotonic() + BATCH_WAIT
+            while len(batch) < BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                try:
+                    item = q.get(timeout=timeout) if timeout > 0 else q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._write(connection, batch)
+            except sqlite3.Error as error:
+                # игра продолжается; ошибка видна в self.error и при close
+                self.error = error
+        connection.close()
+
+    def _write(self, connection, batch):
+        pid = self.player_id
+        with connection:
+            connection.executemany(
+                "INSERT INTO answers (player_id, ts, seed, key, text, correct) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(pid, ts, seed, key, text, correct) for ts, seed, key, text, correct in batch])
+            connection.executemany(
+                UPSERT_STATS, [(pid, key, correct, ts) for ts, seed, key, text, correct in batch])
+        self.commits += 1
+        self.written += len(batch)
+
+    def close(self):
+        '''дописывает очередь и закрывает базу'''
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+        self.connection.close()
+        if self.error is not None:
+            raise self.error
+
+
+def summary(stats):
+    '''(ответов, верных) по результату ProgressStore.load'''
+    seen = sum(s for s, _, _ in stats.values())
+    correct = sum(c for _, c, _ in stats.values())
+    return seen, correct
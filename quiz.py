@@ -0,0 +1,108 @@
+# quiz.py
+'''Логика викторины без pygame: порядок вопросов, проверка ответа, счёт.'''
+import random
+
+from structures import AMINO_ACIDS
+from answers import default_index
+
+
+class CyclicOrder:
+    '''аминокислоты в случайном порядке идут по кругу;
+    игра заканчивается, когда счёт равен числу аминокислот'''
+
+    def __init__(self, keys, rng):
+        self.keys = keys
+        self.current_index = 0
+
+    @property
+    def current_key(self):
+        return self.keys[self.current_index]
+
+    def advance(self, key, correct):
+        self.current_index = (self.current_index + 1) % len(self.keys)
+
+    def upcoming(self, n):
+        count = min(n, len(self.keys) - 1)
+        return [self.keys[(self.current_index + i) % len(self.keys)] for i in range(1, count + 1)]
+
+    def finished(self, session):
+        return session.score == len(self.keys)
+
+    def progress(self, session):
+        return session.score, len(self.keys)
+
+
+class QuizSession:
+    '''одна игра: порядок вопросов задаёт order (CyclicOrder или
+    repetition.SpacedOrder), он же решает, когда игра закончена'''
+
+    def __init__(self, keys=None, seed=None, index=None, order=CyclicOrder):
+        # seed сохраняется, чтобы игру можно было повторить
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.keys = list(AMINO_ACIDS if keys is None else keys)
+        # названия, коды и опечатки (answers.AnswerIndex)
+        self.index = default_index() if index is None else index
+        rng = random.Random(seed)
+        rng.shuffle(self.keys)
+        self.order = order(self.keys, rng)
+        self.score = 0
+        self.answers = 0
+        # верных ответов подряд по каждой аминокислоте; выучено всё,
+        # когда последний ответ на каждую был верным
+        self.streaks = dict.fromkeys(self.keys, 0)
+        self.unmastered = len(self.keys)
+        self.mastered_at = None
+
+    @property
+    def current_key(self):
+        '''текущая аминокислота'''
+        return self.order.current_key
+
+    def upcoming(self, n):
+        '''до n следующих аминокислот после текущей, если отвечать верно'''
+        return self.order.upcoming(n)
+
+    @property
+    def total(self):
+        return len(self.keys)
+
+    @property
+    def finished(self):
+        return self.order.finished(self)
+
+    @property
+    def progress(self):
+        '''(сколько набрано, сколько нужно) для счёта на экране'''
+        return self.order.progress(self)
+
+    @property
+    def mastered(self):
+        return self.unmastered == 0
+
+    def is_correct(self, text):
+        '''правильный ли ответ на текущий вопрос'''
+        return self.index.match(text) == self.current_key
+
+    def answer(self, text):
+        '''принимает ответ, переходит к следующей аминокислоте
+
+        возвращает (верно ли, аминокислота, о которой спрашивали)
+        '''
+        key = self.current_key
+        correct = self.is_correct(text)
+        self.answers += 1
+        if correct:
+            self.score += 1
+            if self.streaks[key] == 0:
+                self.unmastered -= 1
+            self.streaks[key] += 1
+        elif self.streaks[key]:
+            self.unmastered += 1
+            self.streaks[key] = 0
+        if self.unmastered == 0 and self.mastered_at is None:
+            # сколько вопросов понадобилось, чтобы выучить всё
+            self.mastered_at = self.answers
+        self.order.advance(key, correct)
+        return correct, key
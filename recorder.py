@@ -0,0 +1,281 @@
+# recorder.py
+'''Запись событий игры и их повтор без окна.
+
+Примеры:
+    python main.py --record game.evlog            # играть и записывать
+    python main.py --replay game.evlog            # повторить в исходном темпе
+    python main.py --replay game.evlog --fast     # как можно быстрее, по виртуальным часам
+
+Записываются события, которые планировщик (idle.IdleScheduler) отдаёт
+игре: клавиши, кнопки, движение и колесо мыши, изменение размера и
+перекрытие окна, выход. Файл двоичный: заголовок с зерном перемешивания
+(quiz.QuizSession.seed), режимом порядка, переходом и размером окна,
+дальше записи "время от начала в мс, вид события, поля события".
+
+При повторе события отдаются в то же время от начала. С --fast время
+виртуальное (idle.set_clock): ожиданий нет, часы сразу переводятся к
+следующему событию или сроку, а во время анимации идут шагами по
+1000/FPS мс - число кадров и ответы те же при каждом повторе, поэтому
+повтор годится для профилирования (--profile, --timings-csv) и сравнения
+скорости. История игрока (--player) не записывается: повтор с --spaced
+идёт без неё.
+'''
+import struct
+
+import pygame
+
+from settings import FPS
+from idle import IdleScheduler, ticks, set_clock
+
+MAGIC = b"AAEV"
+VERSION = 1
+# сигнатура, версия, флаги, переход, зерно, ширина и высота окна
+HEADER = struct.Struct("<4sBBBqHH")
+FLAG_SPACED = 1
+TRANSITIONS = (None, "fade", "slide", "rotate")
+# время от начала записи в мс и вид события
+RECORD = struct.Struct("<IB")
+TEXT_LEN = struct.Struct("<B")
+
+# вид события -> поля после заголовка записи; номер вида - место в списке
+KINDS = (
+    ("QUIT", ""),
+    ("KEYDOWN", "<iH"),               # key, mod, затем unicode
+    ("KEYUP", "<iH"),
+    ("MOUSEBUTTONDOWN", "<hhB"),      # pos, button
+    ("MOUSEBUTTONUP", "<hhB"),
+    ("MOUSEMOTION", "<hhhhB"),        # pos, rel, кнопки битами
+    ("MOUSEWHEEL", "<hhhhH"),         # x, y, положение мыши, модификаторы
+    ("VIDEORESIZE", "<HH"),           # w, h
+    ("WINDOWSIZECHANGED", "<HH"),     # x, y - новый размер
+    ("VIDEOEXPOSE", ""),
+    ("WINDOWEXPOSED", ""),
+)
+KIND_STRUCTS = [struct.Struct(fmt) if fmt else None for _, fmt in KINDS]
+KIND_CODES = {getattr(pygame, name): code for code, (name, _) in enumerate(KINDS)}
+KEY_KINDS = (pygame.KEYDOWN, pygame.KEYUP)
+RESIZE_KINDS = (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED)
+
+
+def event_fields(event):
+    '''поля события для записи в порядке KINDS'''
+    kind = event.type
+    if kind in KEY_KINDS:
+        return event.key, event.mod
+    if kind in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        return event.pos[0], event.pos[1], event.button
+    if kind == pygame.MOUSEMOTION:
+        buttons = 0
+        for i, pressed in enumerate(event.buttons):
+            buttons |= bool(pressed) << i
+        return event.pos[0], event.pos[1], event.rel[0], event.rel[1], buttons
+    if kind == pygame.MOUSEWHEEL:
+        # у колеса в pygame нет положения мыши, а рамка молекулы его проверяет
+        x, y = pygame.mouse.get_pos()
+        return event.x, event.y, x, y, pygame.key.get_mods()
+    if kind == pygame.VIDEORESIZE:
+        return event.w, event.h
+    if kind == pygame.WINDOWSIZECHANGED:
+        return event.x, event.y
+    return ()
+
+
+def make_event(kind, fields, text):
+    '''событие pygame из полей записи'''
+    if kind in KEY_KINDS:
+        return pygame.event.Event(kind, key=fields[0], mod=fields[1], unicode=text, scancode=0)
+    if kind in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+        return pygame.event.Event(kind, pos=fields[:2], button=fields[2], touch=False)
+    if kind == pygame.MOUSEMOTION:
+        buttons = tuple(int(bool(fields[4] & (1 << i))) for i in range(3))
+        return pygame.event.Event(kind, pos=fields[:2], rel=fields[2:4], buttons=buttons,
+                                  touch=False)
+    if kind == pygame.MOUSEWHEEL:
+        return pygame.event.Event(kind, x=fields[0], y=fields[1], flipped=False, touch=False,
+                                  pos=fields[2:4], mod=fields[4])
+    if kind == pygame.VIDEORESIZE:
+        return pygame.event.Event(kind, size=fields, w=fields[0], h=fields[1])
+    if kind == pygame.WINDOWSIZECHANGED:
+        return pygame.event.Event(kind, x=fields[0], y=fields[1])
+    return pygame.event.Event(kind)
+
+
+class EventWriter:
+    '''пишет события в файл записи'''
+
+    def __init__(self, path, seed, size, spaced=False, transition=None):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, FLAG_SPACED if spaced else 0,
+                                    TRANSITIONS.index(transition), seed, *size))
+        self.start_ms = ticks()
+        self.events = 0
+
+    def write(self, events, now_ms):
+        '''события одного кадра; now_ms - время кадра по idle.ticks()'''
+        t = now_ms - self.start_ms
+        for event in events:
+            code = KIND_CODES.get(event.type)
+            if code is None:
+                # остальное (фокус, ввод текста, джойстик) игра не обрабатывает
+                continue
+            self.file.write(RECORD.pack(t, code))
+            fields = KIND_STRUCTS[code]
+            if fields is not None:
+                self.file.write(fields.pack(*event_fields(event)))
+            if event.type in KEY_KINDS:
+                text = getattr(event, "unicode", "").encode("utf-8")[:255]
+                self.file.write(TEXT_LEN.pack(len(text)))
+                self.file.write(text)
+            self.events += 1
+
+    def close(self):
+        self.file.close()
+
+
+class EventLog:
+    '''прочитанная запись: параметры игры и [(мс от начала, событие), ...]'''
+
+    def __init__(self, seed, size, spaced, transition, events):
+        self.seed = seed
+        self.size = size
+        self.spaced = spaced
+        self.transition = transition
+        self.events = events
+
+    @property
+    def duration_ms(self):
+        return self.events[-1][0] if self.events else 0
+
+    @classmethod
+    def load(cls, path):
+        '''читает файл записи; ValueError, если это не запись или она испорчена'''
+        with open(path, "rb") as f:
+            data = f.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path}: не запись событий")
+        magic, version, flags, transition, seed, w, h = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: не запись событий")
+        if version != VERSION:
+            raise ValueError(f"{path}: версия записи {version}, поддерживается {VERSION}")
+        if transition >= len(TRANSITIONS):
+            raise ValueError(f"{path}: неизвестный переход {transition}")
+
+        events = []
+        pos = HEADER.size
+        try:
+            while pos < len(data):
+                t, code = RECORD.unpack_from(data, pos)
+                pos += RECORD.size
+                if code >= len(KINDS):
+                    raise ValueError(f"{path}: неизвестный вид события {code}")
+                kind = getattr(pygame, KINDS[code][0])
+                fields = ()
+                if KIND_STRUCTS[code] is not None:
+                    fields = KIND_STRUCTS[code].unpack_from(data, pos)
+                    pos += KIND_STRUCTS[code].size
+                text = ""
+                if kind in KEY_KINDS:
+                    length, = TEXT_LEN.unpack_from(data, pos)
+                    pos += TEXT_LEN.size
+                    text = data[pos:pos + length].decode("utf-8")
+                    pos += length
+                events.append((t, make_event(kind, fields, text)))
+        except struct.error:
+            raise ValueError(f"{path}: запись обрывается на {pos} байте")
+        return cls(seed, (w, h), bool(flags & FLAG_SPACED), TRANSITIONS[transition], events)
+
+
+class RecordingScheduler(IdleScheduler):
+    '''обычный планировщик, который записывает отданные игре события'''
+
+    def __init__(self, writer, fps=FPS):
+        super().__init__(fps)
+        self.writer = writer
+
+    def wait(self, animating=False, deadline_ms=None):
+        events, dt = super().wait(animating, deadline_ms)
+        if events:
+            self.writer.write(events, self.last_ms)
+        return events, dt
+
+
+class ReplayScheduler(IdleScheduler):
+    '''отдаёт игре события из записи вместо событий окна
+
+    fast - виртуальные часы без ожиданий; когда запись кончилась,
+    игра получает QUIT
+    '''
+
+    def __init__(self, log, fps=FPS, fast=False):
+        self.fast = fast
+        if fast:
+            self.virtual_ms = pygame.time.get_ticks()
+            set_clock(self.clock_ms)
+        super().__init__(fps)
+        self.frame_ms = 1000 // fps
+        self.events = log.events
+        self.next = 0
+        self.start_ms = self.last_ms
+        self.ended = False
+
+    def clock_ms(self):
+        return self.virtual_ms
+
+    def wait(self, animating=False, deadline_ms=None):
+        # события настоящего окна (без видеодрайвера их почти нет) не нужны
+        pygame.event.get()
+        next_ms = None
+        if self.next < len(self.events):
+            next_ms = self.start_ms + self.events[self.next][0]
+        wake_ms = deadline_ms
+        if next_ms is not None and (wake_ms is None or next_ms < wake_ms):
+            wake_ms = next_ms
+
+        if self.fast:
+            if animating:
+                self.virtual_ms += self.frame_ms
+            elif wake_ms is not None and wake_ms > self.virtual_ms:
+                self.virtual_ms = wake_ms
+        elif animating:
+            self.clock.tick(self.fps)
+            self.idle_ms += max(0, self.clock.get_time() - self.clock.get_rawtime())
+        else:
+            before = ticks()
+            if wake_ms is not None and wake_ms > before:
+                pygame.time.wait(wake_ms - before)
+            self.idle_ms += ticks() - before
+            self.idle_wakeups += 1
+            self.clock.tick()
+
+        now = ticks()
+        events = []
+        while self.next < len(self.events) and self.start_ms + self.events[self.next][0] <= now:
+            event = self.events[self.next][1]
+            self.next += 1
+            if event.type in RESIZE_KINDS:
+                self.resize_window(event)
+            events.append(event)
+        if self.next == len(self.events) and not self.ended:
+            self.ended = True
+            events.append(pygame.event.Event(pygame.QUIT))
+
+        dt = now - self.last_ms
+        self.last_ms = now
+        self.frames += 1
+        return events, dt
+
+    def resize_window(self, event):
+        '''окно получает размер из записи до того, как игра узнает о нём'''
+        if event.type == pygame.VIDEORESIZE:
+            size = event.size
+        else:
+            size = (event.x, event.y)
+        screen = pygame.display.get_surface()
+        if screen is None or screen.get_size() != tuple(size):
+            pygame.display.set_mode(size, pygame.RESIZABLE)
+
+    def close(self):
+        if self.fast:
+            set_clock()
@@ -0,0 +1,85 @@
+# repetition.py
+'''Интервальное повторение (коробки Лейтнера) вместо прохода по кругу.
+
+Каждая аминокислота лежит в коробке: верный ответ переносит её в следующую,
+ошибка - обратно в нулевую. Чем выше коробка, тем позже вопрос повторится
+(LEITNER_GAPS - через сколько вопросов). Следующий вопрос - вершина кучи
+(срок, -доля ошибок, порядок), поэтому выбор стоит O(log n) и колоду не
+нужно просматривать целиком: при равных сроках первыми идут те, на которых
+игрок ошибался чаще.
+
+history - прошлые результаты игрока (progress.ProgressStore.load): с ними
+первыми спрашиваются аминокислоты, на которых он чаще ошибался раньше.
+
+Игра заканчивается, когда всё выучено: последний ответ на каждую
+аминокислоту был верным (QuizSession.mastered).
+'''
+import heapq
+
+# через сколько вопросов повторить аминокислоту из коробки 0, 1, 2...
+LEITNER_GAPS = (3, 8, 20, 50, 120)
+
+
+class Card:
+    __slots__ = ("key", "box", "due", "seen", "errors")
+
+    def __init__(self, key):
+        self.key = key
+        self.box = 0
+        self.due = 0
+        self.seen = 0
+        self.errors = 0
+
+    def error_rate(self):
+        # сглаженная доля ошибок: у новой карточки 0.5
+        return (self.errors + 1) / (self.seen + 2)
+
+
+class SpacedOrder:
+    '''порядок вопросов по интервальному повторению, интерфейс как у quiz.CyclicOrder'''
+
+    def __init__(self, keys, rng, history=None):
+        self.cards = {key: Card(key) for key in keys}
+        for key, (seen, correct, *_) in (history or {}).items():
+            card = self.cards.get(key)
+            if card is not None:
+                card.seen = seen
+                card.errors = seen - correct
+        self.step = 0
+        self._counter = 0
+        # новые карточки - в порядке перемешанных keys
+        self.heap = []
+        for key in keys:
+            self._push(self.cards[key])
+
+    def _push(self, card):
+        self._counter += 1
+        heapq.heappush(self.heap, (card.due, -card.error_rate(), self._counter, card))
+
+    @property
+    def current_key(self):
+        return self.heap[0][3].key
+
+    def advance(self, key, correct):
+        card = heapq.heappop(self.heap)[3]
+        self.step += 1
+        card.seen += 1
+        if correct:
+            card.box = min(card.box + 1, len(LEITNER_GAPS) - 1)
+        else:
+            card.errors += 1
+            card.box = 0
+        card.due = self.step + LEITNER_GAPS[card.box]
+        self._push(card)
+
+    def upcoming(self, n):
+        # следующие по куче без текущей: ответ на неё может сдвинуть порядок,
+        # но для подготовки картинок хватает
+        return [entry[3].key for entry in heapq.nsmallest(n + 1, self.heap)[1:]]
+
+    def finished(self, session):
+        return session.mastered
+
+    def progress(self, session):
+        # счёт - сколько аминокислот уже выучено
+        return len(self.cards) - session.unmastered, len(self.cards)
@@ -0,0 +1,289 @@
+# server.py
+'''Классный режим: один сервер asyncio, много учеников и панель учителя.
+
+Запуск:  python server.py serve [--port 8765] [--seed N]
+Панель:  python server.py dashboard [--port 8765]
+Ученик:  python main.py --server HOST:PORT --name Имя
+
+Все ученики получают один и тот же порядок вопросов (общий seed класса).
+Каждое подключение - задача asyncio, отдельных потоков нет.
+
+Протокол - JSON, одно сообщение на строку (UTF-8):
+    клиент -> сервер
+        {"type": "join", "name": ...}       - войти (или вернуться под тем же именем)
+        {"type": "answer", "text": ...}     - ответ на текущий вопрос
+        {"type": "watch"}                   - подписка панели учителя
+    сервер -> клиент
+        {"type": "question", "id", "structure", "score", "total", "finished"}
+        {"type": "result", "correct", "answered", "id", "structure", "score", "total",
+         "finished"}
+        {"type": "dashboard", "players": [...], "answers", "correct"}
+        {"type": "error", "message"}
+
+Название текущей аминокислоты и seed (по нему восстанавливается порядок)
+остаются на сервере: ученик получает номер вопроса и структуру для
+рисования (structures.structure_data), а название - только в "answered",
+после ответа. Номер случайный и свой у каждого вопроса каждого ученика,
+после ответа он больше не выдаётся, так что таблицу "номер -> название"
+не собрать.
+'''
+import sys
+import json
+import random
+import asyncio
+import secrets
+
+from quiz import QuizSession
+from answers import default_index
+from structures import AMINO_ACIDS, structure_data
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# как часто панель учителя получает сводку, если что-то изменилось
+DASHBOARD_INTERVAL = 1.0
+MAX_NAME_LENGTH = 40
+MAX_LINE = 4096
+
+
+def encode(message):
+    '''сообщение протокола в байты строки'''
+    return (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def decode(line):
+    message = json.loads(line.decode("utf-8"))
+    if not isinstance(message, dict):
+        raise ValueError("сообщение должно быть объектом JSON")
+    return message
+
+
+class ProtocolError(Exception):
+    '''неправильное сообщение клиента; соединение не закрывается'''
+
+
+class Classroom:
+    '''все сессии класса: имя ученика -> quiz.QuizSession с общим seed'''
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.randrange(2 ** 32)
+        self.seed = seed
+        self.index = default_index()
+        # имя ученика -> номер его текущего вопроса; структура для рисования
+        self.question_ids = {}
+        self.structures = {key: structure_data(molecule) for key, molecule in AMINO_ACIDS.items()}
+        self.sessions = {}
+        self.connected = set()
+        self.answers = 0
+        self.correct = 0
+        # счётчик изменений: панель учителя обновляется, только если он вырос
+        self.version = 0
+
+    def join(self, name):
+        name = str(name).strip()[:MAX_NAME_LENGTH]
+        if not name:
+            raise ProtocolError("пустое имя")
+        if name in self.connected:
+            raise ProtocolError(f"имя {name} уже занято")
+        session = self.sessions.get(name)
+        if session is None:
+            session = QuizSession(seed=self.seed, index=self.index)
+            self.sessions[name] = session
+        self.connected.add(name)
+        self.version += 1
+        return name, session
+
+    def leave(self, name):
+        self.connected.discard(name)
+        self.version += 1
+
+    def answer(self, name, text):
+        session = self.sessions[name]
+        if session.finished:
+            raise ProtocolError("игра уже закончена")
+        correct, key = session.answer(str(text))
+        # на следующий вопрос - новый номер, даже если аминокислота та же
+        self.question_ids.pop(name, None)
+        self.answers += 1
+        self.correct += correct
+        self.version += 1
+        return correct, key
+
+    def question(self, name):
+        session = self.sessions[name]
+        key = session.current_key
+        question_id = self.question_ids.get(name)
+        if question_id is None:
+            question_id = self.question_ids[name] = secrets.token_hex(8)
+        return {"type": "question", "id": question_id,
+                "structure": self.structures[key], "score": session.score,
+                "total": session.total, "finished": session.finished}
+
+    def snapshot(self):
+        '''сводка для панели учителя: ученики по убыванию счёта'''
+        players = [
+            {"name": name, "score": s.score, "answers": s.answers, "total": s.total,
+             "finished": s.finished, "connected": name in self.connected}
+            for name, s in self.sessions.items()
+        ]
+        players.sort(key=lambda p: (-p["score"], p["answers"], p["name"]))
+        return {"type": "dashboard", "players": players,
+                "answers": self.answers, "correct": self.correct}
+
+
+class ClassroomServer:
+    '''asyncio-сервер: одно подключение - одна задача'''
+
+    def __init__(self, classroom=None):
+        self.classroom = classroom or Classroom()
+        self.watchers = set()
+        self.server = None
+        self._broadcast_task = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self.handle, host, port, limit=MAX_LINE)
+        self._broadcast_task = asyncio.create_task(self.broadcast_dashboard())
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self._broadcast_task is not None:
+            self._broadcast_task.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        name = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # строка длиннее MAX_LINE
+                    break
+                if not line:
+                    break
+                try:
+                    reply, name = self.dispatch(decode(line), name, writer)
+                except (ProtocolError, ValueError) as error:
+                    reply = {"type": "error", "message": str(error)}
+                if reply is not None:
+                    writer.write(encode(reply))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.watchers.discard(writer)
+            if name is not None:
+                self.classroom.leave(name)
+            writer.close()
+
+    def dispatch(self, message, name, writer):
+        '''ответ на одно сообщение и имя ученика этого подключения'''
+        kind = message.get("type")
+        classroom = self.classroom
+        if kind == "join":
+            if name is not None:
+                raise ProtocolError("уже в игре")
+            name, _ = classroom.join(message.get("name", ""))
+            return classroom.question(name), name
+        if kind == "answer":
+            if name is None:
+                raise ProtocolError("сначала нужно войти (join)")
+            correct, key = classroom.answer(name, message.get("text", ""))
+            reply = classroom.question(name)
+            reply.update(type="result", correct=correct, answered=key)
+            return reply, name
+        if kind == "watch":
+            self.watchers.add(writer)
+            return classroom.snapshot(), name
+        raise ProtocolError(f"неизвестное сообщение: {kind}")
+
+    async def broadcast_dashboard(self):
+        '''рассылает сводку панелям учителя, когда в классе что-то изменилось'''
+        sent_version = self.classroom.version
+        while True:
+            await asyncio.sleep(DASHBOARD_INTERVAL)
+            if not self.watchers or self.classroom.version == sent_version:
+                continue
+            sent_version = self.classroom.version
+            data = encode(self.classroom.snapshot())
+            for writer in list(self.watchers):
+                if writer.is_closing():
+                    self.watchers.discard(writer)
+                else:
+                    writer.write(data)
+
+
+def format_dashboard(message):
+    '''сводка класса в виде таблицы для терминала'''
+    players = message["players"]
+    lines = [f"Учеников: {len(players)}, ответов: {message['answers']}, "
+             f"верных: {message['correct']}", ""]
+    width = max([len(p["name"]) for p in players] + [3])
+    for place, p in enumerate(players, 1):
+        state = "готово" if p["finished"] else ("в игре" if p["connected"] else "вышел")
+        lines.append(f"{place:3}. {p['name']:<{width}}  {p['score']:3}/{p['total']:<3}"
+                     f"  ответов {p['answers']:4}  {state}")
+    return "\n".join(lines)
+
+
+async def dashboard(host, port):
+    '''панель учителя: печатает сводку класса при каждом изменении'''
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"type": "watch"}))
+    await writer.drain()
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        message = decode(line)
+        if message.get("type") == "dashboard":
+            # очистка экрана терминала перед новой таблицей
+            print("\033[2J\033[H" + format_dashboard(message), flush=True)
+    writer.close()
+
+
+async def serve(host, port, seed):
+    server = ClassroomServer(Classroom(seed))
+    host, port = await server.start(host, port)
+    print(f"Сервер класса: {host}:{port}, seed {server.classroom.seed}", flush=True)
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+def parse_address(text, default_port=DEFAULT_PORT):
+    '''"host:port" или "host" -> (host, port)'''
+    host, _, port = text.rpartition(":")
+    if not host:
+        return text, default_port
+    return host, int(port)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Сервер для игры всем классом")
+    parser.add_argument("command", choices=("serve", "dashboard"))
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--seed", type=int, help="общий порядок вопросов для класса")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "serve":
+            asyncio.run(serve(args.host, args.port, args.seed))
+        else:
+            asyncio.run(dashboard(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except OSError as error:
+        print(f"Нет соединения: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,4 @@
 # settings.py
-import pygame
 
 # Экран
 WIDTH = 1000
@@ -23,3 +22,14 @@ BLUE = (50, 100, 200)
 FONT_NAME = 'arial'
 FONT_SIZE = 32
 SMALL_FONT = 24
+
+# Кэш готовых изображений молекул (в мегабайтах)
+MOLECULE_CACHE_MB = 16
+
+# Сколько следующих молекул рисуется заранее в фоновом потоке (0 - не рисовать)
+PREFETCH_DEPTH = 3
+
+# Переход между молекулами: "fade", "slide", "rotate" или None (мгновенно);
+# по умолчанию молекула сменяется сразу, анимация включается --transition
+TRANSITION = None
+TRANSITION_MS = 350
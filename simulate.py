@@ -0,0 +1,262 @@
+# simulate.py
+'''Симуляция игр без окна: боты отвечают на вопросы quiz.QuizSession.
+
+Пример:
+    python simulate.py --sessions 100000 --bot learner --workers 4
+
+Порядок вопросов --order: cyclic (по кругу) или spaced (repetition.SpacedOrder).
+С --until-mastered игра идёт, пока всё не выучено (последний ответ на каждую
+аминокислоту верный), а не до обычного конца игры. --compare сравнивает оба
+порядка по числу вопросов до того, как всё выучено.
+
+Игра i использует seed (--seed + i) и для порядка вопросов, и для бота,
+поэтому результат полностью повторяется и не зависит от числа процессов.
+
+Боты:
+    random   - отвечает верно с вероятностью --accuracy, иначе называет другую аминокислоту
+    learner  - знает аминокислоту с вероятностью --accuracy, а после ошибки
+               запоминает правильный ответ с вероятностью --learn
+    typo     - как random, но верные ответы пишет с одной опечаткой
+    scripted - отвечает строками из --script по кругу
+'''
+import sys
+import time
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from structures import AMINO_ACIDS
+from quiz import QuizSession, CyclicOrder
+from repetition import SpacedOrder
+
+KEYS = tuple(AMINO_ACIDS)
+# ответов на игру, после которых игра считается незаконченной
+MAX_ANSWERS = 1000
+# игр в одной задаче пула
+CHUNK = 2000
+
+
+class RandomBot:
+    def __init__(self, rng, accuracy, **options):
+        self.rng = rng
+        self.accuracy = accuracy
+
+    def wrong(self, key):
+        other = self.rng.choice(KEYS)
+        return other if other != key else ""
+
+    def answer(self, key):
+        if self.rng.random() < self.accuracy:
+            return key
+        return self.wrong(key)
+
+    def feedback(self, key, correct):
+        pass
+
+
+class LearnerBot(RandomBot):
+    def __init__(self, rng, accuracy, learn=0.5, **options):
+        super().__init__(rng, accuracy)
+        self.learn = learn
+        self.known = {key for key in KEYS if rng.random() < accuracy}
+
+    def answer(self, key):
+        return key if key in self.known else self.wrong(key)
+
+    def feedback(self, key, correct):
+        if not correct and self.rng.random() < self.learn:
+            self.known.add(key)
+
+
+class TypoBot(RandomBot):
+    LETTERS = "абвгдеиклмнопрстуц"
+
+    def answer(self, key):
+        if self.rng.random() >= self.accuracy:
+            return self.wrong(key)
+        # одна замена буквы в середине слова
+        i = self.rng.randrange(1, len(key) - 1)
+        return key[:i] + self.rng.choice(self.LETTERS) + key[i + 1:]
+
+
+class ScriptedBot:
+    def __init__(self, rng, accuracy, script=(), **options):
+        self.script = list(script) or [""]
+        self.i = 0
+
+    def answer(self, key):
+        text = self.script[self.i % len(self.script)]
+        self.i += 1
+        return text
+
+    def feedback(self, key, correct):
+        pass
+
+
+BOTS = {"random": RandomBot, "learner": LearnerBot, "typo": TypoBot, "scripted": ScriptedBot}
+ORDERS = {"cyclic": CyclicOrder, "spaced": SpacedOrder}
+
+
+def play(seed, bot, accuracy, options, max_answers=MAX_ANSWERS, order="cyclic",
+         until_mastered=False):
+    '''одна игра; возвращает (закончена ли, число ответов, верных ответов)'''
+    session = QuizSession(seed=seed, order=ORDERS[order])
+    player = BOTS[bot](random.Random(seed), accuracy, **options)
+    correct_answers = 0
+    while session.answers < max_answers:
+        if session.mastered if until_mastered else session.finished:
+            break
+        correct, key = session.answer(player.answer(session.current_key))
+        correct_answers += correct
+        player.feedback(key, correct)
+    done = session.mastered if until_mastered else session.finished
+    return done, session.answers, correct_answers
+
+
+def simulate_chunk(task):
+    '''игры с seed из [start, stop); возвращает сводку, которую можно складывать'''
+    start, stop, bot, accuracy, options, max_answers, order, until_mastered = task
+    lengths = Counter()
+    unfinished = 0
+    answers = 0
+    correct = 0
+    for seed in range(start, stop):
+        finished, n, c = play(seed, bot, accuracy, options, max_answers, order, until_mastered)
+        if finished:
+            lengths[n] += 1
+        else:
+            unfinished += 1
+        answers += n
+        correct += c
+    return lengths, unfinished, answers, correct
+
+
+def simulate(sessions, bot="random", accuracy=0.7, seed=0, workers=None,
+             max_answers=MAX_ANSWERS, order="cyclic", until_mastered=False, **options):
+    '''сводка по sessions играм: число ответов до победы, незаконченные, точность'''
+    tasks = [(start, min(start + CHUNK, seed + sessions), bot, accuracy, options, max_answers,
+              order, until_mastered)
+             for start in range(seed, seed + sessions, CHUNK)]
+    if workers == 1:
+        results = map(simulate_chunk, tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(simulate_chunk, tasks)
+    lengths = Counter()
+    unfinished = answers = correct = 0
+    try:
+        for chunk_lengths, chunk_unfinished, chunk_answers, chunk_correct in results:
+            lengths.update(chunk_lengths)
+            unfinished += chunk_unfinished
+            answers += chunk_answers
+            correct += chunk_correct
+    finally:
+        if workers != 1:
+            pool.shutdown()
+    return {"sessions": sessions, "finished": sessions - unfinished, "unfinished": unfinished,
+            "answers": answers, "correct": correct,
+            "lengths": {n: lengths[n] for n in sorted(lengths)}}
+
+
+def length_percentile(lengths, p):
+    '''число ответов, за которое закончили p% законченных игр'''
+    total = sum(lengths.values())
+    need = total * p / 100
+    seen = 0
+    for n, count in lengths.items():
+        seen += count
+        if seen >= need:
+            return n
+    return 0
+
+
+def mean_length(summary):
+    lengths = summary["lengths"]
+    return sum(n * count for n, count in lengths.items()) / max(summary["finished"], 1)
+
+
+def print_comparison(summaries):
+    '''вопросов до того, как всё выучено, для каждого порядка'''
+    print("Вопросов, пока всё не выучено:")
+    for order, summary in summaries.items():
+        lengths = summary["lengths"]
+        print(f"  {order:<7} среднее {mean_length(summary):6.1f}  "
+              f"p50 {length_percentile(lengths, 50):4}  p90 {length_percentile(lengths, 90):4}  "
+              f"не выучено за лимит: {summary['unfinished']}")
+    base, other = summaries["cyclic"], summaries["spaced"]
+    if base["finished"] and other["finished"]:
+        change = 100 * (mean_length(other) / mean_length(base) - 1)
+        print(f"  spaced относительно cyclic: {change:+.1f}%")
+
+
+def print_report(summary, seconds):
+    sessions = summary["sessions"]
+    lengths = summary["lengths"]
+    print(f"Игр: {sessions} за {seconds:.2f} с ({sessions / seconds:.0f} в секунду)")
+    print(f"Закончено: {summary['finished']}, не закончено за лимит ответов: "
+          f"{summary['unfinished']}")
+    if summary["answers"]:
+        print(f"Верных ответов: {100 * summary['correct'] / summary['answers']:.1f}%")
+    if not lengths:
+        return
+    mean = mean_length(summary)
+    print(f"Ответов до победы: среднее {mean:.1f}, мин {min(lengths)}, "
+          f"p50 {length_percentile(lengths, 50)}, p90 {length_percentile(lengths, 90)}, "
+          f"p99 {length_percentile(lengths, 99)}, макс {max(lengths)}")
+
+    # гистограмма по 10 интервалам
+    lo, hi = min(lengths), max(lengths)
+    width = max(1, (hi - lo + 10) // 10)
+    bins = Counter()
+    for n, count in lengths.items():
+        bins[lo + (n - lo) // width * width] += count
+    peak = max(bins.values())
+    for start in sorted(bins):
+        bar = "#" * round(40 * bins[start] / peak)
+        print(f"  {start:4}-{start + width - 1:<4} {bins[start]:8}  {bar}")
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Симуляция игр ботами без окна")
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--bot", choices=sorted(BOTS), default="random")
+    parser.add_argument("--accuracy", type=float, default=0.7,
+                        help="доля верных ответов (для learner - доля знакомых аминокислот)")
+    parser.add_argument("--learn", type=float, default=0.5,
+                        help="learner: вероятность запомнить ответ после ошибки")
+    parser.add_argument("--script", nargs="+", default=[], help="ответы для бота scripted")
+    parser.add_argument("--order", choices=sorted(ORDERS), default="cyclic")
+    parser.add_argument("--until-mastered", action="store_true",
+                        help="играть, пока последний ответ на каждую аминокислоту не станет верным")
+    parser.add_argument("--compare", action="store_true",
+                        help="сравнить cyclic и spaced по числу вопросов, пока всё не выучено")
+    parser.add_argument("--seed", type=int, default=0, help="seed первой игры")
+    parser.add_argument("--max-answers", type=int, default=MAX_ANSWERS)
+    parser.add_argument("--workers", type=int, help="число процессов (по умолчанию - все ядра)")
+    parser.add_argument("--output", help="сохранить сводку в JSON")
+    args = parser.parse_args(argv)
+
+    options = {"learn": args.learn, "script": args.script}
+    if args.compare:
+        summaries = {order: simulate(args.sessions, args.bot, args.accuracy, args.seed,
+                                     args.workers, args.max_answers, order, True, **options)
+                     for order in ("cyclic", "spaced")}
+        print_comparison(summaries)
+        summary = summaries
+    else:
+        start = time.perf_counter()
+        summary = simulate(args.sessions, args.bot, args.accuracy, args.seed, args.workers,
+                           args.max_answers, args.order, args.until_mastered, **options)
+        seconds = time.perf_counter() - start
+        print_report(summary, seconds)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
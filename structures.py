@@ -0,0 +1,349 @@
+# structures.py
+'''Структуры аминокислот в виде данных: массивы атомов и связей.
+
+Координаты заданы в пикселях относительно альфа-углерода (0, 0),
+ось y направлена вниз, как на экране. Атом с радиусом 0 - вершина
+скелетной формулы (например, углерод кольца), подпись для него не рисуется.
+'''
+import math
+from array import array
+
+
+class Molecule:
+    '''молекула: параллельные массивы атомов и массивы связей'''
+    __slots__ = ("name", "atom_names", "elements", "xs", "ys", "radii",
+                 "bond_a", "bond_b", "bond_order")
+
+    def __init__(self, name, atoms, bonds):
+        # atoms - последовательность (имя, элемент, x, y, радиус)
+        # bonds - последовательность (имя атома 1, имя атома 2, порядок)
+        self.name = name
+        self.atom_names = tuple(a[0] for a in atoms)
+        self.elements = tuple(a[1] for a in atoms)
+        self.xs = array("d", (a[2] for a in atoms))
+        self.ys = array("d", (a[3] for a in atoms))
+        self.radii = array("b", (a[4] for a in atoms))
+
+        index = {atom_name: i for i, atom_name in enumerate(self.atom_names)}
+        if len(index) != len(self.atom_names):
+            raise ValueError(f"{name}: повторяющиеся имена атомов")
+        self.bond_a = array("b", (index[b[0]] for b in bonds))
+        self.bond_b = array("b", (index[b[1]] for b in bonds))
+        self.bond_order = array("b", (b[2] for b in bonds))
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __repr__(self):
+        return f"Molecule({self.name!r}, atoms={len(self)}, bonds={len(self.bond_a)})"
+
+    def atom_index(self, atom_name):
+        '''номер атома по имени'''
+        return self.atom_names.index(atom_name)
+
+    def bounds(self):
+        '''границы молекулы с учётом радиусов атомов: (x_min, y_min, x_max, y_max)'''
+        pad = max(max(self.radii), 2)
+        return (min(self.xs) - pad, min(self.ys) - pad,
+                max(self.xs) + pad, max(self.ys) + pad)
+
+
+def get_poly_points(cx, cy, r, sides, start_deg=0):
+    '''функция для создания списка вершин правильного многоугольника'''
+    points = []
+    for i in range(sides):
+        angle = math.radians(start_deg + i * (360 / sides))
+        px = cx + r * math.cos(angle)
+        py = cy + r * math.sin(angle)
+        points.append((px, py))
+    return points
+
+
+def _ring_atoms(prefix, cx, cy, r, sides, start_deg=-90, elements=None):
+    '''атомы правильного кольца: по умолчанию невидимые вершины-углероды'''
+    atoms = []
+    for i, (px, py) in enumerate(get_poly_points(cx, cy, r, sides, start_deg)):
+        element, radius = ("C", 0)
+        if elements and i in elements:
+            element, radius = elements[i], 10
+        atoms.append((f"{prefix}{i}", element, px, py, radius))
+    return atoms
+
+
+def _ring_bonds(prefix, sides, double):
+    '''связи кольца, double - номера связей i-(i+1), которые двойные'''
+    return [(f"{prefix}{i}", f"{prefix}{(i + 1) % sides}", 2 if i in double else 1)
+            for i in range(sides)]
+
+
+# Общий скелет аминокислоты N-C-C: хранится один раз
+BACKBONE_ATOMS = (
+    ("CA", "C", 0, 0, 10),      # альфа-углерод
+    ("N", "N", -60, 0, 10),
+    ("C", "C", 60, 0, 10),
+    ("O", "O", 60, -50, 10),    # C=O
+    ("OXT", "O", 100, 20, 10),  # C-OH
+    ("HA", "H", 0, -40, 7),     # H при альфа-C
+    ("H1", "H", -90, -20, 7),   # 2 H при N
+    ("H2", "H", -90, 20, 7),
+    ("HXT", "H", 120, 20, 7),   # H при OH
+)
+
+BACKBONE_BONDS = (
+    ("N", "CA", 1),
+    ("CA", "C", 1),
+    ("C", "O", 2),
+    ("C", "OXT", 1),
+    ("CA", "HA", 1),
+    ("N", "H1", 1),
+    ("N", "H2", 1),
+    ("OXT", "HXT", 1),
+)
+
+BACKBONE = Molecule("скелет", BACKBONE_ATOMS, BACKBONE_BONDS)
+
+
+# Боковые цепи: (атомы, связи). Атомы скелета доступны по именам
+def _phenyl_ring():
+    # бензольное кольцо под CB, вершина 0 смотрит строго вверх
+    atoms = [("CB", "C", 0, 40, 10)] + _ring_atoms("R", 0, 40 + 35 + 15, 35, 6)
+    bonds = [("CA", "CB", 1), ("CB", "R0", 1)] + _ring_bonds("R", 6, (0, 2, 4))
+    return atoms, bonds
+
+
+def _tyrosine():
+    atoms, bonds = _phenyl_ring()
+    ring3 = atoms[1 + 3]
+    # OH группа к вершине 3 кольца и водород при OH
+    atoms = atoms + [("OH", "O", ring3[2], ring3[3] + 30, 10),
+                     ("HH", "H", ring3[2] + 20, ring3[3] + 30, 7)]
+    bonds = bonds + [("R3", "OH", 1), ("OH", "HH", 1)]
+    return atoms, bonds
+
+
+def _tryptophan():
+    # индол: пиррольное кольцо под CB, бензольное приклеено справа
+    # к общей грани C4-C3
+    atoms = [
+        ("CB", "C", 0, 40, 10),
+        ("C1", "C", 0, 70, 0),       # верхняя точка пиррольного кольца
+        ("C4", "C", 25, 85, 0),      # общий с бензолом
+        ("C3", "C", 25, 115, 0),     # общий с бензолом
+        ("N1", "N", -20, 115, 10),   # азот пиррольного кольца
+        ("C2", "C", -25, 85, 0),
+        ("HN", "H", -35, 125, 7),    # H при азоте
+        ("B1", "C", 40, 65, 0),      # верхняя вершина бензола
+        ("B2", "C", 55, 75, 0),      # правая верхняя
+        ("B3", "C", 55, 125, 0),     # правая нижняя
+        ("B4", "C", 40, 135, 0),     # нижняя
+    ]
+    bonds = [
+        ("CA", "CB", 1),
+        ("CB", "C1", 1),
+        ("C1", "C2", 2),
+        ("C2", "N1", 1),
+        ("N1", "C3", 1),
+        ("C3", "C4", 2),
+        ("C4", "C1", 1),
+        ("N1", "HN", 1),
+        ("C4", "B1", 1),
+        ("B1", "B2", 2),
+        ("B2", "B3", 1),
+        ("B3", "B4", 2),
+        ("B4", "C3", 1),
+    ]
+    return atoms, bonds
+
+
+def _histidine():
+    # имидазольное кольцо, азоты в вершинах 1 и 3
+    ring = _ring_atoms("R", 0, 85, 30, 5, elements={1: "N", 3: "N"})
+    r3 = ring[3]
+    atoms = [("CB", "C", 0, 40, 10)] + ring + [("HR", "H", r3[2] - 20, r3[3] + 10, 7)]
+    bonds = [("CA", "CB", 1), ("CB", "R0", 1)] + _ring_bonds("R", 5, (1, 4)) + [("R3", "HR", 1)]
+    return atoms, bonds
+
+
+def _amide_or_acid(depth, end_1, end_2):
+    # цепочка CH2 длины depth и концевая группа C(=end_1)-end_2
+    names = ("CB", "CG", "CD")[:depth]
+    atoms, bonds, prev = [], [], "CA"
+    for i, atom_name in enumerate(names):
+        atoms.append((atom_name, "C", 0, 40 * (i + 1), 10))
+        bonds.append((prev, atom_name, 1))
+        prev = atom_name
+    end_y = 40 * depth + 30
+    atoms += [("X1", end_1, -30, end_y, 10), ("X2", end_2, 30, end_y, 10)]
+    bonds += [(prev, "X1", 2), (prev, "X2", 1)]
+    return atoms, bonds
+
+
+def _chain(step, chain):
+    # прямая цепочка вниз от альфа-C: chain - последовательность (имя, элемент)
+    atoms, bonds, prev = [], [], "CA"
+    for i, (atom_name, element) in enumerate(chain):
+        atoms.append((atom_name, element, 0, step * (i + 1), 10))
+        bonds.append((prev, atom_name, 1))
+        prev = atom_name
+    return atoms, bonds
+
+
+def _arginine():
+    atoms, bonds = _chain(35, (("CB", "C"), ("CG", "C"), ("CD", "C"), ("CZ", "C")))
+    atoms += [("NH1", "N", -25, 165, 10), ("NH2", "N", 25, 165, 10)]
+    bonds += [("CZ", "NH1", 1), ("CZ", "NH2", 1)]
+    return atoms, bonds
+
+
+SIDE_CHAINS = {
+    "аланин": ([("CB", "C", 0, 45, 10)], [("CA", "CB", 1)]),
+    "глицин": ([("HA2", "H", 0, 40, 7)], [("CA", "HA2", 1)]),
+    "валин": (
+        [("CB", "C", 0, 40, 10), ("CG1", "C", -30, 75, 10), ("CG2", "C", 30, 75, 10)],
+        [("CA", "CB", 1), ("CB", "CG1", 1), ("CB", "CG2", 1)],
+    ),
+    "лейцин": (
+        [("CB", "C", 0, 40, 10), ("CG", "C", 0, 80, 10),
+         ("CD1", "C", -30, 115, 10), ("CD2", "C", 30, 115, 10)],
+        [("CA", "CB", 1), ("CB", "CG", 1), ("CG", "CD1", 1), ("CG", "CD2", 1)],
+    ),
+    "изолейцин": (
+        [("CB", "C", 0, 40, 10), ("CG2", "C", -30, 75, 10),
+         ("CG1", "C", 30, 75, 10), ("CD1", "C", 55, 110, 10)],
+        [("CA", "CB", 1), ("CB", "CG2", 1), ("CB", "CG1", 1), ("CG1", "CD1", 1)],
+    ),
+    # кольцо пролина замыкается на азот скелета, углероды кольца не подписаны
+    "пролин": (
+        [("CB", "C", 0, 40, 0), ("CG", "C", -30, 65, 0), ("CD", "C", -60, 40, 0)],
+        [("CA", "CB", 1), ("CB", "CG", 1), ("CG", "CD", 1), ("CD", "N", 1)],
+    ),
+    "фенилаланин": _phenyl_ring(),
+    "триптофан": _tryptophan(),
+    "серин": _chain(40, (("CB", "C"), ("OG", "O"))),
+    "треонин": (
+        [("CB", "C", 20, 35, 10), ("OG1", "O", 20, 75, 10), ("CG2", "C", -20, 45, 10)],
+        [("CA", "CB", 1), ("CB", "OG1", 1), ("CA", "CG2", 1)],
+    ),
+    "цистеин": _chain(40, (("CB", "C"), ("SG", "S"))),
+    "метионин": (
+        [("CB", "C", 0, 40, 10), ("CG", "C", 35, 75, 10),
+         ("SD", "S", 70, 75, 10), ("CE", "C", 105, 75, 10)],
+        [("CA", "CB", 1), ("CB", "CG", 1), ("CG", "SD", 1), ("SD", "CE", 1)],
+    ),
+    "аспарагин": _amide_or_acid(2, "O", "N"),
+    "глутамин": _amide_or_acid(3, "O", "N"),
+    "аспартат": _amide_or_acid(2, "O", "O"),
+    "глутамат": _amide_or_acid(3, "O", "O"),
+    "лизин": _chain(35, (("CB", "C"), ("CG", "C"), ("CD", "C"), ("CE", "C"), ("NZ", "N"))),
+    "аргинин": _arginine(),
+    "гистидин": _histidine(),
+    "тирозин": _tyrosine(),
+}
+
+
+def build_amino_acid(name):
+    '''собирает молекулу из общего скелета и боковой цепи'''
+    atoms, bonds = SIDE_CHAINS[name]
+    return Molecule(name, BACKBONE_ATOMS + tuple(atoms), BACKBONE_BONDS + tuple(bonds))
+
+
+# все аминокислоты игры: русское название -> молекула
+AMINO_ACIDS = {
+    name: build_amino_acid(name)
+    for name in (
+        "аланин", "глицин", "валин", "лейцин", "изолейцин", "пролин",
+        "фенилаланин", "триптофан", "серин", "треонин", "цистеин", "метионин",
+        "аспарагин", "глутамин", "аспартат", "глутамат", "лизин", "аргинин",
+        "гистидин", "тирозин",
+    )
+}
+
+
+# структуры вопросов с сервера класса (client.RemoteSession): номер вопроса -> Molecule.
+# Названия ученику не приходят, рисуется только структура
+REMOTE_MOLECULES = {}
+
+
+def get_molecule(name):
+    '''молекула по названию аминокислоты или по номеру вопроса с сервера (None - нет такой)'''
+    molecule = AMINO_ACIDS.get(name)
+    if molecule is None:
+        molecule = REMOTE_MOLECULES.get(name)
+    return molecule
+
+
+def structure_data(molecule):
+    '''структура без названий (для JSON): {"atoms": [[элемент, x, y, радиус]],
+    "bonds": [[номер атома 1, номер атома 2, порядок]]}'''
+    return {
+        "atoms": [[e, x, y, r] for e, x, y, r in
+                  zip(molecule.elements, molecule.xs, molecule.ys, molecule.radii)],
+        "bonds": [[a, b, order] for a, b, order in
+                  zip(molecule.bond_a, molecule.bond_b, molecule.bond_order)],
+    }
+
+
+def molecule_from_data(name, data):
+    '''молекула из structure_data; ValueError, если данные не такие'''
+    try:
+        atoms = [(str(i), str(e), float(x), float(y), int(r))
+                 for i, (e, x, y, r) in enumerate(data["atoms"])]
+        bonds = [(str(int(a)), str(int(b)), int(order)) for a, b, order in data["bonds"]]
+        return Molecule(name, atoms, bonds)
+    except (KeyError, TypeError, OverflowError) as error:
+        raise ValueError(f"неправильная структура: {error}")
+
+
+# английское название, трёхбуквенный и однобуквенный коды
+AMINO_ACID_CODES = {
+    "аланин": ("alanine", "Ala", "A"),
+    "глицин": ("glycine", "Gly", "G"),
+    "валин": ("valine", "Val", "V"),
+    "лейцин": ("leucine", "Leu", "L"),
+    "изолейцин": ("isoleucine", "Ile", "I"),
+    "пролин": ("proline", "Pro", "P"),
+    "фенилаланин": ("phenylalanine", "Phe", "F"),
+    "триптофан": ("tryptophan", "Trp", "W"),
+    "серин": ("serine", "Ser", "S"),
+    "треонин": ("threonine", "Thr", "T"),
+    "цистеин": ("cysteine", "Cys", "C"),
+    "метионин": ("methionine", "Met", "M"),
+    "аспарагин": ("asparagine", "Asn", "N"),
+    "глутамин": ("glutamine", "Gln", "Q"),
+    "аспартат": ("aspartate", "Asp", "D"),
+    "глутамат": ("glutamate", "Glu", "E"),
+    "лизин": ("lysine", "Lys", "K"),
+    "аргинин": ("arginine", "Arg", "R"),
+    "гистидин": ("histidine", "His", "H"),
+    "тирозин": ("tyrosine", "Tyr", "Y"),
+}
+
+# русские трёхбуквенные сокращения
+RUSSIAN_CODES = {
+    "аланин": "Ала",
+    "глицин": "Гли",
+    "валин": "Вал",
+    "лейцин": "Лей",
+    "изолейцин": "Иле",
+    "пролин": "Про",
+    "фенилаланин": "Фен",
+    "триптофан": "Трп",
+    "серин": "Сер",
+    "треонин": "Тре",
+    "цистеин": "Цис",
+    "метионин": "Мет",
+    "аспарагин": "Асн",
+    "глутамин": "Глн",
+    "аспартат": "Асп",
+    "глутамат": "Глу",
+    "лизин": "Лиз",
+    "аргинин": "Арг",
+    "гистидин": "Гис",
+    "тирозин": "Тир",
+}
+
+# другие принятые названия
+EXTRA_NAMES = {
+    "аспартат": ("аспарагиновая кислота", "aspartic acid"),
+    "глутамат": ("глутаминовая кислота", "glutamic acid"),
+}
@@ -1,15 +1,140 @@
 # ui.py
+import math
+import time
 import pygame
 from settings import *
+from fonts import get_font
+from idle import ticks
+
+# период мигания курсора в поле ввода
+CURSOR_BLINK_MS = 500
+
+# сколько раз текст отрисовывался шрифтом (для оверлея и отчёта)
+TEXT_STATS = {"renders": 0}
+
+# качество анимаций, его снижает profiler.FrameBudget, когда кадры не укладываются в бюджет:
+#   HIGH   - сглаживание (rotozoom) и все кадры
+#   MEDIUM - без сглаживания
+#   LOW    - без сглаживания и только LOW_QUALITY_STEPS промежуточных кадров
+QUALITY_LOW, QUALITY_MEDIUM, QUALITY_HIGH = 0, 1, 2
+LOW_QUALITY_STEPS = 4
+# подсветка сообщения с ответом
+HIGHLIGHT_MS = 600
+
+
+def animation_progress(start_ms, duration_ms, now_ms, quality=QUALITY_HIGH):
+    """доля прошедшей анимации от 0 до 1; на низком качестве - ступенями"""
+    t = min(1.0, max(0.0, (now_ms - start_ms) / duration_ms))
+    if quality == QUALITY_LOW and t < 1:
+        t = math.floor(t * LOW_QUALITY_STEPS) / LOW_QUALITY_STEPS
+    return t
+
+
+def ease(t):
+    """плавный разгон и торможение"""
+    return t * t * (3 - 2 * t)
+
+
+def mix(color, other, t):
+    """цвет между color (t = 0) и other (t = 1)"""
+    return tuple(round(a + (b - a) * t) for a, b in zip(color, other))
+
+
+def render_text(font, text, color):
+    """font.render со счётчиком отрисовок текста"""
+    TEXT_STATS["renders"] += 1
+    return font.render(text, True, color)
+
+
+class Layout:
+    """Перевод координат макета WIDTH x HEIGHT в пиксели окна любого размера.
+
+    Макет растягивается равномерно (scale) и центрируется, по краям остаются поля.
+    """
+    def __init__(self, size, base=(WIDTH, HEIGHT)):
+        self.size = tuple(size)
+        self.scale = min(size[0] / base[0], size[1] / base[1])
+        self.ox = (size[0] - base[0] * self.scale) / 2
+        self.oy = (size[1] - base[1] * self.scale) / 2
+
+    def point(self, x, y):
+        return round(self.ox + x * self.scale), round(self.oy + y * self.scale)
+
+    def rect(self, x, y, w, h):
+        return pygame.Rect(self.point(x, y), (round(w * self.scale), round(h * self.scale)))
+
+    def px(self, value):
+        """длина или размер шрифта в пикселях окна, не меньше 1"""
+        return max(1, round(value * self.scale))
+
+
+class StaticLayer:
+    """Заранее собранный фон: всё, что не меняется, рисуется один раз.
+
+    painters - функции painter(surface), рисующие статичное содержимое;
+    restore копирует нужную область фона на экран одним blit.
+    """
+    def __init__(self, size, color, painters):
+        self.color = color
+        self.painters = list(painters)
+        # сразу в формате экрана, чтобы blit не переводил пиксели
+        display = pygame.display.get_surface()
+        if display is not None:
+            self.surface = pygame.Surface(size, 0, display)
+        else:
+            self.surface = pygame.Surface(size)
+        self.rebuild()
+
+    def rebuild(self):
+        """Собирает фон заново (после изменения статичного содержимого)"""
+        self.surface.fill(self.color)
+        for painter in self.painters:
+            painter(self.surface)
+
+    def restore(self, screen, rect):
+        screen.blit(self.surface, rect, rect)
+
 
 class InputBox:
-    def __init__(self, x, y, w, h, text=''):
+    def __init__(self, x, y, w, h, text='', suggest=None):
         self.rect = pygame.Rect(x, y, w, h)
         self.color = GRAY
         self.text = text
-        self.font = pygame.font.SysFont(FONT_NAME, FONT_SIZE)
-        self.txt_surface = self.font.render(text, True, BLACK)
+        self.font = get_font(FONT_NAME, FONT_SIZE)
+        self.txt_surface = render_text(self.font, text, BLACK)
         self.active = False
+        # масштаб макета (Layout.scale) для рамки и отступов
+        self.ui_scale = 1
+        # курсор мигает, пока поле активно
+        self.cursor_visible = True
+        self.cursor_toggle_ms = 0
+        # suggest(text) -> список подходящих ответов; первый показывается серым, Tab - принять
+        self.suggest = suggest
+        self.suggestion = ""
+        self.suggestion_surface = None
+        # поле нужно перерисовать
+        self.dirty = True
+
+    def relayout(self, rect, font, ui_scale):
+        """Новое место и шрифт после изменения размера окна"""
+        self.rect = pygame.Rect(rect)
+        self.font = font
+        self.ui_scale = ui_scale
+        self.txt_surface = render_text(self.font, self.text, BLACK)
+        self.suggestion = ""
+        self._update_suggestion()
+        self.dirty = True
+
+    def _update_suggestion(self):
+        suggestion = ""
+        if self.suggest is not None and self.text.strip():
+            found = self.suggest(self.text)
+            if found:
+                suggestion = found[0]
+        if suggestion != self.suggestion:
+            self.suggestion = suggestion
+            self.suggestion_surface = (render_text(self.font, suggestion, GRAY)
+                                       if suggestion else None)
 
     def handle_event(self, event):
         """Обрабатывает нажатия на мышь и клавиатуру"""
@@ -19,7 +144,12 @@ class InputBox:
 
             else:
                 self.active = False
-            self.color = BLUE if self.active else GRAY
+            color = BLUE if self.active else GRAY
+            if color != self.color:
+                self.color = color
+                self.cursor_visible = True
+                self.cursor_toggle_ms = ticks() + CURSOR_BLINK_MS
+                self.dirty = True
 
         if event.type == pygame.KEYDOWN:
             if self.active:
@@ -28,26 +158,444 @@ class InputBox:
                     return result
                 elif event.key == pygame.K_BACKSPACE:
                     self.text = self.text[:-1]
+                elif event.key == pygame.K_TAB:
+                    if self.suggestion:
+                        self.text = self.suggestion
                 else:
                     if len(self.text) < 30:
                         self.text += event.unicode
                 
-                self.txt_surface = self.font.render(self.text, True, BLACK)
+                self.txt_surface = render_text(self.font, self.text, BLACK)
+                self._update_suggestion()
+                # во время набора курсор не мигает
+                self.cursor_visible = True
+                self.cursor_toggle_ms = ticks() + CURSOR_BLINK_MS
+                self.dirty = True
 
         return None
 
+    def update(self, now_ms):
+        """Мигание курсора; now_ms - время по idle.ticks()"""
+        if self.active and now_ms >= self.cursor_toggle_ms:
+            self.cursor_visible = not self.cursor_visible
+            self.cursor_toggle_ms = now_ms + CURSOR_BLINK_MS
+            self.dirty = True
+
+    def next_deadline(self):
+        """Когда полю понадобится перерисовка без событий (None - не понадобится)"""
+        if self.active:
+            return self.cursor_toggle_ms
+        return None
+
 
     def draw(self, screen):
         """Рисует поле ввода"""
-        pygame.draw.rect(screen, self.color, self.rect, 3)
-        pygame.draw.rect(screen, WHITE, (self.rect.x + 3, self.rect.y + 3, 
-                                         self.rect.width - 6, self.rect.height - 6))
-        
-        screen.blit(self.txt_surface, (self.rect.x + 10, self.rect.y + 8))
-        
-        
+        k = self.ui_scale
+        border = max(1, round(3 * k))
+        pad_x, pad_y = round(10 * k), round(8 * k)
+        pygame.draw.rect(screen, self.color, self.rect, border)
+        pygame.draw.rect(screen, WHITE, (self.rect.x + border, self.rect.y + border,
+                                         self.rect.width - 2 * border,
+                                         self.rect.height - 2 * border))
+
+        if self.suggestion_surface is not None and self.suggestion != self.text:
+            # подсказка справа, если помещается рядом с набранным текстом
+            x = self.rect.right - pad_x - self.suggestion_surface.get_width()
+            if x > self.rect.x + 2 * pad_x + self.txt_surface.get_width():
+                screen.blit(self.suggestion_surface, (x, self.rect.y + pad_y))
+        screen.blit(self.txt_surface, (self.rect.x + pad_x, self.rect.y + pad_y))
+        if self.active and self.cursor_visible:
+            cursor_x = self.rect.x + pad_x + round(2 * k) + self.txt_surface.get_width()
+            pygame.draw.line(screen, BLACK, (cursor_x, self.rect.y + round(10 * k)),
+                             (cursor_x, self.rect.bottom - round(10 * k)), max(1, round(2 * k)))
+        self.dirty = False
+
+    def dirty_rect(self):
+        """Область, которую нужно обновить на экране"""
+        return self.rect
+
     def clear(self):
         """Очищает поле ввода"""
         self.text = ""
-        self.txt_surface = self.font.render("", True, BLACK)
+        self.txt_surface = render_text(self.font, "", BLACK)
+        self._update_suggestion()
+        self.dirty = True
+
+
+class TextLabel:
+    """Строка текста, которая перерисовывается только при изменении"""
+    def __init__(self, font, color, pos, text=''):
+        self.font = font
+        self.color = color
+        self.pos = pos
+        self.text = None
+        self.surface = None
+        self.rect = pygame.Rect(pos, (0, 0))
+        self.prev_rect = self.rect
+        self.dirty = True
+        self.set_text(text)
+
+    def relayout(self, font, pos):
+        """Новое место и шрифт после изменения размера окна"""
+        self.font = font
+        self.pos = pos
+        text, self.text = self.text, None
+        self.set_text(text)
+
+    def set_text(self, text):
+        """Меняет текст, если он другой"""
+        if text == self.text:
+            return
+        self.text = text
+        self.surface = render_text(self.font, text, self.color)
+        self.rect = self.surface.get_rect(topleft=self.pos)
+        self.dirty = True
+
+    def draw(self, screen):
+        screen.blit(self.surface, self.rect)
+        self.prev_rect = self.rect
+        self.dirty = False
+
+    def dirty_rect(self):
+        """Старое и новое место текста"""
+        return self.rect.union(self.prev_rect)
+
+
+class MessageBox:
+    """Окно с результатом ответа по центру экрана"""
+    def __init__(self, font, center_x, y):
+        self.font = font
+        self.center_x = center_x
+        self.y = y
+        self.message = ""
+        self.color = BLACK
+        self.surface = None
+        self.rect = pygame.Rect(center_x, y, 0, 0)
+        self.prev_rect = self.rect
+        self.dirty = False
+        # масштаб макета (Layout.scale) для рамки и отступов
+        self.ui_scale = 1
+        # подсветка фона после show(..., highlight=True): начало и текущая доля
+        self.quality = QUALITY_HIGH
+        self.highlight_start = None
+        self.highlight_t = 1.0
+
+    @property
+    def animating(self):
+        return self.highlight_start is not None
+
+    def relayout(self, font, center_x, y, ui_scale):
+        """Новое место и шрифт после изменения размера окна"""
+        self.font = font
+        self.center_x = center_x
+        self.y = y
+        self.ui_scale = ui_scale
+        self.prev_rect = self.rect = pygame.Rect(center_x, y, 0, 0)
+        if self.message:
+            self.show(self.message, self.color)
+
+    def show(self, message, color, highlight=False):
+        """Показывает сообщение; highlight - фон вспыхивает цветом сообщения и гаснет"""
+        if highlight:
+            self.highlight_start = ticks()
+            self.highlight_t = 0.0
+        self.message = message
+        self.color = color
+        self.surface = render_text(self.font, message, color)
+        k = self.ui_scale
+        self.rect = pygame.Rect(
+            self.center_x - self.surface.get_width() // 2 - round(20 * k),
+            self.y,
+            self.surface.get_width() + round(40 * k),
+            self.surface.get_height() + round(10 * k),
+        )
+        self.dirty = True
+
+    def hide(self):
+        """Убирает сообщение с экрана"""
+        self.highlight_start = None
+        if self.message:
+            self.message = ""
+            self.dirty = True
+
+    def update(self, now_ms):
+        """Шаг подсветки; перерисовка, только когда её доля изменилась"""
+        if self.highlight_start is None:
+            return
+        t = animation_progress(self.highlight_start, HIGHLIGHT_MS, now_ms, self.quality)
+        if t != self.highlight_t:
+            self.highlight_t = t
+            self.dirty = True
+        if t >= 1:
+            self.highlight_start = None
+
+    def draw(self, screen):
+        if self.message:
+            fill = WHITE
+            if self.highlight_t < 1:
+                fill = mix(mix(WHITE, self.color, 0.35), WHITE, ease(self.highlight_t))
+            pygame.draw.rect(screen, fill, self.rect)
+            pygame.draw.rect(screen, self.color, self.rect, max(1, round(3 * self.ui_scale)))
+            screen.blit(self.surface, (self.center_x - self.surface.get_width() // 2,
+                                       self.y + round(5 * self.ui_scale)))
+            self.prev_rect = self.rect
+        else:
+            self.prev_rect = pygame.Rect(self.center_x, self.y, 0, 0)
+        self.dirty = False
+
+    def dirty_rect(self):
+        return self.rect.union(self.prev_rect)
+
+
+class MoleculeFrame:
+    """Рамка с молекулой; перерисовывается при смене молекулы.
+
+    Колесо мыши - масштаб, Shift+колесо или перетаскивание правой кнопкой -
+    поворот, перетаскивание левой кнопкой - сдвиг, средняя кнопка - сброс.
+
+    Смена молекулы анимируется (transition): fade - растворение, slide -
+    сдвиг влево, rotate - старая молекула поворачивается и уменьшается,
+    новая появляется так же. Обе картинки рисуются один раз в начале
+    перехода, кадры перехода только смешивают их.
+    """
+    TRANSITIONS = ("fade", "slide", "rotate")
+    ZOOM_STEP = 1.1
+    ROTATE_STEP = 15
+    # альфа-углерод молекулы - на столько ниже верха рамки (в координатах макета)
+    ANCHOR_Y = 140
+    # фаза кадра для profiler.FrameTimer
+    phase = "molecule"
+
+    def __init__(self, rect, draw_molecule, draw_transformed=None):
+        self.rect = pygame.Rect(rect)
+        # масштаб макета (Layout.scale), с ним рисуются рамка и молекула
+        self.scale = 1
+        # draw_molecule(screen, key, x, y, scale) рисует молекулу
+        self.draw_molecule = draw_molecule
+        # draw_transformed(screen, key, x, y, view, scale) рисует с масштабом и поворотом
+        self.draw_transformed = draw_transformed
+        self.view = None
+        self.drag_button = None
+        self.key = None
+        self.dirty = True
+        # переход при смене молекулы (None - мгновенно) и его длительность
+        self.transition = None
+        self.transition_ms = TRANSITION_MS
+        self.quality = QUALITY_HIGH
+        # (старая картинка, новая картинка, начало) на время перехода
+        self._transition = None
+        self._transition_t = 0.0
+
+    @property
+    def animating(self):
+        return self._transition is not None
+
+    def relayout(self, rect, scale):
+        """Новое место и масштаб после изменения размера окна"""
+        self.rect = pygame.Rect(rect)
+        self.scale = scale
+        self._transition = None
+        self.dirty = True
+
+    def set_molecule(self, key):
+        if key != self.key:
+            old = self._snapshot() if self.transition and self.key is not None else None
+            self.key = key
+            if self.view is not None:
+                self.view.reset()
+            if old is not None:
+                self._transition = (old, self._snapshot(), ticks())
+                self._transition_t = 0.0
+            self.dirty = True
+
+    def _inner_rect(self):
+        border = max(1, round(3 * self.scale))
+        return self.rect.inflate(-2 * border, -2 * border)
+
+    def _anchor(self):
+        return self.rect.centerx, self.rect.y + round(self.ANCHOR_Y * self.scale)
+
+    def _snapshot(self):
+        """Содержимое рамки (без самой рамки) на прозрачной поверхности"""
+        inner = self._inner_rect()
+        surf = pygame.Surface(inner.size, pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert_alpha()
+            surf.fill((0, 0, 0, 0))
+        x, y = self._anchor()
+        x, y = x - inner.x, y - inner.y
+        if self.view is None or self.view.is_identity():
+            self.draw_molecule(surf, self.key, x, y, self.scale)
+        else:
+            self.draw_transformed(surf, self.key, x, y, self.view, self.scale)
+        return surf
+
+    def update(self, now_ms):
+        """Шаг перехода; перерисовка, только когда его доля изменилась"""
+        if self._transition is None:
+            return
+        t = animation_progress(self._transition[2], self.transition_ms, now_ms, self.quality)
+        if t != self._transition_t:
+            self._transition_t = t
+            self.dirty = True
+        if t >= 1:
+            self._transition = None
+            self.dirty = True
+
+    def _draw_transition(self, screen):
+        old, new, _ = self._transition
+        area = self._inner_rect()
+        e = ease(self._transition_t)
+        screen.set_clip(area)
+        if self.transition == "slide":
+            shift = round(e * area.width)
+            screen.blit(old, (area.x - shift, area.y))
+            screen.blit(new, (area.right - shift, area.y))
+        elif self.transition == "rotate":
+            # первая половина - старая уходит, вторая - новая появляется
+            if e < 0.5:
+                surf, zoom, angle = old, 1 - 2 * e, 180 * e
+            else:
+                surf, zoom, angle = new, 2 * e - 1, -180 * (1 - e)
+            if zoom > 0.02:
+                if self.quality == QUALITY_HIGH:
+                    surf = pygame.transform.rotozoom(surf, angle, zoom)
+                else:
+                    size = [max(1, round(side * zoom)) for side in surf.get_size()]
+                    surf = pygame.transform.rotate(pygame.transform.scale(surf, size), angle)
+                screen.blit(surf, surf.get_rect(center=area.center))
+        else:
+            old.set_alpha(round(255 * (1 - e)))
+            new.set_alpha(round(255 * e))
+            screen.blit(old, area)
+            screen.blit(new, area)
+        screen.set_clip(None)
+
+    def _get_view(self):
+        if self.view is None:
+            from transform import Transform
+            self.view = Transform()
+        return self.view
+
+    def handle_event(self, event):
+        """Масштаб, поворот и сдвиг молекулы мышью"""
+        if self.draw_transformed is None:
+            return
+        if event.type == pygame.MOUSEWHEEL:
+            # у событий из записи (recorder.py) положение мыши и модификаторы свои
+            if not self.rect.collidepoint(getattr(event, "pos", None) or pygame.mouse.get_pos()):
+                return
+            view = self._get_view()
+            mods = getattr(event, "mod", None)
+            if mods is None:
+                mods = pygame.key.get_mods()
+            if mods & pygame.KMOD_SHIFT:
+                view.rotate(self.ROTATE_STEP * event.y)
+            else:
+                view.zoom(self.ZOOM_STEP ** event.y)
+            self.dirty = True
+        elif event.type == pygame.MOUSEBUTTONDOWN and self.rect.collidepoint(event.pos):
+            if event.button in (1, 3):
+                self.drag_button = event.button
+            elif event.button == 2 and self.view is not None:
+                self.view.reset()
+                self.dirty = True
+        elif event.type == pygame.MOUSEBUTTONUP:
+            self.drag_button = None
+        elif event.type == pygame.MOUSEMOTION and self.drag_button is not None:
+            view = self._get_view()
+            if self.drag_button == 1:
+                view.pan(*event.rel)
+            else:
+                view.rotate(event.rel[0] * 0.5)
+            self.dirty = True
+
+    def draw_static(self, surface):
+        """Рамка не меняется и рисуется один раз в StaticLayer"""
+        pygame.draw.rect(surface, DARK_BLUE, self.rect, max(1, round(3 * self.scale)))
+
+    def draw(self, screen):
+        if self._transition is not None:
+            self._draw_transition(screen)
+        elif self.key is not None:
+            x, y = self._anchor()
+            if self.view is None or self.view.is_identity():
+                self.draw_molecule(screen, self.key, x, y, self.scale)
+            else:
+                screen.set_clip(self._inner_rect())
+                self.draw_transformed(screen, self.key, x, y, self.view, self.scale)
+                screen.set_clip(None)
+        self.dirty = False
+
+    def dirty_rect(self):
+        return self.rect
+
+
+class DirtyRenderer:
+    """Перерисовывает только изменившиеся элементы и обновляет их области экрана"""
+    def __init__(self, screen, draw_background, elements, timer=None):
+        self.screen = screen
+        # draw_background(screen, rect) восстанавливает фон в области rect
+        self.draw_background = draw_background
+        self.elements = elements
+        # profiler.FrameTimer: время отрисовки по фазам (phase элемента, "flip")
+        self.timer = timer
+        self.full_redraw = True
+        # список обновлённых областей переиспользуется от кадра к кадру
+        self._rects = []
+        self._screen_rect = [screen.get_rect()]
+
+    def invalidate(self):
+        """Следующий кадр будет нарисован целиком"""
+        self.full_redraw = True
+
+    def _draw_element(self, element, area):
+        """area - где восстановить фон перед отрисовкой (None - фон уже на месте)"""
+        timer = self.timer
+        if timer is None:
+            if area is not None:
+                self.draw_background(self.screen, area)
+            element.draw(self.screen)
+            return
+        start = time.perf_counter()
+        if area is not None:
+            self.draw_background(self.screen, area)
+        element.draw(self.screen)
+        timer.add(getattr(element, "phase", "ui"), time.perf_counter() - start)
+
+    def _present(self, rects):
+        start = time.perf_counter()
+        if rects is None:
+            pygame.display.flip()
+        elif len(rects) == 1:
+            # со списком pygame выделяет память под каждый вызов
+            pygame.display.update(rects[0])
+        else:
+            pygame.display.update(rects)
+        if self.timer is not None:
+            self.timer.add("flip", time.perf_counter() - start)
+
+    def render(self):
+        """Рисует кадр, возвращает список обновлённых прямоугольников
+        (действителен до следующего кадра)"""
+        screen = self.screen
+        if self.full_redraw:
+            rects = self._screen_rect
+            rects[0] = screen.get_rect()
+            self.draw_background(screen, rects[0])
+            for element in self.elements:
+                self._draw_element(element, None)
+            self.full_redraw = False
+            self._present(None)
+            return rects
 
+        rects = self._rects
+        rects.clear()
+        for element in self.elements:
+            if element.dirty:
+                area = element.dirty_rect()
+                self._draw_element(element, area)
+                rects.append(area)
+        if rects:
+            self._present(rects)
+        return rects